@@ -1,4 +1,4 @@
-import { useRef, useState } from "react";
+import { MutableRefObject, useCallback, useRef, useState } from "react";
 import useWebSocket, { ReadyState } from "react-use-websocket";
 import urlConfig from "../config/url.config.ts";
 import { useAuthentication } from "../contexts/AuthenticationContext.tsx";
@@ -12,7 +12,16 @@ export interface useApiWebSocketReturn {
     error: WebSocketEventMap["error"] | null;
 }
 
-const useApiWebSocket = (path: string, params: Record<string, string> = {}): useApiWebSocketReturn => {
+/**
+ * @param {string} path
+ * @param {Record<string, string>} [params] query parameters of every connection
+ * @param {MutableRefObject<Record<string, string>>} [resumeParamsRef] query parameters read on each (re)connection, without reconnecting when they change
+ */
+const useApiWebSocket = (
+    path: string,
+    params: Record<string, string> = {},
+    resumeParamsRef?: MutableRefObject<Record<string, string>>,
+): useApiWebSocketReturn => {
     const { tokens } = useAuthentication();
     const { refreshTokens } = useApi();
 
@@ -49,7 +58,12 @@ const useApiWebSocket = (path: string, params: Record<string, string> = {}): use
         return true;
     };
 
-    const { lastJsonMessage, readyState } = useWebSocket(getUrl(path, params), { onError, shouldReconnect });
+    const getSocketUrl = useCallback(
+        () => getUrl(path, { ...params, ...resumeParamsRef?.current }),
+        [path, JSON.stringify(params), tokens?.access_token],
+    );
+
+    const { lastJsonMessage, readyState } = useWebSocket(getSocketUrl, { onError, shouldReconnect });
 
     const connectionStatus: string = {
         [ReadyState.CONNECTING]: "CONNECTING",
@@ -1,4 +1,4 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import useApiWebSocket from "./useApiWebSocket";
 import { Machine, MachinePropertiesPayload, MachineState, MachineStatePayload, MachineWebSocketMessage } from "../types/api.types";
 import { isNull, isUndefined, keys, mapValues, merge, pick } from "lodash";
@@ -19,13 +19,37 @@ export interface useMachineWebSocketReturn {
  * @param {?string} [target] if mode === "subscribed"
  */
 const useMachineWebSocket = (mode: MachineStateRetrievalModes, target?: string): useMachineWebSocketReturn => {
-    const { lastJsonMessage, error, connectionStatus } = useApiWebSocket(`/ws/machines/${mode}`, { machine_uuid: target });
+    // position in the event stream, a reconnection resumes from it instead of refetching the machines
+    const resumeParamsRef = useRef<Record<string, string>>({});
+    const resumeTargetRef = useRef(`${mode}/${target}`);
+
+    // reset before the new connection reads it
+    if (resumeTargetRef.current !== `${mode}/${target}`) {
+        resumeTargetRef.current = `${mode}/${target}`;
+        resumeParamsRef.current = {};
+    }
+
+    const { lastJsonMessage, error, connectionStatus } = useApiWebSocket(`/ws/machines/${mode}`, { machine_uuid: target }, resumeParamsRef);
     const [machines, setMachines] = useState<Record<string, Machine>>(null);
     const [loading, setLoading] = useState(true);
 
     const onNewMessage = (message: MachineWebSocketMessage | null) => {
         if (isNull(message)) return;
 
+        if (!isUndefined(message.seq) && !isNull(message.seq) && message.seq > Number(resumeParamsRef.current.last_seq ?? 0)) {
+            resumeParamsRef.current = { ...resumeParamsRef.current, last_seq: String(message.seq) };
+        }
+
+        if (message.type === "SYNC") {
+            const { epoch, seq, resumed, events } = (message as MachineWebSocketMessage<"SYNC">).body;
+            resumeParamsRef.current = { epoch, last_seq: String(seq) };
+
+            // events could not be replayed, the snapshot that follows replaces the machines
+            if (!resumed) return setMachines(null);
+
+            return events.forEach(onNewMessage);
+        }
+
         const generateNewMachine = (machine: MachinePropertiesPayload): Machine =>
             ({
                 state: "FETCHING",
@@ -40,6 +64,11 @@ const useMachineWebSocket = (mode: MachineStateRetrievalModes, target?: string):
             return setMachines((prev) => ({ ...prev, [staticData.uuid]: generateNewMachine(staticData) }));
         }
 
+        if (message.type === "CREATE_MANY") {
+            const staticDataObject = (message as MachineWebSocketMessage<"CREATE_MANY">).body;
+            return setMachines((prev) => ({ ...prev, ...mapValues(staticDataObject, generateNewMachine) }));
+        }
+
         if (message.type === "DATA_STATIC") {
             if (loading) setLoading(false);
             const staticDataObject = (message as MachineWebSocketMessage<"DATA_STATIC">).body;
@@ -71,13 +100,13 @@ const useMachineWebSocket = (mode: MachineStateRetrievalModes, target?: string):
             });
         }
 
+        const updateStateProperty = (oldState: MachineState, active: boolean, loading: boolean): MachineState => {
+            if (loading) return ["BOOTING_UP", "SHUTTING_DOWN"].includes(oldState) ? oldState : "LOADING";
+            return active ? "ACTIVE" : oldState === "ERROR" ? "ERROR" : "OFFLINE";
+        };
+
         if (message.type === "DATA_DYNAMIC") {
             return setMachines((prev) => {
-                const updateStateProperty = (oldState: MachineState, active: boolean, loading: boolean): MachineState => {
-                    if (loading) return ["BOOTING_UP", "SHUTTING_DOWN"].includes(oldState) ? oldState : "LOADING";
-                    return active ? "ACTIVE" : oldState === "ERROR" ? "ERROR" : "OFFLINE";
-                };
-
                 const merged = mapValues(prev, (machine, key) => {
                     if (isUndefined(message?.body?.[key])) {
                         return { ...machine, state: "FETCHING" } as Machine;
@@ -96,6 +125,32 @@ const useMachineWebSocket = (mode: MachineStateRetrievalModes, target?: string):
             });
         }
 
+        if (message.type === "DATA_DYNAMIC_DELTA") {
+            const { changed, removed } = (message as MachineWebSocketMessage<"DATA_DYNAMIC_DELTA">).body;
+
+            return setMachines((prev) => {
+                const updated = { ...prev };
+
+                removed.forEach((uuid) => {
+                    if (!isUndefined(updated[uuid])) updated[uuid] = { ...updated[uuid], state: "FETCHING" } as Machine;
+                });
+
+                keys(changed).forEach((uuid) => {
+                    if (isUndefined(updated[uuid])) return;
+
+                    const { active, loading, ...machineStatePayload } = changed[uuid];
+
+                    updated[uuid] = {
+                        ...updated[uuid],
+                        ...machineStatePayload,
+                        state: updateStateProperty(updated[uuid].state, active, loading),
+                    };
+                });
+
+                return updated;
+            });
+        }
+
         if (message.type === "DATA_DYNAMIC_DISKS" || message.type === "DATA_DYNAMIC_CONNECTIONS") {
             const filtered = pick(message.body, keys(machines));
             setMachines((prev) => merge(prev, filtered));
@@ -183,6 +183,8 @@ export interface Machine
 export type WebSocketMessageTypes =
     | "CREATE"
     | "DELETE"
+    | "CREATE_MANY"
+    | "SYNC"
     | "BOOTUP_START"
     | "BOOTUP_SUCCESS"
     | "BOOTUP_FAIL"
@@ -191,14 +193,18 @@ export type WebSocketMessageTypes =
     | "SHUTDOWN_FAIL"
     | "DATA_STATIC"
     | "DATA_DYNAMIC"
+    | "DATA_DYNAMIC_DELTA"
     | "DATA_DYNAMIC_DISKS"
     | "DATA_DYNAMIC_CONNECTIONS";
 
 type MachineWebSocketBodyMap = {
     CREATE: MachinePropertiesPayload;
     DELETE: { uuid: string };
+    CREATE_MANY: Record<string, MachinePropertiesPayload>;
+    SYNC: { epoch: string; seq: number; resumed: boolean; events: MachineWebSocketMessage[] };
     DATA_STATIC: Record<string, MachinePropertiesPayload>;
     DATA_DYNAMIC: Record<string, MachineStatePayload>;
+    DATA_DYNAMIC_DELTA: { changed: Record<string, Partial<MachineStatePayload>>; removed: string[] };
     DATA_DYNAMIC_DISKS: Record<string, MachineDisksPayload>;
     DATA_DYNAMIC_CONNECTIONS: Record<string, MachineConnectionsPayload>;
     BOOTUP_START: { uuid: string };
@@ -213,6 +219,8 @@ export type MachineWebSocketMessage<T extends keyof MachineWebSocketBodyMap = ke
     uuid: string;
     timestamp: string; // ISO 8601 Z
     type: T;
+    seq: number | null; // events only
+
     body: MachineWebSocketBodyMap[T];
 };
 
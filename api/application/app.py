@@ -7,6 +7,11 @@ from pydantic import ValidationError
 from contextlib import asynccontextmanager
 from modules.postgresql.main import open_async_pool, close_async_pool
 from modules.machine_websockets.main_manager import MachineWebSocketManager
+from modules.websockets.cluster_bus import ClusterBus
+from modules.libvirt_socket import LibvirtConnectionPool, LibvirtExecutor
+from modules.machine_state.state_cache import MachineStateCache
+from modules.users.last_active import LastActiveBuffer
+from modules.authentication.password_hasher import PasswordHasher
 
 from .endpoints.authentication import authentication
 from .endpoints.machine_resources.iso_files import main as iso_files, upload as iso_files_upload
@@ -17,13 +22,22 @@ from .endpoints.users import users, groups, roles
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    await MachineStateCache.start()
     MachineWebSocketManager.start_all_broadcasts()
     await open_async_pool()
+    await ClusterBus.start()
+    LastActiveBuffer.start()
 
     yield
 
     MachineWebSocketManager.stop_all_broadcasts()
+    await ClusterBus.stop()
+    await LastActiveBuffer.stop()
     await close_async_pool()
+    await MachineStateCache.stop()
+    LibvirtExecutor.shutdown()
+    PasswordHasher.shutdown()
+    LibvirtConnectionPool.close()
 
 app = FastAPI(root_path="/api", lifespan=lifespan)
 app.add_middleware(
@@ -34,6 +48,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 app.include_router(authentication.router)
+app.include_router(authentication.debug_router)
 app.include_router(iso_files.router)
 app.include_router(iso_files_upload.router)
 app.include_router(machine_templates.router)
@@ -42,6 +57,7 @@ app.include_router(machines.debug_router)
 app.include_router(websockets.router)
 app.include_router(network.router)
 app.include_router(users.router)
+app.include_router(users.debug_router)
 app.include_router(groups.router)
 app.include_router(roles.router)
 
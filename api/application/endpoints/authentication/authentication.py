@@ -1,16 +1,18 @@
 import logging
 import re
 
-from fastapi import APIRouter, Depends, Header, Cookie
+from fastapi import APIRouter, Depends, HTTPException, Header, Cookie
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.responses import JSONResponse, Response
 from typing import Annotated
 
-from modules.authentication.validation import DependsOnRefreshToken, authenticate_user, get_authenticated_user, encode_guacamole_connection_string
+from config.permissions_config import PERMISSIONS
+from modules.authentication.validation import DependsOnAdministrativeAuthentication, DependsOnRefreshToken, authenticate_user, get_authenticated_administrator, get_authenticated_user, encode_guacamole_connection_string
 from modules.authentication.tokens import create_access_token, get_user_tokens
-from modules.authentication.models import Tokens
+from modules.authentication.models import ForwardAuthCacheMetrics, Tokens
 from modules.exceptions import HTTPUnauthorizedException
-from modules.authentication.cache import get_cached_uuid
+from modules.authentication.cache import ForwardAuthCache, get_cached_uuid
+from modules.users.permissions import has_permissions
 
 FormData = Annotated[OAuth2PasswordRequestForm, Depends()]
 
@@ -20,10 +22,16 @@ router = APIRouter(
     tags=['Authentication'],
 )
 
+debug_router = APIRouter(
+    prefix='/debug/authentication',
+    tags=['Debug'],
+    dependencies=[Depends(get_authenticated_administrator)]
+)
+
 
 @router.post("/token", response_model=Tokens)
 async def __login_for_access_token__(form_data: FormData) -> Tokens:
-    user = authenticate_user(form_data.username, form_data.password)
+    user = await authenticate_user(form_data.username, form_data.password)
     
     if not user:
         raise HTTPUnauthorizedException(detail="Incorrect username or password.")
@@ -59,7 +67,7 @@ async def __forwardauth__(authorization: Annotated[str | None, Header()] = None,
         if token is not None:
             try:
                 
-                user_uuid = get_cached_uuid(token)
+                user_uuid = await get_cached_uuid(token)
                 
                 # headers = {"X-Guacamole-User": user_uuid}
                 # return JSONResponse(status_code=200, content=headers, headers=headers)
@@ -70,11 +78,18 @@ async def __forwardauth__(authorization: Annotated[str | None, Header()] = None,
                 )
                 
             except Exception:
-                logger.debug(f"Forwardauth failed: No user found for token {token}.")
+                logger.debug("Forwardauth failed: No user found for the provided token.")
                 # raise HTTPUnauthorizedException(detail="Invalid session token.")
             
     
     # Different services relying on forwardauth process responses in their own way.
     # For the sake of compatibility, the headers are sent in both content and headers section of the response.
     return Response(status_code=200)
-    # return Response(status_code=401)
\ No newline at end of file
+    # return Response(status_code=401)
+
+
+@debug_router.get("/forwardauth/cache/metrics", response_model=ForwardAuthCacheMetrics)
+async def __get_forwardauth_cache_metrics__(current_user: DependsOnAdministrativeAuthentication) -> ForwardAuthCacheMetrics:
+    if not has_permissions(current_user, PERMISSIONS.MANAGE_ADMIN_USERS):
+        raise HTTPException(403, "You do not have the necessary permissions to manage this resource.")
+    return ForwardAuthCache.get_metrics()
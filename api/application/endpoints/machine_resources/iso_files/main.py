@@ -17,12 +17,12 @@ router = APIRouter(
 
 @router.get("/all", response_model=dict[UUID, IsoRecord])
 async def __read_all_iso_file_records__(current_user: DependsOnAdministrativeAuthentication) -> dict[UUID, IsoRecord]:
-    return IsoLibrary.get_all_records()
+    return await IsoLibrary.get_all_records_async()
 
 
 @router.get("/iso/{uuid}", response_model=IsoRecord)
 async def __read_iso_file_record__(uuid: UUID, current_user: DependsOnAdministrativeAuthentication) -> IsoRecord:
-    record = IsoLibrary.get_record_by_uuid(uuid)
+    record = await IsoLibrary.get_record_by_uuid_async(uuid)
     if record is None: 
         raise HTTPException(status_code=404, detail=f"ISO file with UUID={uuid} does not exist.")
     return record
@@ -32,7 +32,7 @@ async def __read_iso_file_record__(uuid: UUID, current_user: DependsOnAdministra
 async def __delete_iso_file_record__(uuid: UUID, current_user: DependsOnAdministrativeAuthentication):
     verify_permissions(current_user, mask=PERMISSIONS.MANAGE_ISO_FILES)
         
-    record = IsoLibrary.get_record_by_uuid(uuid)
+    record = await IsoLibrary.get_record_by_uuid_async(uuid)
     
     if record is None: 
         raise HTTPException(status_code=404, detail=f"ISO file with UUID={uuid} does not exist.")
@@ -13,12 +13,12 @@ router = APIRouter(
 
 @router.get("/all", response_model=dict[UUID, MachineTemplate])
 async def __read_all_users_machine_templates__(current_user: DependsOnAdministrativeAuthentication) -> dict[UUID, MachineTemplate]:
-    return MachineTemplatesLibrary.get_all_records_matching(field_name="owner_uuid", value=str(current_user.uuid))
+    return await MachineTemplatesLibrary.get_all_records_matching_async(field_name="owner_uuid", value=str(current_user.uuid))
 
 
 @router.get("/machine-template/{uuid}", response_model=MachineTemplate)
 async def __read_machine_template__(uuid: UUID, current_user: DependsOnAdministrativeAuthentication) -> MachineTemplate:
-    template = MachineTemplatesLibrary.get_record_by_uuid(uuid)
+    template = await MachineTemplatesLibrary.get_record_by_uuid_async(uuid)
     if template is None: 
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Machine template with UUID={uuid} does not exist.")
     if not template.owner or template.owner.uuid != current_user.uuid:
@@ -28,7 +28,7 @@ async def __read_machine_template__(uuid: UUID, current_user: DependsOnAdministr
 
 @router.post("/create", response_model=None)
 async def __create_machine_template__(data: CreateMachineTemplateForm, current_user: DependsOnAdministrativeAuthentication) -> None:
-    name_duplicate = MachineTemplatesLibrary.get_record_by_fields(fields={"name": data.name, "owner_uuid": str(current_user.uuid)})
+    name_duplicate = await MachineTemplatesLibrary.get_record_by_fields_async(fields={"name": data.name, "owner_uuid": str(current_user.uuid)})
     
     if name_duplicate:
         raise HTTPException(
@@ -41,7 +41,7 @@ async def __create_machine_template__(data: CreateMachineTemplateForm, current_u
 
 @router.delete("/delete/{uuid}" , response_model=None)
 async def __delete_machine_template__(uuid: UUID, current_user: DependsOnAdministrativeAuthentication) -> None:
-    template = MachineTemplatesLibrary.get_record_by_uuid(uuid)
+    template = await MachineTemplatesLibrary.get_record_by_uuid_async(uuid)
     if template is None: 
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Machine template with UUID={uuid} does not exist.")
     if not template.owner or template.owner.uuid != current_user.uuid:
@@ -13,6 +13,11 @@ from modules.machine_lifecycle.machines import *
 from modules.machine_lifecycle.models import MachineParameters, MachineDisk, CreateMachineForm, MachineBulkSpec
 from modules.machine_lifecycle.disks import get_machine_disk_size
 from modules.machine_websockets.main_manager import MachineWebSocketManager
+from modules.libvirt_socket import LibvirtConnectionPool, LibvirtPoolMetrics, LibvirtExecutor, LibvirtExecutorMetrics
+from modules.machine_lifecycle.parameters_cache import MachineParametersCache
+from modules.machine_lifecycle.models import MachineParametersCacheMetrics
+from modules.websockets.send_queue import WebSocketSendQueues
+from modules.websockets.models import WebSocketSendQueuesMetrics
 from modules.users.users import UsersManager
 
 router = APIRouter(
@@ -35,29 +40,29 @@ debug_router = APIRouter(
 @router.get("/global", response_model=dict[UUID, MachinePropertiesPayload], tags=['Machine Data'])
 async def __get_all_machines__(current_user: DependsOnAuthentication) -> dict[UUID, MachinePropertiesPayload]:
     verify_permissions(current_user, PERMISSIONS.VIEW_ALL_VMS)
-    return get_all_machine_properties_payloads()
+    return await LibvirtExecutor.run(get_all_machine_properties_payloads)
 
 
 @router.get("/account", response_model=dict[UUID, MachinePropertiesPayload], tags=['Machine Data'])
 async def __get_user_machines__(current_user: DependsOnAuthentication) -> dict[UUID, MachinePropertiesPayload]:
-    return get_user_machine_properties_payloads(current_user)
+    return await LibvirtExecutor.run(get_user_machine_properties_payloads, current_user)
 
 @router.get("/account/{uuid}", response_model=dict[UUID, MachinePropertiesPayload], tags=['Machine Data'])
 async def __get_other_user_machines__(uuid: UUID, current_user: DependsOnAuthentication) -> dict[UUID, MachinePropertiesPayload]:
     if not has_permissions(current_user, PERMISSIONS.VIEW_ALL_VMS) and not check_machine_access(uuid, current_user):
         raise HTTPException(403, "You do not have the necessary permissions to access this resource.")
     
-    user = UsersManager.get_user(uuid)
+    user = await UsersManager.get_user_async(uuid)
     
     if not user:
         raise HTTPException(404, f"User with UUID={uuid} does not exist.")
     
-    return get_user_machine_properties_payloads(user)
+    return await LibvirtExecutor.run(get_user_machine_properties_payloads, user)
 
 
 @router.get("/machine/{uuid}", response_model=MachinePropertiesPayload | None, tags=['Machine Data'])
 async def __get_machine__(uuid: UUID, current_user: DependsOnAuthentication) -> MachinePropertiesPayload | None:
-    machine = get_machine_properties_payload(uuid)
+    machine = await LibvirtExecutor.run(get_machine_properties_payload, uuid)
 
     if not machine:
         raise HTTPException(404, f"Virtual machine of UUID={uuid} could not be found.")
@@ -70,7 +75,7 @@ async def __get_machine__(uuid: UUID, current_user: DependsOnAuthentication) ->
 
 @router.post("/start/{uuid}", response_model=None, tags=['Machine State'])
 async def __start_machine__(uuid: UUID, current_user: DependsOnAuthentication) -> None:
-    if not check_machine_existence(uuid):
+    if not await LibvirtExecutor.run(check_machine_existence, uuid):
         raise HTTPException(404, f"Virtual machine of UUID={uuid} could not be found.")
 
     if not has_permissions(current_user, PERMISSIONS.MANAGE_ALL_VMS) and not check_machine_access(uuid, current_user):
@@ -87,7 +92,7 @@ async def __start_machine__(uuid: UUID, current_user: DependsOnAuthentication) -
 
 @router.post("/stop/{uuid}", response_model=None, tags=['Machine State'])
 async def __stop_machine__(uuid: UUID, current_user: DependsOnAuthentication) -> None:
-    if not check_machine_existence(uuid):
+    if not await LibvirtExecutor.run(check_machine_existence, uuid):
         raise HTTPException(404, f"Virtual machine of UUID={uuid} could not be found.")
 
     if not has_permissions(current_user, PERMISSIONS.MANAGE_ALL_VMS) and not check_machine_access(uuid, current_user):
@@ -128,8 +133,7 @@ async def __async_create_machine_bulk__(machines: List[MachineBulkSpec], current
         if machine_spec.machine_config.source_type == 'iso':
             update_iso_last_used(machine_spec.machine_config.source_uuid)
             
-    for machine_uuid in machine_uuids:
-        MachineWebSocketManager.on_machine_create(machine_uuid)
+    MachineWebSocketManager.on_machines_create(machine_uuids)
             
     return machine_uuids
 
@@ -145,15 +149,14 @@ async def __async_create_machine_for_group__(machines: List[MachineBulkSpec], cu
         if machine_spec.machine_config.source_type == 'iso':
             update_iso_last_used(machine_spec.machine_config.source_uuid)
      
-    for machine_uuid in machine_uuids:
-        MachineWebSocketManager.on_machine_create(machine_uuid)
+    MachineWebSocketManager.on_machines_create(machine_uuids)
             
     return machine_uuids
 
 
 @router.delete("/delete/{uuid}", response_model=None, tags=['Machine Management'])
 async def __delete_machine_async__(uuid: UUID, current_user: DependsOnAdministrativeAuthentication) -> None:
-    if not check_machine_existence(uuid):
+    if not await LibvirtExecutor.run(check_machine_existence, uuid):
         raise HTTPException(404, f"Virtual machine {uuid} could not be found.")
     
     if not has_permissions(current_user, PERMISSIONS.MANAGE_ALL_VMS) and not check_machine_ownership(uuid, current_user):
@@ -169,7 +172,7 @@ async def __delete_machine_async__(uuid: UUID, current_user: DependsOnAdministra
     
 @router.patch("/modify/{uuid}", response_model=None, tags=['Machine Management'])
 async def __modify_machine__(uuid: UUID, body: ModifyMachineForm, current_user: DependsOnAdministrativeAuthentication):
-    if not check_machine_existence(uuid):
+    if not await LibvirtExecutor.run(check_machine_existence, uuid):
         raise HTTPException(404, f"Virtual machine of UUID={uuid} could not be found.")
     
     if not has_permissions(current_user, PERMISSIONS.MANAGE_ALL_VMS) and not check_machine_access(uuid, current_user):
@@ -222,3 +225,27 @@ async def __get_machine_disk_size___(disk_uuid: UUID, storage_pool: str, current
 @debug_router.get("/debug/machine/connections/{machine_uuid}", response_model=None)
 async def __get_machine_connections__(machine_uuid: UUID) -> dict[Literal["ssh", "rdp", "vnc"], str]:
     return get_machine_connections(machine_uuid)
+
+@debug_router.get("/debug/libvirt/pool/metrics", response_model=list[LibvirtPoolMetrics])
+async def __get_libvirt_pool_metrics__(current_user: DependsOnAdministrativeAuthentication) -> list[LibvirtPoolMetrics]:
+    if not has_permissions(current_user, PERMISSIONS.MANAGE_ALL_VMS):
+        raise HTTPException(403, "You do not have the necessary permissions to manage this resource.")
+    return LibvirtConnectionPool.get_metrics()
+
+@debug_router.get("/debug/libvirt/executor/metrics", response_model=LibvirtExecutorMetrics)
+async def __get_libvirt_executor_metrics__(current_user: DependsOnAdministrativeAuthentication) -> LibvirtExecutorMetrics:
+    if not has_permissions(current_user, PERMISSIONS.MANAGE_ALL_VMS):
+        raise HTTPException(403, "You do not have the necessary permissions to manage this resource.")
+    return LibvirtExecutor.get_metrics()
+
+@debug_router.get("/debug/machine/parameters/cache/metrics", response_model=MachineParametersCacheMetrics)
+async def __get_machine_parameters_cache_metrics__(current_user: DependsOnAdministrativeAuthentication) -> MachineParametersCacheMetrics:
+    if not has_permissions(current_user, PERMISSIONS.MANAGE_ALL_VMS):
+        raise HTTPException(403, "You do not have the necessary permissions to manage this resource.")
+    return MachineParametersCache.get_metrics()
+
+@debug_router.get("/debug/websockets/queues/metrics", response_model=WebSocketSendQueuesMetrics)
+async def __get_websocket_send_queues_metrics__(current_user: DependsOnAdministrativeAuthentication) -> WebSocketSendQueuesMetrics:
+    if not has_permissions(current_user, PERMISSIONS.MANAGE_ALL_VMS):
+        raise HTTPException(403, "You do not have the necessary permissions to manage this resource.")
+    return WebSocketSendQueues.get_metrics()
@@ -12,35 +12,35 @@ router = APIRouter(
 )
 
 @router.websocket('/subscribed')
-async def __subscribed_machines_state_websocket__(websocket: WebSocket, machine_uuid: UUID, access_token: str):
+async def __subscribed_machines_state_websocket__(websocket: WebSocket, machine_uuid: UUID, access_token: str, last_seq: int | None = None, epoch: str | None = None):
     websocket_handler = SubscribedMachinesWebsocketHandler(
         websocket=websocket, 
         subscription_manager=MachineWebSocketManager.subscribed_machine_websocket_manager.subscription_manager
     )
     
-    await websocket_handler.accept(access_token, machine_uuid)
+    await websocket_handler.accept(access_token, machine_uuid, last_seq, epoch)
     await websocket_handler.listen()
     
     
 @router.websocket('/account')
-async def __user_machines_state_websocket__(websocket: WebSocket, access_token: str):  
+async def __user_machines_state_websocket__(websocket: WebSocket, access_token: str, last_seq: int | None = None, epoch: str | None = None):  
     websocket_handler = UserMachinesWebsocketHandler(
         websocket=websocket, 
         subscription_manager=MachineWebSocketManager.user_machines_websocket_manager.subscription_manager
     )
     
-    await websocket_handler.accept(access_token)
+    await websocket_handler.accept(access_token, last_seq, epoch)
     await websocket_handler.listen()
 
     
 @router.websocket('/global')
-async def __all_machines_state_websocket__(websocket: WebSocket, access_token: str):  
+async def __all_machines_state_websocket__(websocket: WebSocket, access_token: str, last_seq: int | None = None, epoch: str | None = None):  
     websocket_handler = AllMachinesWebsocketHandler(
         websocket=websocket, 
         subscription_manager=MachineWebSocketManager.all_machines_websocket_manager.subscription_manager
     )
     
-    await websocket_handler.accept(access_token)
+    await websocket_handler.accept(access_token, last_seq, epoch)
     await websocket_handler.listen()
 
     
@@ -14,20 +14,20 @@ router = APIRouter(
 
 @router.get("/group/{uuid}", response_model=GroupExtended, tags=['Client Groups'])
 async def __read_group__(uuid: UUID,) -> GroupExtended:
-    group = GroupLibrary.get_record_by_uuid(uuid)
+    group = await GroupLibrary.get_record_by_uuid_async(uuid)
     
     if group is None:
         raise HTTPException(404, f"Group with UUID={uuid} does not exist.")
     
-    return GroupLibrary.extend_model(group)    
+    return await GroupLibrary.extend_model_async(group)    
 
 
 @router.get("/all", response_model=dict[UUID, GroupExtended], tags=['Client Groups'])
 async def __read_groups__() -> dict[UUID, GroupExtended]:
-    all_groups = GroupLibrary.get_all_records()
+    all_groups = await GroupLibrary.get_all_records_async()
     
     for uuid, group in all_groups.items():
-        all_groups[uuid] = GroupLibrary.extend_model(group)
+        all_groups[uuid] = await GroupLibrary.extend_model_async(group)
     
     return all_groups
     
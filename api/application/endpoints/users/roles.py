@@ -13,18 +13,18 @@ router = APIRouter(
 
 @router.get("/role/{uuid}", response_model=RoleExtended)
 async def __read_role__(uuid: UUID) -> RoleExtended:
-    role = RoleLibrary.get_record_by_uuid(uuid)
+    role = await RoleLibrary.get_record_by_uuid_async(uuid)
     
     if role is None:
         raise HTTPException(400, f"Role with UUID={uuid} does not exist.")
     
-    return RoleLibrary.extend_model(role)
+    return await RoleLibrary.extend_model_async(role)
 
 @router.get("/all", response_model=dict[UUID, RoleExtended], tags=['Administrative Roles'])
 async def __read_roles__() -> dict[UUID, RoleExtended]:
-    all_roles = RoleLibrary.get_all_records()
+    all_roles = await RoleLibrary.get_all_records_async()
     
     for uuid, roles in all_roles.items():
-        all_roles[uuid] = RoleLibrary.extend_model(roles)
+        all_roles[uuid] = await RoleLibrary.extend_model_async(roles)
     
     return all_roles
@@ -8,10 +8,12 @@ from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from modules.websockets.websocket_manager import GlobalWebSocketManager
-from modules.users.permissions import is_admin
-from modules.users.models import AccountType, AnyUserExtended, ChangePasswordBody, CreateAnyUserForm, GetUsersFilters, ModifyUserForm
+from modules.users.permissions import has_permissions, is_admin
+from modules.users.models import AccountType, AnyUserExtended, ChangePasswordBody, CreateAnyUserForm, GetUsersFilters, ModifyUserForm, UsersCacheMetrics
+from modules.users.cache import UsersCache
+from config.permissions_config import PERMISSIONS
 from modules.users.users import UsersManager
-from modules.authentication.validation import DependsOnAdministrativeAuthentication, DependsOnAuthentication, get_authenticated_user
+from modules.authentication.validation import DependsOnAdministrativeAuthentication, DependsOnAuthentication, get_authenticated_administrator, get_authenticated_user
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +27,12 @@ router = APIRouter(
     dependencies=[Depends(get_authenticated_user)]
 )
 
+debug_router = APIRouter(
+    prefix='/debug/users',
+    tags=['Debug'],
+    dependencies=[Depends(get_authenticated_administrator)]
+)
+
 @router.get("/me", response_model=AnyUserExtended)
 async def __read_logged_in_user__(current_user: DependsOnAuthentication) -> AnyUserExtended:
     return current_user
@@ -35,10 +43,10 @@ async def __read_logged_in_users_permissions__(current_user: DependsOnAuthentica
 
 @router.get("/user/{uuid}", response_model=AnyUserExtended)
 async def __read_user__(uuid: UUID) -> AnyUserExtended:
-    user = UsersManager.get_user(uuid)
+    user = await UsersManager.get_user_async(uuid)
     if user is None: 
         raise HTTPException(404, f"User with UUID={uuid} does not exist.")
-    return UsersManager.extend_user_model(user)
+    return await UsersManager.extend_user_model_async(user)
 
 
 @router.get("/all", response_model=dict[UUID, AnyUserExtended])
@@ -49,17 +57,17 @@ async def __read_users__(
 ):
     filters = GetUsersFilters(account_type=account_type, group=group, role=role)
     
-    users = UsersManager.get_users(filters)
+    users = await UsersManager.get_users_async(filters)
     
     for uuid, user in users.items():
-        users[uuid] = UsersManager.extend_user_model(user)
+        users[uuid] = await UsersManager.extend_user_model_async(user)
     
     return JSONResponse(content=jsonable_encoder(users))
 
 
 @router.post("/create", response_model=UUID)
 async def __create_user__(form: CreateAnyUserForm, current_user: DependsOnAdministrativeAuthentication) -> UUID:   
-    return UsersManager.create_user(form, current_user)
+    return await UsersManager.create_user(form, current_user)
 
 @router.post("/create-in-bulk")
 async def __create_users_in_bulk__(forms: list[CreateAnyUserForm], current_user: DependsOnAdministrativeAuthentication, background_tasks: BackgroundTasks):
@@ -102,7 +110,7 @@ async def __get_create_users_in_bulk_job_status__(job_uuid: UUID):
 
 @router.put("/change-password/{uuid}", response_model=None)
 async def __change_password__(uuid: UUID, body: ChangePasswordBody, current_user: DependsOnAdministrativeAuthentication) -> None:
-    return UsersManager.change_password(uuid, body.password, current_user)
+    return await UsersManager.change_password(uuid, body.password, current_user)
 
 
 @router.put("/modify/{uuid}", response_model=AnyUserExtended)
@@ -132,3 +140,13 @@ async def __delete_multiple_users__(uuids: list[UUID], current_user: DependsOnAd
     UsersManager.delete_users(uuids, current_user)
     for uuid in uuids:
         asyncio.create_task(GlobalWebSocketManager.disconnect_user(uuid, 4403, "User account got deleted."))
+
+
+################################
+#           Debug
+################################
+@debug_router.get("/debug/cache/metrics", response_model=UsersCacheMetrics)
+async def __get_users_cache_metrics__(current_user: DependsOnAdministrativeAuthentication) -> UsersCacheMetrics:
+    if not has_permissions(current_user, PERMISSIONS.MANAGE_ADMIN_USERS):
+        raise HTTPException(403, "You do not have the necessary permissions to manage this resource.")
+    return UsersCache.get_metrics()
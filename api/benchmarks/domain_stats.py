@@ -0,0 +1,154 @@
+"""
+Benchmark of the machine state collection against the libvirt test driver.
+
+Defines N domains on the test driver, starts a share of them and times one broadcast tick's worth of libvirt calls:
+    - per machine: lookupByUUID, XMLDesc and three info() calls, as the state payloads were collected before
+    - bulk: a single getAllDomainStats call through get_all_domain_stats, as the state payloads are collected now
+Parsing of the domain XML and the database queries are not part of either path. The test driver runs in-process,
+so both paths skip the RPC round trip a qemu:///system connection pays on every call. Results are written to JSON for regression tracking.
+
+Run from the api directory with the API's libvirt connections pointed at the test driver:
+
+    LIBVIRT_URI=test:///default python -m benchmarks.domain_stats --domains 1000 --iterations 20 --output results.json
+"""
+import argparse
+import json
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from uuid import UUID, uuid4
+
+import libvirt
+
+from config.libvirt_config import LIBVIRT_CONFIG
+from modules.machine_state.domain_stats import STATE_STATS, get_all_domain_stats
+from benchmarks.websocket_load import summarize
+
+logger = logging.getLogger(__name__)
+
+DOMAIN_XML = """
+<domain type='test'>
+    <name>benchmark-{index:05d}</name>
+    <uuid>{uuid}</uuid>
+    <memory unit='MiB'>512</memory>
+    <currentMemory unit='MiB'>512</currentMemory>
+    <vcpu>2</vcpu>
+    <os>
+        <type arch='x86_64'>hvm</type>
+    </os>
+</domain>
+"""
+
+
+###############################
+#   domains
+###############################
+def define_domains(connection: libvirt.virConnect, count: int, running_share: float, rng: random.Random) -> list[UUID]:
+    machine_uuids = []
+
+    for index in range(count):
+        machine_uuid = uuid4()
+        domain = connection.defineXML(DOMAIN_XML.format(index=index, uuid=machine_uuid))
+
+        if rng.random() < running_share:
+            domain.create()
+
+        machine_uuids.append(machine_uuid)
+
+    return machine_uuids
+
+
+###############################
+#   collection paths
+###############################
+def collect_per_machine(connection: libvirt.virConnect, machine_uuids: list[UUID]):
+    for machine_uuid in machine_uuids:
+        machine = connection.lookupByUUID(machine_uuid.bytes)
+        machine.XMLDesc()
+        machine.info()
+        machine.info()
+        machine.info()
+
+
+def collect_bulk(machine_uuids: list[UUID]):
+    get_all_domain_stats(STATE_STATS, machine_uuids)
+
+
+def measure(collect, iterations: int) -> list[float]:
+    durations = []
+
+    for _ in range(iterations):
+        started = time.perf_counter()
+        collect()
+        durations.append(time.perf_counter() - started)
+
+    return durations
+
+
+###############################
+#   benchmark
+###############################
+def benchmark(args) -> dict:
+    connection = libvirt.open(LIBVIRT_CONFIG.hypervisor_uri)
+
+    try:
+        machine_uuids = define_domains(connection, args.domains, args.running_share, random.Random(args.seed))
+
+        # warm up the connection pool and the driver's lookup tables outside of the measurement
+        collect_bulk(machine_uuids)
+
+        per_machine = measure(lambda: collect_per_machine(connection, machine_uuids), args.iterations)
+        bulk = measure(lambda: collect_bulk(machine_uuids), args.iterations)
+    finally:
+        connection.close()
+
+    per_machine_mean = sum(per_machine) / len(per_machine)
+    bulk_mean = sum(bulk) / len(bulk)
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "parameters": {
+            "uri": LIBVIRT_CONFIG.hypervisor_uri,
+            "domains": args.domains,
+            "running_share": args.running_share,
+            "iterations": args.iterations,
+            "seed": args.seed,
+        },
+        "per_machine": {
+            "libvirt_calls_per_tick": 5 * args.domains,
+            "tick_seconds": summarize(per_machine),
+        },
+        "bulk": {
+            "libvirt_calls_per_tick": 1,
+            "tick_seconds": summarize(bulk),
+        },
+        "speedup": per_machine_mean / bulk_mean if bulk_mean else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Machine state collection benchmark against the libvirt test driver.")
+    parser.add_argument("--domains", type=int, default=1000)
+    parser.add_argument("--running-share", type=float, default=0.5, help="fraction of the defined domains that are started")
+    parser.add_argument("--iterations", type=int, default=20, help="measured ticks of each collection path")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="domain_stats_benchmark.json")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    # the benchmark defines and starts domains - never let it touch a real hypervisor
+    if not LIBVIRT_CONFIG.hypervisor_uri.startswith("test://"):
+        parser.error(f"LIBVIRT_URI has to point at the libvirt test driver, got {LIBVIRT_CONFIG.hypervisor_uri}.")
+
+    report = benchmark(args)
+
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=4)
+
+    logger.info(f"Results written to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
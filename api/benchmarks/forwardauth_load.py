@@ -0,0 +1,136 @@
+"""
+Throughput benchmark of the /forwardauth endpoint.
+
+Sends forwardauth requests from N concurrent clients for a fixed duration, the way Traefik does for every proxied
+Guacamole request, and records requests per second and latency. Clients send either a valid access token (cached path),
+or with --invalid-share a fraction of garbage tokens rejected by the signature check. The forwardauth cache's hit rate
+is taken from the server's debug metrics. Results are written to JSON for regression tracking.
+
+Run from the api directory against a running API:
+
+    python -m benchmarks.forwardauth_load --username admin --password ... --clients 100 --duration 30 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.websocket_load import summarize, wait_for_server
+
+logger = logging.getLogger(__name__)
+
+CACHE_METRICS_PATH = "/debug/authentication/forwardauth/cache/metrics"
+
+
+async def get_cache_metrics(http: httpx.AsyncClient, headers: dict) -> dict | None:
+    try:
+        response = await http.get(CACHE_METRICS_PATH, headers=headers)
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPError as e:
+        logger.warning(f"Could not retrieve forwardauth cache metrics: {e}")
+        return None
+
+
+async def run_client(http: httpx.AsyncClient, token: str, invalid_share: float, rng: random.Random, latencies: list[float], errors: list[int], stop: asyncio.Event):
+    while not stop.is_set():
+        sent_token = f"invalid.{rng.getrandbits(64):x}.token" if rng.random() < invalid_share else token
+        started = time.monotonic()
+
+        try:
+            response = await http.get("/forwardauth", headers={"Authorization": f"Bearer {sent_token}"})
+            response.raise_for_status()
+            latencies.append(time.monotonic() - started)
+        except httpx.HTTPError as e:
+            logger.debug(f"Request failed: {e!r}")
+            errors[0] += 1
+
+
+async def benchmark(args) -> dict:
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=30, limits=limits) as http:
+        await wait_for_server(http)
+
+        tokens = (await http.post("/token", data={"username": args.username, "password": args.password})).raise_for_status().json()
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+        metrics_before = await get_cache_metrics(http, headers)
+
+        latencies: list[float] = []
+        errors = [0]
+        stop = asyncio.Event()
+        rng = random.Random(args.seed)
+
+        tasks = [
+            asyncio.create_task(run_client(http, tokens["access_token"], args.invalid_share, rng, latencies, errors, stop))
+            for _ in range(args.clients)
+        ]
+
+        started = time.monotonic()
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+        elapsed = time.monotonic() - started
+
+        metrics_after = await get_cache_metrics(http, headers)
+
+    cache = None
+    if metrics_before is not None and metrics_after is not None:
+        hits = metrics_after["hits"] - metrics_before["hits"]
+        misses = metrics_after["misses"] - metrics_before["misses"]
+        cache = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else None,
+            "rejected": metrics_after["rejected"] - metrics_before["rejected"],
+            "size_at_end": metrics_after["size"],
+        }
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "parameters": {
+            "clients": args.clients,
+            "duration": args.duration,
+            "invalid_share": args.invalid_share,
+            "seed": args.seed,
+        },
+        "elapsed_seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed,
+        "latency_seconds": summarize(latencies),
+        "errors": errors[0],
+        "forwardauth_cache": cache,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forwardauth throughput benchmark.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=30, help="measurement duration in seconds")
+    parser.add_argument("--invalid-share", type=float, default=0, help="fraction of requests sent with a garbage token")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="forwardauth_benchmark.json")
+    args = parser.parse_args()
+    args.url = f"http://{args.host}:{args.port}"
+
+    logging.basicConfig(level=logging.INFO)
+
+    report = asyncio.run(benchmark(args))
+
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=4)
+
+    logger.info(f"Results written to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
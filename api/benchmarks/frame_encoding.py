@@ -0,0 +1,146 @@
+"""
+Microbenchmark of the encoding cost of a DATA_DYNAMIC broadcast tick.
+
+Builds state payloads of N machines split into V distinct views (V=1 is the global websocket, V>1 the account
+websockets with one slice per user) shared by R recipients, and times the encoding of one tick:
+    - per recipient: jsonable_encoder and json.dumps for every websocket, as send_json encoded the messages before
+    - per view: model_dump_json once for each distinct view, the frame being queued for all of the view's recipients
+Only the encoding is measured, no websockets are opened. Results are written to JSON for regression tracking.
+
+Run from the api directory:
+
+    python -m benchmarks.frame_encoding --machines 1000 --recipients 50 --views 1 --iterations 20 --output results.json
+"""
+import argparse
+import json
+import logging
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
+
+from fastapi.encoders import jsonable_encoder
+
+from modules.machine_state.models import MachineStatePayload
+from modules.machine_websockets.models import WebSocketMessage
+from benchmarks.websocket_load import summarize
+
+logger = logging.getLogger(__name__)
+
+
+###############################
+#   payloads
+###############################
+def build_views(machines: int, views: int, rng: random.Random) -> list[dict[UUID, MachineStatePayload]]:
+    payloads: list[MachineStatePayload] = []
+
+    for _ in range(machines):
+        active = rng.random() < 0.5
+        payloads.append(MachineStatePayload(
+            uuid=uuid4(),
+            active=active,
+            vcpu=rng.choice((1, 2, 4, 8)),
+            ram_max=rng.choice((1024, 2048, 4096, 8192)),
+            ram_used=rng.randint(256, 1024) if active else 0,
+            boot_timestamp=datetime.now(timezone.utc) - timedelta(seconds=rng.randint(0, 86400)) if active else None,
+            ras_port=rng.randint(5900, 6900) if active else None,
+        ))
+
+    # each view is an even slice of the machines, a single view holds all of them
+    return [
+        {payload.uuid: payload for payload in payloads[index::views]}
+        for index in range(views)
+    ]
+
+
+###############################
+#   encoding paths
+###############################
+def encode_per_recipient(messages: list[WebSocketMessage], recipients: int) -> int:
+    encoded_bytes = 0
+
+    for index in range(recipients):
+        # the encoding done by Starlette's send_json
+        frame = json.dumps(jsonable_encoder(messages[index % len(messages)]), separators=(",", ":"), ensure_ascii=False)
+        encoded_bytes += len(frame)
+
+    return encoded_bytes
+
+
+def encode_per_view(messages: list[WebSocketMessage]) -> int:
+    return sum(len(message.model_dump_json()) for message in messages)
+
+
+def measure(encode, iterations: int) -> tuple[list[float], int]:
+    durations = []
+    encoded_bytes = 0
+
+    for _ in range(iterations):
+        started = time.perf_counter()
+        encoded_bytes = encode()
+        durations.append(time.perf_counter() - started)
+
+    return durations, encoded_bytes
+
+
+###############################
+#   benchmark
+###############################
+def benchmark(args) -> dict:
+    views = build_views(args.machines, args.views, random.Random(args.seed))
+    messages = [WebSocketMessage(type="DATA_DYNAMIC", body=view) for view in views]
+
+    per_recipient, per_recipient_bytes = measure(lambda: encode_per_recipient(messages, args.recipients), args.iterations)
+    per_view, per_view_bytes = measure(lambda: encode_per_view(messages), args.iterations)
+
+    per_recipient_mean = sum(per_recipient) / len(per_recipient)
+    per_view_mean = sum(per_view) / len(per_view)
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "parameters": {
+            "machines": args.machines,
+            "recipients": args.recipients,
+            "views": args.views,
+            "iterations": args.iterations,
+            "seed": args.seed,
+        },
+        "per_recipient": {
+            "encodings_per_tick": args.recipients,
+            "encoded_bytes_per_tick": per_recipient_bytes,
+            "tick_seconds": summarize(per_recipient),
+        },
+        "per_view": {
+            "encodings_per_tick": args.views,
+            "encoded_bytes_per_tick": per_view_bytes,
+            "tick_seconds": summarize(per_view),
+        },
+        "speedup": per_recipient_mean / per_view_mean if per_view_mean else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encoding cost microbenchmark of a broadcast tick.")
+    parser.add_argument("--machines", type=int, default=1000)
+    parser.add_argument("--recipients", type=int, default=50, help="websockets receiving the tick")
+    parser.add_argument("--views", type=int, default=1, help="distinct payload views shared by the recipients")
+    parser.add_argument("--iterations", type=int, default=20, help="measured ticks of each encoding path")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="frame_encoding_benchmark.json")
+    args = parser.parse_args()
+
+    if not 1 <= args.views <= min(args.machines, args.recipients):
+        parser.error("--views has to be between 1 and the number of machines and recipients.")
+
+    logging.basicConfig(level=logging.INFO)
+
+    report = benchmark(args)
+
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=4)
+
+    logger.info(f"Results written to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
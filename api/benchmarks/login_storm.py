@@ -0,0 +1,139 @@
+"""
+Login storm benchmark of the /token endpoint.
+
+Sends logins from N concurrent simulated clients for a fixed duration and records:
+    - login latency and throughput, split into successful, rejected (503 with Retry-After) and failed logins
+    - latency of a cheap unauthenticated request probed meanwhile, showing whether password hashing stalls the event loop
+Rejected clients honour Retry-After before logging in again. Results are written to JSON for regression tracking.
+
+Run from the api directory against a running API:
+
+    python -m benchmarks.login_storm --username admin --password ... --clients 200 --duration 30 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import httpx
+
+from config.authentication_config import AUTHENTICATION_CONFIG
+from benchmarks.websocket_load import summarize, wait_for_server
+
+logger = logging.getLogger(__name__)
+
+PROBE_PATH = "/openapi.json"
+
+
+@dataclass
+class LoginStats:
+    succeeded: list[float] = field(default_factory=list)
+    rejected: list[float] = field(default_factory=list)
+    failed: list[float] = field(default_factory=list)
+    errors: int = 0
+
+
+###############################
+#   clients
+###############################
+async def run_client(http: httpx.AsyncClient, args, stats: LoginStats, stop: asyncio.Event):
+    while not stop.is_set():
+        started = time.monotonic()
+
+        try:
+            response = await http.post("/token", data={"username": args.username, "password": args.password})
+        except httpx.HTTPError as e:
+            logger.debug(f"Login failed: {e!r}")
+            stats.errors += 1
+            continue
+
+        latency = time.monotonic() - started
+
+        if response.status_code == 200:
+            stats.succeeded.append(latency)
+        elif response.status_code == 503:
+            stats.rejected.append(latency)
+            await asyncio.sleep(float(response.headers.get("Retry-After", 1)))
+        else:
+            stats.failed.append(latency)
+
+
+async def run_probe(http: httpx.AsyncClient, interval: float, latencies: list[float], stop: asyncio.Event):
+    while not stop.is_set():
+        started = time.monotonic()
+        try:
+            (await http.get(PROBE_PATH)).raise_for_status()
+            latencies.append(time.monotonic() - started)
+        except httpx.HTTPError as e:
+            logger.debug(f"Probe failed: {e!r}")
+        await asyncio.sleep(interval)
+
+
+###############################
+#   benchmark
+###############################
+async def benchmark(args) -> dict:
+    limits = httpx.Limits(max_connections=args.clients + 1, max_keepalive_connections=args.clients + 1)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=60, limits=limits) as http:
+        await wait_for_server(http)
+
+        stats = LoginStats()
+        probe_latencies: list[float] = []
+        stop = asyncio.Event()
+
+        tasks = [asyncio.create_task(run_client(http, args, stats, stop)) for _ in range(args.clients)]
+        tasks.append(asyncio.create_task(run_probe(http, args.probe_interval, probe_latencies, stop)))
+
+        started = time.monotonic()
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+        elapsed = time.monotonic() - started
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "parameters": {
+            "clients": args.clients,
+            "duration": args.duration,
+            "password_hashing_workers": AUTHENTICATION_CONFIG.password_hashing_workers,
+            "password_hashing_queue_size": AUTHENTICATION_CONFIG.password_hashing_queue_size,
+        },
+        "elapsed_seconds": elapsed,
+        "logins_per_second": len(stats.succeeded) / elapsed,
+        "succeeded_latency_seconds": summarize(stats.succeeded),
+        "rejected_latency_seconds": summarize(stats.rejected),
+        "failed_latency_seconds": summarize(stats.failed),
+        "transport_errors": stats.errors,
+        "probe_latency_seconds": summarize(probe_latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login storm benchmark of the /token endpoint.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=30, help="measurement duration in seconds")
+    parser.add_argument("--probe-interval", type=float, default=0.1, help="interval of the event loop responsiveness probe in seconds")
+    parser.add_argument("--output", default="login_storm_benchmark.json")
+    args = parser.parse_args()
+    args.url = f"http://{args.host}:{args.port}"
+
+    logging.basicConfig(level=logging.INFO)
+
+    report = asyncio.run(benchmark(args))
+
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=4)
+
+    logger.info(f"Results written to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Load and latency benchmark of the machine websocket endpoints.
+
+Opens N simulated clients with a configurable mix of /ws/machines/global, /ws/machines/account and
+/ws/machines/subscribed connections and records:
+    - end-to-end latency of every message (server timestamp to client receipt), per message type
+    - received messages and bytes per second
+    - server CPU time per broadcast tick (sampled from /proc, the server has to run on the same host)
+    - frames dropped and websockets evicted by the server's send queues, and abnormal client disconnects
+Results are written to JSON for regression tracking.
+
+Run from the api directory against a local Postgres, either with a running API (--server-pid enables CPU sampling)
+or letting the benchmark spawn one on the libvirt test:///default driver with --spawn:
+
+    python -m benchmarks.websocket_load --username admin --password ... --clients 1000 \\
+        --mix global=1,account=8,subscribed=1 --duration 60 --spawn --output results.json
+
+The spawned API inherits the environment - database variables and the jwt secret mount have to be provided as for a deployment.
+The account has to be able to view all machines for the global and metrics endpoints.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+import httpx
+import websockets
+
+from config.websockets_config import WEBSOCKETS_CONFIG
+
+logger = logging.getLogger(__name__)
+
+ENDPOINTS = ("global", "account", "subscribed")
+
+QUEUE_METRICS_PATH = "/debug/machines/debug/websockets/queues/metrics"
+
+
+@dataclass
+class ClientStats:
+    connected: int = 0
+    failed: int = 0
+    abnormal_closes: dict[int, int] = field(default_factory=dict)
+    messages: int = 0
+    bytes: int = 0
+    latencies: dict[str, list[float]] = field(default_factory=dict)
+    connect_latencies: list[float] = field(default_factory=list)
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def summarize(values: list[float]) -> dict:
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else None,
+        "p50": percentile(values, 0.5),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": max(values) if values else None,
+    }
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+
+    for part in mix.split(","):
+        endpoint, _, weight = part.partition("=")
+        if endpoint not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{endpoint}', expected one of {', '.join(ENDPOINTS)}.")
+        weights[endpoint] = float(weight or 1)
+
+    return weights
+
+
+###############################
+#   server
+###############################
+def spawn_server(host: str, port: int) -> subprocess.Popen:
+    env = {**os.environ, "LIBVIRT_URI": "test:///default"}
+    return subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--host", host, "--port", str(port)], env=env)
+
+
+async def wait_for_server(http: httpx.AsyncClient, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        try:
+            if (await http.get("/openapi.json")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.5)
+
+    raise TimeoutError("API did not start in time.")
+
+
+def read_cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as stat:
+        # the process name can contain spaces, the fields following it are space separated
+        fields = stat.read().rsplit(")", 1)[1].split()
+    # utime and stime are the 14th and 15th fields of the whole line
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def sample_cpu(pid: int, interval: float, samples: list[float], stop: asyncio.Event):
+    previous = read_cpu_seconds(pid)
+
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except TimeoutError:
+            pass
+        current = read_cpu_seconds(pid)
+        samples.append(current - previous)
+        previous = current
+
+
+async def get_queue_metrics(http: httpx.AsyncClient, headers: dict) -> dict | None:
+    try:
+        response = await http.get(QUEUE_METRICS_PATH, headers=headers)
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPError as e:
+        logger.warning(f"Could not retrieve websocket queue metrics: {e}")
+        return None
+
+
+###############################
+#   clients
+###############################
+async def run_client(url: str, stats: ClientStats, stop: asyncio.Event):
+    started = time.monotonic()
+
+    try:
+        async with websockets.connect(url, max_size=None, open_timeout=30) as websocket:
+            stats.connected += 1
+            first_message = True
+
+            while not stop.is_set():
+                try:
+                    frame = await asyncio.wait_for(websocket.recv(), 1)
+                except TimeoutError:
+                    continue
+
+                received_at = datetime.now(timezone.utc)
+
+                if first_message:
+                    stats.connect_latencies.append(time.monotonic() - started)
+                    first_message = False
+
+                message = json.loads(frame)
+                stats.messages += 1
+                stats.bytes += len(frame)
+
+                if message.get("timestamp"):
+                    latency = (received_at - datetime.fromisoformat(message["timestamp"])).total_seconds()
+                    stats.latencies.setdefault(message["type"], []).append(latency)
+
+    except websockets.ConnectionClosed as e:
+        if e.rcvd is not None and e.rcvd.code != 1000:
+            stats.abnormal_closes[e.rcvd.code] = stats.abnormal_closes.get(e.rcvd.code, 0) + 1
+    except Exception as e:
+        logger.debug(f"Client failed: {e!r}")
+        stats.failed += 1
+
+
+def build_client_urls(args, access_token: str, machine_uuids: list[str]) -> list[tuple[str, str]]:
+    endpoints = list(args.mix)
+    weights = list(args.mix.values())
+    rng = random.Random(args.seed)
+    ws_base = args.url.replace("http", "ws", 1)
+    urls = []
+
+    for index in range(args.clients):
+        endpoint = rng.choices(endpoints, weights)[0]
+        params = {"access_token": access_token}
+
+        if endpoint == "subscribed":
+            if not machine_uuids:
+                endpoint = "global"
+            else:
+                params["machine_uuid"] = machine_uuids[index % len(machine_uuids)]
+
+        urls.append((endpoint, f"{ws_base}/ws/machines/{endpoint}?{urlencode(params)}"))
+
+    return urls
+
+
+###############################
+#   benchmark
+###############################
+async def benchmark(args) -> dict:
+    server = spawn_server(args.host, args.port) if args.spawn else None
+    server_pid = server.pid if server is not None else args.server_pid
+
+    try:
+        async with httpx.AsyncClient(base_url=args.url, timeout=30) as http:
+            await wait_for_server(http)
+
+            tokens = (await http.post("/token", data={"username": args.username, "password": args.password})).raise_for_status().json()
+            headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+            machine_uuids = list((await http.get("/machines/global", headers=headers)).raise_for_status().json())
+
+            queue_metrics_before = await get_queue_metrics(http, headers)
+
+            stats = {endpoint: ClientStats() for endpoint in ENDPOINTS}
+            stop = asyncio.Event()
+            cpu_samples: list[float] = []
+            tasks = []
+
+            cpu_task = asyncio.create_task(sample_cpu(server_pid, args.tick, cpu_samples, stop)) if server_pid else None
+
+            for index, (endpoint, url) in enumerate(build_client_urls(args, tokens["access_token"], machine_uuids)):
+                tasks.append(asyncio.create_task(run_client(url, stats[endpoint], stop)))
+                if args.ramp and index % args.ramp == args.ramp - 1:
+                    await asyncio.sleep(1)
+
+            started = time.monotonic()
+            await asyncio.sleep(args.duration)
+            stop.set()
+            elapsed = time.monotonic() - started
+
+            await asyncio.gather(*tasks)
+            if cpu_task is not None:
+                await cpu_task
+
+            queue_metrics_after = await get_queue_metrics(http, headers)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    return build_report(args, stats, elapsed, machine_uuids, cpu_samples, queue_metrics_before, queue_metrics_after)
+
+
+def build_report(args, stats: dict[str, ClientStats], elapsed: float, machine_uuids: list, cpu_samples: list[float], metrics_before: dict | None, metrics_after: dict | None) -> dict:
+    endpoints = {}
+
+    for endpoint, endpoint_stats in stats.items():
+        all_latencies = [latency for latencies in endpoint_stats.latencies.values() for latency in latencies]
+
+        endpoints[endpoint] = {
+            "clients_connected": endpoint_stats.connected,
+            "clients_failed": endpoint_stats.failed,
+            "abnormal_closes": {str(code): count for code, count in endpoint_stats.abnormal_closes.items()},
+            "messages": endpoint_stats.messages,
+            "messages_per_second": endpoint_stats.messages / elapsed,
+            "bytes": endpoint_stats.bytes,
+            "bytes_per_second": endpoint_stats.bytes / elapsed,
+            "connect_latency_seconds": summarize(endpoint_stats.connect_latencies),
+            "latency_seconds": summarize(all_latencies),
+            "latency_seconds_by_type": {message_type: summarize(latencies) for message_type, latencies in endpoint_stats.latencies.items()},
+        }
+
+    server_queues = None
+    if metrics_before is not None and metrics_after is not None:
+        server_queues = {
+            "dropped_frames": metrics_after["dropped_frames"] - metrics_before["dropped_frames"],
+            "evicted_websockets": metrics_after["evicted_websockets"] - metrics_before["evicted_websockets"],
+            "queued_frames_at_end": metrics_after["queued_frames"],
+        }
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "parameters": {
+            "clients": args.clients,
+            "mix": args.mix,
+            "duration": args.duration,
+            "ramp": args.ramp,
+            "seed": args.seed,
+            "machines": len(machine_uuids),
+            "state_broadcast_interval": WEBSOCKETS_CONFIG.state_broadcast_interval,
+        },
+        "elapsed_seconds": elapsed,
+        "endpoints": endpoints,
+        "total_bytes_per_second": sum(endpoint["bytes_per_second"] for endpoint in endpoints.values()),
+        "server_cpu_seconds_per_tick": summarize(cpu_samples) if cpu_samples else None,
+        "server_queues": server_queues,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Machine websockets load and latency benchmark.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--mix", type=parse_mix, default="global=1,account=1,subscribed=1", help="endpoint=weight pairs, e.g. global=1,account=8,subscribed=1")
+    parser.add_argument("--duration", type=float, default=60, help="measurement duration in seconds, after all clients were started")
+    parser.add_argument("--ramp", type=int, default=200, help="clients opened per second, 0 opens all at once")
+    parser.add_argument("--tick", type=float, default=WEBSOCKETS_CONFIG.state_broadcast_interval, help="server CPU sampling interval in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--spawn", action="store_true", help="start the API with the libvirt test:///default driver")
+    parser.add_argument("--server-pid", type=int, help="pid of an already running API for CPU sampling")
+    parser.add_argument("--output", default="websocket_benchmark.json")
+    args = parser.parse_args()
+    args.url = f"http://{args.host}:{args.port}"
+
+    logging.basicConfig(level=logging.INFO)
+
+    report = asyncio.run(benchmark(args))
+
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=4)
+
+    logger.info(f"Results written to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
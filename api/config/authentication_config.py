@@ -1,3 +1,4 @@
+import os
 from dataclasses import dataclass
 from datetime import timedelta
 
@@ -6,5 +7,13 @@ class AuthenticationConfig:
     algorithm: str = "HS256"
     access_token_lifetime: timedelta = timedelta(minutes=60)
     refresh_token_lifetime: timedelta = timedelta(minutes=1440)
+    user_cache_size: int = 4096         # max number of extended user models kept for token validation
+    user_cache_ttl: int = 60            # in seconds, bounds staleness if an invalidation is missed
+    last_active_flush_interval: int = 5 # in seconds
+    password_hashing_workers: int = os.cpu_count() or 1     # processes running bcrypt
+    password_hashing_queue_size: int = 64                   # hashing requests waiting for a process before new ones are rejected
+    password_hashing_retry_after: int = 2                   # in seconds, sent with the 503 response of rejected requests
+    forwardauth_cache_size: int = 16384                     # max number of access tokens kept for forwardauth
+    forwardauth_cache_ttl: int = 120                        # in seconds, tokens also expire with their own exp claim
     
 AUTHENTICATION_CONFIG = AuthenticationConfig()
\ No newline at end of file
@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+from utils.get_env import get_env
+
+@dataclass(frozen=True)
+class LibvirtConfig:
+    hypervisor_uri = get_env("LIBVIRT_URI", "qemu:///system")
+    readonly_pool_size = 8          # max concurrent read-only connections
+    read_write_pool_size = 4        # max concurrent read-write connections
+    acquire_timeout = 10            # in seconds
+    keepalive_interval = 5          # in seconds
+    keepalive_count = 3             # unanswered keepalive messages before the connection is considered dead
+    event_reconnect_interval = 5    # in seconds
+    executor_workers = 12           # threads running blocking libvirt calls, matches both pools combined
+    call_timeout = 30               # in seconds
+
+LIBVIRT_CONFIG = LibvirtConfig()
@@ -6,5 +6,6 @@ from pydantic import BaseModel
 class MachinesConfig:
     vm_state_poll_interval = 2 #in seconds
     vm_state_wait_timeout = 30 #in seconds
+    parameters_cache_size = 1024 # max number of parsed machine XMLs kept in memory
 
 MACHINES_CONFIG = MachinesConfig()
\ No newline at end of file
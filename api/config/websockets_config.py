@@ -3,7 +3,24 @@ from dataclasses import dataclass
 @dataclass(frozen=True)
 class WebsocketsConfig:
     state_broadcast_interval = 1
+    state_broadcast_jitter = 0.1 # in seconds
+    state_keyframe_interval = 30 # in seconds
     disks_broadcast_interval = 120
+    disks_broadcast_jitter = 5 # in seconds
     connections_broadcast_interval = 10
+    connections_broadcast_jitter = 1 # in seconds
+    send_queue_size = 32
+    send_timeout = 10 # in seconds
+    max_send_lag = 15 # in seconds
+    send_queue_idle_check_interval = 30 # in seconds
+    token_expiry_resolution = 1 # in seconds
+    event_journal_size = 256 # events buffered per topic for resumed sessions
+    event_journal_topics = 4096
+    event_journal_retention = 60 # in seconds, events of topics without subscribers are kept for resuming sessions
+    cluster_channel = "cherry_websockets"
+    cluster_leader_lock_id = 4_017_120_401
+    cluster_heartbeat_interval = 5 # in seconds
+    cluster_reconnect_interval = 5 # in seconds
+    cluster_notify_chunk_size = 7000 # notification payloads are limited to 8000 bytes
 
 WEBSOCKETS_CONFIG = WebsocketsConfig()
\ No newline at end of file
@@ -1,24 +1,117 @@
+import hashlib
 import logging
+import time
 
+from dataclasses import dataclass
+from uuid import UUID
 from cachetools import TTLCache
 
-from modules.authentication.validation import get_authenticated_user
+from config.authentication_config import AUTHENTICATION_CONFIG
+from modules.authentication.models import ForwardAuthCacheMetrics
+from modules.authentication.validation import decode_token, validate_token_payload
+from modules.exceptions import CredentialsException
+from modules.websockets.cluster_bus import ClusterBus
+from modules.websockets.websocket_manager import GlobalWebSocketManager
 
 logger = logging.getLogger(__name__)
 
+__all__ = ["ForwardAuthCache", "get_cached_uuid"]
 
-# 100 users cache that expires after 5 minutes
-forwardauth_cache = TTLCache(maxsize=100, ttl=300)
 
-def get_cached_uuid(token: str) -> str:
-    # If token is already in the cache, return the user
-    if token in forwardauth_cache:
-        return forwardauth_cache[token]
+@dataclass
+class CachedToken:
+    user_uuid: UUID
+    expires_at: float
 
-    # If not, query the db
-    user = get_authenticated_user(token)
-    user_uuid = str(user.uuid)
-    
-    # Save token to the cache
-    forwardauth_cache[token] = user_uuid
-    return user_uuid
\ No newline at end of file
+
+def hash_token(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+class _ForwardAuthCache():
+    """
+    Access tokens accepted by forwardauth, keyed by the token's hash so raw tokens are not kept in memory.
+    Entries expire with the token's exp claim or after forwardauth_cache_ttl, whichever comes first.
+    A miss checks the token's signature and expiry before the user is looked up, so forged and expired tokens never reach the database.
+    Forcibly disconnected users are purged on all workers. A lookup that raced with a purge is not stored.
+    """
+    def __init__(self):
+        self._cache = TTLCache[bytes, CachedToken](maxsize=AUTHENTICATION_CONFIG.forwardauth_cache_size, ttl=AUTHENTICATION_CONFIG.forwardauth_cache_ttl)
+        self._user_tokens: dict[UUID, set[bytes]] = {}
+        self._versions: dict[UUID, int] = {}
+
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._rejected = 0
+        self._purges = 0
+
+        ClusterBus.add_event_handler("forwardauth_purge", lambda uuid: self._purge(UUID(uuid)))
+        GlobalWebSocketManager.disconnect_listeners.append(self.purge_user)
+
+    async def get_user_uuid(self, token: str) -> UUID:
+        key = hash_token(token)
+        cached = self._cache.get(key)
+
+        if cached is not None:
+            if cached.expires_at > time.time():
+                self._hits += 1
+                return cached.user_uuid
+            self._expired += 1
+            self._cache.pop(key, None)
+
+        self._misses += 1
+
+        try:
+            payload = decode_token(token)
+            user_uuid = UUID(payload.subject)
+        except Exception:
+            self._rejected += 1
+            raise CredentialsException()
+
+        version = self._versions.get(user_uuid, 0)
+        user = await validate_token_payload(payload, 'access')
+
+        if self._versions.get(user.uuid, 0) == version:
+            self._store(key, user.uuid, payload.expiration_date.timestamp())
+
+        return user.uuid
+
+    def purge_user(self, user_uuid: UUID):
+        """
+        Drops the user's tokens on this worker immediately and on the other workers through the cluster bus.
+        """
+        self._purges += 1
+        self._purge(user_uuid)
+        ClusterBus.publish_event("forwardauth_purge", user_uuid)
+
+    def get_metrics(self) -> ForwardAuthCacheMetrics:
+        requests = self._hits + self._misses
+        return ForwardAuthCacheMetrics(
+            size=len(self._cache),
+            max_size=int(self._cache.maxsize),
+            hits=self._hits,
+            misses=self._misses,
+            hit_rate=(self._hits / requests) if requests else 0.0,
+            expired=self._expired,
+            rejected=self._rejected,
+            purges=self._purges,
+        )
+
+    def _store(self, key: bytes, user_uuid: UUID, expires_at: float):
+        self._cache[key] = CachedToken(user_uuid=user_uuid, expires_at=expires_at)
+        # keys evicted by the cache itself are pruned from the index as the user's tokens get stored
+        self._user_tokens[user_uuid] = {token_key for token_key in self._user_tokens.get(user_uuid, ()) if token_key in self._cache} | {key}
+
+    def _purge(self, user_uuid: UUID):
+        self._versions[user_uuid] = self._versions.get(user_uuid, 0) + 1
+
+        for key in self._user_tokens.pop(user_uuid, ()):
+            self._cache.pop(key, None)
+
+
+ForwardAuthCache = _ForwardAuthCache()
+
+
+async def get_cached_uuid(token: str) -> str:
+    return str(await ForwardAuthCache.get_user_uuid(token))
@@ -16,4 +16,14 @@ class Tokens(BaseModel):
 class DecodedTokenPayload(BaseModel):
     subject: str
     expiration_date: dt.datetime
-    token_type: TokenTypes
\ No newline at end of file
+    token_type: TokenTypes
+    
+class ForwardAuthCacheMetrics(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    hit_rate: float
+    expired: int
+    rejected: int
+    purges: int
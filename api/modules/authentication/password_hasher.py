@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import multiprocessing
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from config.authentication_config import AUTHENTICATION_CONFIG
+from modules.exceptions.models import HTTPServiceUnavailableException
+from .passwords import hash_password, verify_password
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+__all__ = ["PasswordHasher"]
+
+
+class _PasswordHasher():
+    """
+    Runs bcrypt on a process pool sized to the cores, so hashing neither blocks the event loop nor contends for the GIL.
+    Requests arriving while all processes are busy and password_hashing_queue_size requests already wait
+    are rejected with 503 and Retry-After instead of piling up behind a login storm.
+    Bulk hashing waits for free processes instead and never takes more than the pool's size of slots.
+    """
+    def __init__(self):
+        self._executor: ProcessPoolExecutor | None = None
+        self._pending = 0
+        self._rejected = 0
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(verify_password, plain_password, hashed_password)
+
+    async def hash(self, plain_password: str) -> str:
+        return await self._submit(hash_password, plain_password)
+
+    async def hash_many(self, plain_passwords: list[str]) -> list[str]:
+        workers = AUTHENTICATION_CONFIG.password_hashing_workers
+        hashed_passwords: list[str] = []
+
+        for i in range(0, len(plain_passwords), workers):
+            batch = plain_passwords[i:i + workers]
+            hashed_passwords += await asyncio.gather(*(self._run(hash_password, plain_password) for plain_password in batch))
+
+        return hashed_passwords
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _submit(self, func: Callable[..., T], *args: Any) -> T:
+        if self._pending >= AUTHENTICATION_CONFIG.password_hashing_workers + AUTHENTICATION_CONFIG.password_hashing_queue_size:
+            self._rejected += 1
+            logger.warning(f"Password hashing saturated with {self._pending} pending requests, rejected {self._rejected} so far.")
+            raise HTTPServiceUnavailableException("Too many concurrent authentication requests, please retry shortly.", AUTHENTICATION_CONFIG.password_hashing_retry_after)
+
+        return await self._run(func, *args)
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._pending -= 1
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawned rather than forked - the API process runs libvirt and database threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=AUTHENTICATION_CONFIG.password_hashing_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+
+PasswordHasher = _PasswordHasher()
@@ -1,6 +1,5 @@
 import logging
 import jwt
-import re
 import base64
 
 from typing import Annotated, Literal
@@ -12,7 +11,7 @@ from modules.users.users import UsersManager
 
 from .models import DecodedTokenPayload, Token, TokenTypes
 from .tokens import is_token_of_type
-from .passwords import verify_password
+from .password_hasher import PasswordHasher
 from application.env import SECRET_KEY
 from config.authentication_config import AUTHENTICATION_CONFIG
 from modules.exceptions import CredentialsException
@@ -33,57 +32,69 @@ def decode_token(token: Token) -> DecodedTokenPayload:
         
 
 
-def validate_user_token(token: Token, token_type: TokenTypes) -> AnyUserExtended:
+async def validate_user_token(token: Token, token_type: TokenTypes) -> AnyUserExtended:
     try:
-        payload = decode_token(token)
+        return await validate_token_payload(decode_token(token), token_type)
+    except (InvalidTokenError, ExpiredSignatureError, ValueError):
+        raise CredentialsException()
+
 
+
+async def validate_token_payload(payload: DecodedTokenPayload, token_type: TokenTypes) -> AnyUserExtended:
+    """
+    Validates an already decoded - signature and expiry checked - token against the user it was issued for.
+    """
+    try:
         if not is_token_of_type(payload, token_type):
             raise InvalidTokenError()
 
         uuid = UUID(payload.subject)
-        user = UsersManager.get_user(uuid)
+        user = await UsersManager.get_extended_user_async(uuid)
         
         if user is None or user.disabled:
             raise CredentialsException()
 
         UsersManager.update_user_last_active(user)
-        return UsersManager.extend_user_model(user)
+        return user
 
     except (InvalidTokenError, ExpiredSignatureError, ValueError):
         raise CredentialsException()
 
 
 
-def authenticate_user(username: str, password: str) -> AnyUserExtended | Literal[False]:
-    user = UsersManager.get_user_by_username(username)
+async def authenticate_user(username: str, password: str) -> AnyUserExtended | Literal[False]:
+    user = await UsersManager.get_user_by_username_async(username)
     
     if not user or user.disabled:
         return False
     
-    password_in_db = UsersManager.get_user_password(user.uuid)
+    password_in_db = await UsersManager.get_user_password_async(user.uuid)
+    
+    if password_in_db is None:
+        return False
     
-    if not verify_password(password, password_in_db):
+    if not await PasswordHasher.verify(password, password_in_db):
         return False
     
-    return UsersManager.extend_user_model(user)
+    return await UsersManager.extend_user_model_async(user)
 
 
 
-def get_authenticated_user(token: Token) -> AnyUserExtended: 
-    return validate_user_token(token, 'access')
+async def get_authenticated_user(token: Token) -> AnyUserExtended: 
+    return await validate_user_token(token, 'access')
 
 
 
-def get_authenticated_administrator(token: Token) -> AdministratorExtended:
-    user = validate_user_token(token, 'access')
+async def get_authenticated_administrator(token: Token) -> AdministratorExtended:
+    user = await validate_user_token(token, 'access')
     if not is_admin(user):
         raise HTTPException(status_code=403, detail="You do not have the necessary permissions to access this resource.")    
     return user
 
 
 
-def get_user_from_refresh_token(token: Token) -> AnyUserExtended:
-    return validate_user_token(token, 'refresh')
+async def get_user_from_refresh_token(token: Token) -> AnyUserExtended:
+    return await validate_user_token(token, 'refresh')
 
 
 DependsOnAdministrativeAuthentication = Annotated[AdministratorExtended, Depends(get_authenticated_administrator)]
@@ -99,25 +110,24 @@ def encode_guacamole_connection_string(machine_uuid: UUID, connection_type: str)
     Generate encoded Apache Guacamole connection string used for machine remote desktop access.
     """
     
-    machine_uuid_str = str(machine_uuid)
-    
-    identity_source = "postgresql"
-    
-    regex_pattern = f"^{re.escape(machine_uuid_str)}_{re.escape(connection_type)}$"
-    
     select_connection_id = """
         SELECT connection_id 
-        FROM guacamole_connection
-        WHERE connection_name ~ %s;
+        FROM machine_connections
+        WHERE machine_uuid = %s AND protocol = %s;
     """
     
-    connection_id = select_one(select_connection_id, (regex_pattern, ))
+    connection_id = select_one(select_connection_id, (machine_uuid, connection_type))
     
     if connection_id is None:
-        raise Exception(f"Could not encode guacamole connection string for non-existant {connection_type} connection to machine {machine_uuid_str}.")
-    
-    connection_id = connection_id.get("connection_id")
+        raise Exception(f"Could not encode guacamole connection string for non-existant {connection_type} connection to machine {machine_uuid}.")
     
+    return encode_guacamole_connection_id(connection_id["connection_id"])
+
+
+def encode_guacamole_connection_id(connection_id: int, identity_source: str = "postgresql") -> str:
+    """
+    Encodes an already known Apache Guacamole connection_id into a connection string.
+    """
     raw_connection_string = f"{connection_id}\0c\0{identity_source}".encode("utf-8")
     
     return base64.urlsafe_b64encode(raw_connection_string).rstrip(b"=").decode("ascii")
\ No newline at end of file
@@ -24,3 +24,12 @@ class HTTPNotFoundException(HTTPException):
 class CredentialsException(HTTPUnauthorizedException):
     def __init__(self):
         super().__init__(detail="Could not validate credentials.")
+
+
+class HTTPServiceUnavailableException(HTTPException):
+    def __init__(self, detail: str = "Service temporarily unavailable", retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
+        )
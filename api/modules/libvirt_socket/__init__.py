@@ -1,55 +1,29 @@
-from uuid import UUID
 import libvirt
-import logging
 from typing import Literal
-from modules.exceptions.models import RaisedException
+from config.libvirt_config import LIBVIRT_CONFIG
+from .models import *
+from .pool import *
+from .executor import *
 
 ###############################
 #   connection definition
 ###############################
 class LibvirtConnection():
-    hypervisor_uri = "qemu:///system"
-    
+    """
+    Borrows a long-lived connection from the process-wide pool for the duration of the with-block.
+    """
+    hypervisor_uri = LIBVIRT_CONFIG.hypervisor_uri
+
     def __init__(self, type: Literal["ro", "rw"]):
         self.type = type
+        self.pool = LibvirtConnectionPool.get(type)
         self.connection = None
-        
-        match self.type:
-            case "ro":
-                self.open_readonly()
-            case "rw":
-                self.open_read_write()
-            case _:
-                logging.error("Connection type must be either 'rw' or 'ro'")
-                raise ValueError("Connection type must be either 'rw' or 'ro'")
-    
+
     def __enter__(self) -> libvirt.virConnect:
-        if self.connection is not None:
-            return self.connection
-        else:
-            logging.error("Failed to create libvirt socket connection.")
-            raise RaisedException(f"Failed to create libvirt socket connection.")
+        self.connection = self.pool.acquire()
+        return self.connection
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.connection:
-            self.connection.close();
-    
-    def open_readonly(self):
-        try:
-            self.connection = libvirt.openReadOnly(self.hypervisor_uri)
-        except libvirt.libvirtError as e:
-            logging.error(repr(e))
-            raise RaisedException(f"Failed to open readonly libvirt connection to {self.hypervisor_uri}")
-        except Exception as e:
-            logging.error(repr(e))
-            raise RaisedException(f"Failed to open readonly libvirt connection to {self.hypervisor_uri}")
-
-    def open_read_write(self):
-        try:
-            self.connection = libvirt.open(self.hypervisor_uri)
-        except libvirt.libvirtError as e:
-            logging.error(repr(e))
-            raise RaisedException(f"Failed to open read-write libvirt connection to {self.hypervisor_uri}")
-        except Exception as e:
-            logging.error(repr(e))
-            raise RaisedException(f"Failed to open read-write libvirt connection to {self.hypervisor_uri}")
\ No newline at end of file
+        if self.connection is not None:
+            self.pool.release(self.connection)
+            self.connection = None
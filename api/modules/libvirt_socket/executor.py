@@ -0,0 +1,159 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Literal, TypeVar
+from uuid import UUID
+
+import libvirt
+
+from config.libvirt_config import LIBVIRT_CONFIG
+from .models import LibvirtExecutorMetrics
+from .pool import LibvirtConnectionPool
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+__all__ = ["LibvirtExecutor"]
+
+# Default call timeout, pass timeout=None for long running operations (e.g. disk allocation)
+DEFAULT_TIMEOUT: Any = object()
+
+
+class _LibvirtExecutor():
+    """
+    Runs blocking libvirt code on a dedicated, bounded thread pool, so a slow hypervisor call never stalls the event loop.
+    Calls are awaited with a timeout. A call that timed out or got cancelled before a worker picked it up is dropped,
+    one already running can't be interrupted and finishes in the background - its worker stays busy until then.
+    """
+    def __init__(self):
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._timeouts = 0
+        self._cancelled = 0
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._max_run_seconds = 0.0
+
+    async def run(self, func: Callable[..., T], *args: Any, timeout: float | None = DEFAULT_TIMEOUT, **kwargs: Any) -> T:
+        """
+        Awaits func(*args, **kwargs) executed on the libvirt thread pool.
+        Raises TimeoutError if the call didn't finish within timeout seconds.
+        """
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = LIBVIRT_CONFIG.call_timeout
+
+        with self._lock:
+            self._queued += 1
+
+        future = self._get_executor().submit(self._call, time.monotonic(), functools.partial(func, *args, **kwargs))
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except TimeoutError:
+            self._drop(future, timed_out=True)
+            logger.error(f"Libvirt call {getattr(func, '__qualname__', func)} timed out after {timeout}s.")
+            raise
+        except asyncio.CancelledError:
+            self._drop(future, timed_out=False)
+            raise
+
+    async def call(self, type: Literal["ro", "rw"], func: Callable[..., T], *args: Any, timeout: float | None = DEFAULT_TIMEOUT) -> T:
+        """
+        Awaits func(connection, *args) with a pooled connection of the given type borrowed in the worker thread.
+        """
+        def with_connection():
+            pool = LibvirtConnectionPool.get(type)
+            connection = pool.acquire()
+            try:
+                return func(connection, *args)
+            finally:
+                pool.release(connection)
+
+        return await self.run(with_connection, timeout=timeout)
+
+    async def domain_call(self, type: Literal["ro", "rw"], machine_uuid: UUID, method: str, *args: Any, timeout: float | None = DEFAULT_TIMEOUT) -> Any:
+        """
+        Awaits a virDomain method of the machine, e.g. domain_call("rw", uuid, "shutdownFlags", flag).
+        """
+        def call_method(connection: libvirt.virConnect):
+            return getattr(connection.lookupByUUID(machine_uuid.bytes), method)(*args)
+
+        return await self.call(type, call_method, timeout=timeout)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_metrics(self) -> LibvirtExecutorMetrics:
+        with self._lock:
+            finished = self._completed + self._failed
+            return LibvirtExecutorMetrics(
+                max_workers=LIBVIRT_CONFIG.executor_workers,
+                queued_calls=self._queued,
+                running_calls=self._running,
+                completed_calls=self._completed,
+                failed_calls=self._failed,
+                timeouts=self._timeouts,
+                cancelled_calls=self._cancelled,
+                average_wait_seconds=(self._total_wait_seconds / finished) if finished else 0.0,
+                max_wait_seconds=self._max_wait_seconds,
+                max_run_seconds=self._max_run_seconds,
+            )
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=LIBVIRT_CONFIG.executor_workers, thread_name_prefix="libvirt")
+            return self._executor
+
+    def _call(self, submitted_at: float, func: Callable[[], T]) -> T:
+        started_at = time.monotonic()
+
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._total_wait_seconds += started_at - submitted_at
+            self._max_wait_seconds = max(self._max_wait_seconds, started_at - submitted_at)
+
+        failed = False
+
+        try:
+            return func()
+        except Exception:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._max_run_seconds = max(self._max_run_seconds, time.monotonic() - started_at)
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+
+    def _drop(self, future: Future, timed_out: bool):
+        # only succeeds if no worker picked the call up yet
+        dropped = future.cancel()
+
+        with self._lock:
+            if dropped:
+                self._queued -= 1
+            if timed_out:
+                self._timeouts += 1
+            else:
+                self._cancelled += 1
+
+
+LibvirtExecutor = _LibvirtExecutor()
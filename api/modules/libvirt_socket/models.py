@@ -0,0 +1,26 @@
+from typing import Literal
+from pydantic import BaseModel
+
+class LibvirtPoolMetrics(BaseModel):
+    type: Literal["ro", "rw"]
+    max_size: int                   # concurrency cap of the pool
+    open_connections: int           # connections currently held by the pool (idle + borrowed)
+    idle_connections: int
+    borrowed_connections: int
+    acquisitions: int
+    average_wait_seconds: float     # average time spent waiting for a free slot
+    max_wait_seconds: float
+    reconnects: int                 # dead connections replaced with fresh ones
+    timeouts: int                   # acquisitions that gave up waiting for a free slot
+
+class LibvirtExecutorMetrics(BaseModel):
+    max_workers: int
+    queued_calls: int               # calls waiting for a free worker
+    running_calls: int
+    completed_calls: int
+    failed_calls: int
+    timeouts: int                   # calls not finished within their timeout
+    cancelled_calls: int            # calls whose caller went away (e.g. disconnected client)
+    average_wait_seconds: float     # average time spent waiting for a free worker
+    max_wait_seconds: float
+    max_run_seconds: float
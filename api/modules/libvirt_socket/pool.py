@@ -0,0 +1,201 @@
+import asyncio
+import libvirt
+import logging
+import threading
+import time
+from collections import deque
+from typing import Literal
+from config.libvirt_config import LIBVIRT_CONFIG
+from modules.exceptions.models import RaisedException
+from .models import LibvirtPoolMetrics
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["LibvirtConnectionPool"]
+
+###############################
+#   single pool
+###############################
+class _LibvirtPool():
+    """
+    Keeps long-lived libvirt connections of one type and lends them out.
+    The semaphore caps how many connections can be borrowed at once,
+    dead connections (e.g. after a libvirtd restart) are replaced on the next borrow.
+    Connections are borrowed in worker threads - on the event loop only a free connection is handed out,
+    waiting there would freeze the loop the borrowers need to give their connections back.
+    """
+    def __init__(self, type: Literal["ro", "rw"], max_size: int):
+        self.type: Literal["ro", "rw"] = type
+        self.max_size = max_size
+
+        self._idle: deque[libvirt.virConnect] = deque()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self._open_connections = 0
+        self._borrowed_connections = 0
+        self._acquisitions = 0
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._reconnects = 0
+        self._timeouts = 0
+
+    def acquire(self) -> libvirt.virConnect:
+        start = time.monotonic()
+
+        if not self._slots.acquire(timeout=0 if self._on_event_loop() else LIBVIRT_CONFIG.acquire_timeout):
+            with self._lock:
+                self._timeouts += 1
+            logger.error(f"Timed out waiting for a {self.type} libvirt connection.")
+            raise RaisedException(f"Timed out waiting for a {self.type} libvirt connection.")
+
+        waited = time.monotonic() - start
+
+        try:
+            connection = self._take_idle()
+            if connection is None:
+                connection = self._open()
+                with self._lock:
+                    self._open_connections += 1
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._borrowed_connections += 1
+            self._acquisitions += 1
+            self._total_wait_seconds += waited
+            self._max_wait_seconds = max(self._max_wait_seconds, waited)
+
+        return connection
+
+    def release(self, connection: libvirt.virConnect):
+        keep = not self._closed and self._is_alive(connection)
+
+        with self._lock:
+            self._borrowed_connections -= 1
+            if keep:
+                self._idle.append(connection)
+            else:
+                self._open_connections -= 1
+
+        if not keep:
+            self._close(connection)
+
+        self._slots.release()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            connections = list(self._idle)
+            self._idle.clear()
+            self._open_connections -= len(connections)
+
+        for connection in connections:
+            self._close(connection)
+
+    def get_metrics(self) -> LibvirtPoolMetrics:
+        with self._lock:
+            return LibvirtPoolMetrics(
+                type=self.type,
+                max_size=self.max_size,
+                open_connections=self._open_connections,
+                idle_connections=len(self._idle),
+                borrowed_connections=self._borrowed_connections,
+                acquisitions=self._acquisitions,
+                average_wait_seconds=(self._total_wait_seconds / self._acquisitions) if self._acquisitions else 0.0,
+                max_wait_seconds=self._max_wait_seconds,
+                reconnects=self._reconnects,
+                timeouts=self._timeouts,
+            )
+
+    def _take_idle(self) -> libvirt.virConnect | None:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                connection = self._idle.pop()
+
+            if self._is_alive(connection):
+                return connection
+
+            logger.warning(f"Dropping dead {self.type} libvirt connection to {LIBVIRT_CONFIG.hypervisor_uri}, reconnecting.")
+            self._close(connection)
+
+            with self._lock:
+                self._open_connections -= 1
+                self._reconnects += 1
+
+    def _open(self) -> libvirt.virConnect:
+        try:
+            if self.type == "ro":
+                connection = libvirt.openReadOnly(LIBVIRT_CONFIG.hypervisor_uri)
+            else:
+                connection = libvirt.open(LIBVIRT_CONFIG.hypervisor_uri)
+        except Exception as e:
+            logger.error(repr(e))
+            raise RaisedException(f"Failed to open {self.type} libvirt connection to {LIBVIRT_CONFIG.hypervisor_uri}")
+
+        if connection is None:
+            raise RaisedException(f"Failed to open {self.type} libvirt connection to {LIBVIRT_CONFIG.hypervisor_uri}")
+
+        try:
+            connection.setKeepAlive(LIBVIRT_CONFIG.keepalive_interval, LIBVIRT_CONFIG.keepalive_count)
+        except libvirt.libvirtError:
+            # keepalive needs a registered libvirt event loop implementation,
+            # without one dead connections are still detected by isAlive() on borrow
+            pass
+
+        return connection
+
+    @staticmethod
+    def _on_event_loop() -> bool:
+        try:
+            asyncio.get_running_loop()
+            return True
+        except RuntimeError:
+            return False
+
+    @staticmethod
+    def _is_alive(connection: libvirt.virConnect) -> bool:
+        try:
+            return connection.isAlive() == 1
+        except libvirt.libvirtError:
+            return False
+
+    @staticmethod
+    def _close(connection: libvirt.virConnect):
+        try:
+            connection.close()
+        except libvirt.libvirtError as e:
+            logger.debug(repr(e))
+
+
+###############################
+#   process-wide pools
+###############################
+class _LibvirtConnectionPool():
+    def __init__(self):
+        self.readonly = _LibvirtPool("ro", LIBVIRT_CONFIG.readonly_pool_size)
+        self.read_write = _LibvirtPool("rw", LIBVIRT_CONFIG.read_write_pool_size)
+
+    def get(self, type: Literal["ro", "rw"]) -> _LibvirtPool:
+        match type:
+            case "ro":
+                return self.readonly
+            case "rw":
+                return self.read_write
+            case _:
+                logger.error("Connection type must be either 'rw' or 'ro'")
+                raise ValueError("Connection type must be either 'rw' or 'ro'")
+
+    def get_metrics(self) -> list[LibvirtPoolMetrics]:
+        return [self.readonly.get_metrics(), self.read_write.get_metrics()]
+
+    def close(self):
+        self.readonly.close()
+        self.read_write.close()
+
+
+LibvirtConnectionPool = _LibvirtConnectionPool()
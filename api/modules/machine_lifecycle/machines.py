@@ -8,12 +8,13 @@ import copy
 from typing import Optional, List
 from uuid import UUID, uuid4
 
-from modules.libvirt_socket import LibvirtConnection
+from modules.libvirt_socket import LibvirtConnection, LibvirtExecutor
 from modules.machine_lifecycle.remote_access import update_machine_clients
 from modules.machine_lifecycle.models import MachineParameters, CreateMachineForm, MachineBulkSpec, ConnectionPermissions, ModifyMachineForm, InternetInterface, MachineNetworkInterface
 from modules.machine_lifecycle.xml_translator import create_machine_xml, parse_machine_xml, translate_machine_form_to_machine_parameters
 from modules.machine_lifecycle.disks import delete_machine_disk, machine_disks_cleanup, create_machine_disk
 from modules.machine_lifecycle.networks import get_network_bridge_ip, attach_network_interface, detach_network_interface
+from modules.machine_lifecycle.parameters_cache import MachineParametersCache
 from modules.postgresql.main import async_pool
 from modules.postgresql.simple_select import select_single_field
 from utils.mac import generate_random_mac
@@ -50,6 +51,11 @@ async def create_machine_async(machine: CreateMachineForm, owner_uuid: UUID) ->
         RETURNING connection_id;
     """
     
+    insert_machine_connection = """
+        INSERT INTO machine_connections (machine_uuid, connection_id, protocol)
+        VALUES (%s, %s, %s);
+    """
+    
     insert_guacamole_connection_permission = """
         INSERT INTO guacamole_connection_permission (entity_id, connection_id, permission)
         VALUES (%s, %s, %s);
@@ -74,7 +80,7 @@ async def create_machine_async(machine: CreateMachineForm, owner_uuid: UUID) ->
             async with connection.transaction():
                 try:
                     logger.debug("Retrieving cherry-ras network bridge IP.")
-                    ras_ip = await asyncio.to_thread(get_network_bridge_ip, ENV_CONFIG.NETWORK_RAS_NAME)
+                    ras_ip = await LibvirtExecutor.run(get_network_bridge_ip, ENV_CONFIG.NETWORK_RAS_NAME)
                     connection_parameters = [("hostname", ras_ip), ("port", "0")]
                     
                     # At this stage the records are not commited yet. They will remain in this state until the machine is sucessfully defined through the Libvirt API (when no exceptions occur).
@@ -103,6 +109,9 @@ async def create_machine_async(machine: CreateMachineForm, owner_uuid: UUID) ->
                     else:
                         raise Exception(f"Failed to retrieve connection_id from guacamole_connection insert query for {machine_parameters.uuid}.")
                     
+                    logger.debug(f"Inserting record into machine_connections for {machine_parameters.uuid}.")
+                    await cursor.execute(insert_machine_connection, (machine_parameters.uuid, connection_id, machine_parameters.framebuffer.type))
+                    
                     logger.debug(f"Fetching guacamole entity_id corresponding to owner_uuid.")
                     await cursor.execute(select_guacamole_entity_id, (str(owner_uuid),))
                     
@@ -147,7 +156,7 @@ async def create_machine_async(machine: CreateMachineForm, owner_uuid: UUID) ->
                     
                     logger.debug(f"Starting parallel disk creation for machine {machine_parameters.uuid}")
                     # Creation tasks to be run concurrently in separate threads.
-                    disk_tasks = [asyncio.to_thread(create_machine_disk, disk) for disk in [machine_parameters.system_disk, *(machine_parameters.additional_disks or [])]]
+                    disk_tasks = [LibvirtExecutor.run(create_machine_disk, disk, timeout=None) for disk in [machine_parameters.system_disk, *(machine_parameters.additional_disks or [])]]
                     
                     created_disk_uuids = await asyncio.gather(*disk_tasks)
                     
@@ -178,8 +187,8 @@ async def create_machine_async(machine: CreateMachineForm, owner_uuid: UUID) ->
                             libvirt_connection.defineXMLFlags(machine_xml, libvirt.VIR_DOMAIN_DEFINE_VALIDATE)
                     
                     logger.debug(f"Awaiting {machine_parameters.uuid} machine definition.")
-                    # Synchronous Libvirt logic needs to be wrapped with asyncio.to_thread() to be run in a separate thread.
-                    await asyncio.to_thread(define_machine)
+                    # Synchronous Libvirt logic needs to be wrapped with LibvirtExecutor.run() to be run in a separate thread.
+                    await LibvirtExecutor.run(define_machine)
                     
                     logger.info(f"Machine {machine_parameters.uuid} created succesfully.")
                     return machine_parameters.uuid
@@ -187,12 +196,12 @@ async def create_machine_async(machine: CreateMachineForm, owner_uuid: UUID) ->
                 
                 except libvirt.libvirtError as e:
                     # Run created disks cleanup.
-                    # Same case as with define_machine() - machine_disks_cleanup() is synchronous and needs to be run using using asyncio in a separate thread.
-                    await asyncio.to_thread(machine_disks_cleanup, machine_parameters)
+                    # Same case as with define_machine() - machine_disks_cleanup() is synchronous and needs to be run on the libvirt executor.
+                    await LibvirtExecutor.run(machine_disks_cleanup, machine_parameters, timeout=None)
                     raise Exception(f"Failed to define machine {machine_parameters.uuid} because of Libvirt error:\n{e}")
                 
                 except Exception as e:
-                    await asyncio.to_thread(machine_disks_cleanup, machine_parameters)
+                    await LibvirtExecutor.run(machine_disks_cleanup, machine_parameters, timeout=None)
                     raise Exception(f"Failed to define machine {machine_parameters.uuid}:\n{e}")
 
 
@@ -232,6 +241,11 @@ async def create_machine_async_bulk(machines: List[MachineBulkSpec], owner_uuid:
         RETURNING connection_id;
     """
     
+    insert_machine_connection = """
+        INSERT INTO machine_connections (machine_uuid, connection_id, protocol)
+        VALUES (%s, %s, %s);
+    """
+    
     insert_guacamole_connection_permission = """
         INSERT INTO guacamole_connection_permission (entity_id, connection_id, permission)
         VALUES (%s, %s, %s);
@@ -285,7 +299,7 @@ async def create_machine_async_bulk(machines: List[MachineBulkSpec], owner_uuid:
             async with connection.transaction():
                 try:
                     logger.debug("Retrieving cherry-ras network bridge IP.")
-                    ras_ip = await asyncio.to_thread(get_network_bridge_ip, ENV_CONFIG.NETWORK_RAS_NAME)
+                    ras_ip = await LibvirtExecutor.run(get_network_bridge_ip, ENV_CONFIG.NETWORK_RAS_NAME)
                     connection_parameters = [("hostname", ras_ip), ("port", "0")]
                     
                     # At this stage the records are not commited yet. They will remain in this state until all machines are sucessfully defined through the Libvirt API (when no exceptions occur).
@@ -314,6 +328,9 @@ async def create_machine_async_bulk(machines: List[MachineBulkSpec], owner_uuid:
                         else:
                             raise Exception(f"Failed to retrieve connection_id from guacamole_connection insert query for {machine_clone.uuid}.")
                         
+                        logger.debug(f"Inserting record into machine_connections for {machine_clone.uuid}.")
+                        await cursor.execute(insert_machine_connection, (machine_clone.uuid, connection_id, machine_clone.framebuffer.type))
+                        
                         logger.debug(f"Fetching guacamole entity_id corresponding to owner_uuid.")
                         await cursor.execute(select_guacamole_entity_id, (str(owner_uuid),))
                         
@@ -369,7 +386,7 @@ async def create_machine_async_bulk(machines: List[MachineBulkSpec], owner_uuid:
                     async def create_machine_disks_async(machine: MachineParameters):
                         logger.debug(f"Starting parallel disk creation for machine {machine.uuid}")
                         # Creation tasks to be run concurrently in separate threads.
-                        disk_tasks = [asyncio.to_thread(create_machine_disk, disk) for disk in [machine.system_disk, *(machine.additional_disks or [])]]
+                        disk_tasks = [LibvirtExecutor.run(create_machine_disk, disk, timeout=None) for disk in [machine.system_disk, *(machine.additional_disks or [])]]
                         
                         created_disk_uuids = await asyncio.gather(*disk_tasks)
                         
@@ -409,8 +426,8 @@ async def create_machine_async_bulk(machines: List[MachineBulkSpec], owner_uuid:
                                 libvirt_connection.defineXMLFlags(machine_xml, libvirt.VIR_DOMAIN_DEFINE_VALIDATE)
                         
                         logger.debug(f"Awaiting {machine.uuid} machine definition.")
-                        # Synchronous Libvirt logic needs to be wrapped with asyncio.to_thread() to be run in a separate thread.
-                        await asyncio.to_thread(define_sync)
+                        # Synchronous Libvirt logic needs to be wrapped with LibvirtExecutor.run() to be run in a separate thread.
+                        await LibvirtExecutor.run(define_sync)
                         
                         logger.debug(f"Machine {machine.uuid} created succesfully.")
                         return machine.uuid
@@ -465,7 +482,7 @@ async def delete_machine_async(machine_uuid: UUID) -> bool:
                 
         
         logger.debug(f"Awaiting {machine_uuid} XML config fetch.")
-        raw_machine_xml = await asyncio.to_thread(get_machine_xml)
+        raw_machine_xml = await LibvirtExecutor.run(get_machine_xml)
         
         logger.debug(f"Parsing {machine_uuid} XML config back to MachineParameters model.")
         machine_parameters = parse_machine_xml(raw_machine_xml)
@@ -499,13 +516,13 @@ async def delete_machine_async(machine_uuid: UUID) -> bool:
             
             if system_disk.uuid is not None:
                 logger.debug(f"Deleting machine {machine_uuid} system disk.")
-                disk_tasks.append(asyncio.to_thread(delete_machine_disk, system_disk.uuid, system_disk.pool))
+                disk_tasks.append(LibvirtExecutor.run(delete_machine_disk, system_disk.uuid, system_disk.pool, timeout=None))
             
             if additional_disks is not None:
                 logger.debug(f"Deleting machine {machine_uuid} additional disks.")
                 for disk in additional_disks:
                     if disk.uuid is not None:
-                        disk_tasks.append(asyncio.to_thread(delete_machine_disk, disk.uuid, disk.pool))
+                        disk_tasks.append(LibvirtExecutor.run(delete_machine_disk, disk.uuid, disk.pool, timeout=None))
             
             if disk_tasks:
                 logger.debug(f"Scheduling deletion for the disks of machine {machine_uuid}")
@@ -525,33 +542,28 @@ async def delete_machine_async(machine_uuid: UUID) -> bool:
             DELETE FROM deployed_machines_owners WHERE machine_uuid = %s;
         """
         
-        select_guacamole_connection_id = """
-            SELECT connection_id FROM guacamole_connection WHERE connection_name LIKE %s;
-        """
-        
-        select_pattern = f"{machine_uuid}_%"
-        
-        delete_guacamole_connection = """
-            DELETE FROM guacamole_connection WHERE connection_id = %s;
+        # machine_connections rows cascade with deployed_machines_owners, the connections are deleted first
+        delete_guacamole_connections = """
+            DELETE FROM guacamole_connection 
+            WHERE connection_id IN (SELECT connection_id FROM machine_connections WHERE machine_uuid = %s)
+            RETURNING connection_id;
         """
         
         logger.debug(f"Deleting machine {machine_uuid} DB records.")
         async with async_pool.connection() as connection:
             async with connection.cursor() as cursor:
                 async with connection.transaction():
-                    await cursor.execute(delete_machine, (machine_uuid,))
-                    
-                    await cursor.execute(select_guacamole_connection_id, (select_pattern,))
+                    await cursor.execute(delete_guacamole_connections, (machine_uuid,))
                     results = await cursor.fetchall()
                     
                     if results:
                         for row in results:
-                            connection_id = row["connection_id"]
-                            logger.debug(f"Deleting guacamole connection_id: {connection_id}.")
-                            await cursor.execute(delete_guacamole_connection, (connection_id,)) 
+                            logger.debug(f"Deleted guacamole connection_id: {row['connection_id']}.")
                     else:
                         raise Exception(f"Failed to retrieve connection_id from guacamole_connection for {machine_uuid}.")
                     
+                    await cursor.execute(delete_machine, (machine_uuid,))
+                    
                     
     
     except Exception as e:
@@ -570,7 +582,7 @@ async def delete_machine_async(machine_uuid: UUID) -> bool:
                 except libvirt.libvirtError as e:
                     logger.warning(f"Failed to undefine machine {machine_uuid} because of Libvirt error: {e}")
         
-        await asyncio.to_thread(undefine_machine)
+        await LibvirtExecutor.run(undefine_machine)
     
     except Exception as e:
         logger.warning(f"Failed to undefine machine {machine_uuid}: {e}")
@@ -618,9 +630,9 @@ async def modify_machine(machine_uuid: UUID, form: ModifyMachineForm):
                                 
                         if form.internet_connectivity is True and internet_interface_mac is None:
                             internet_interface_mac = generate_random_mac()
-                            attach_network_interface(machine_uuid, InternetInterface(mac=internet_interface_mac))
+                            await LibvirtExecutor.run(attach_network_interface, machine_uuid, InternetInterface(mac=internet_interface_mac))
                         elif form.internet_connectivity is False and internet_interface_mac is not None:
-                            detach_network_interface(machine_uuid, internet_interface_mac)
+                            await LibvirtExecutor.run(detach_network_interface, machine_uuid, internet_interface_mac)
                         else:
                             logger.info(f"No changes to Internet connectivity for machine {machine_uuid}.")
                             
@@ -628,4 +640,6 @@ async def modify_machine(machine_uuid: UUID, form: ModifyMachineForm):
                         raise Exception(f"Failed to modify the Internet connectivity for machine {machine_uuid} because of Libvirt error:\n{e}")
             
                     except Exception as e:
-                        raise Exception(f"Failed to modify the Internet connectivity for machine {machine_uuid}:\n{e}")
\ No newline at end of file
+                        raise Exception(f"Failed to modify the Internet connectivity for machine {machine_uuid}:\n{e}")
+    
+    MachineParametersCache.invalidate(machine_uuid)
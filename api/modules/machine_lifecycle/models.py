@@ -184,7 +184,7 @@ class MachineBulkSpec(BaseModel):
     machine_config: CreateMachineForm
     machine_count: int
     
-    @field_validator("size_bytes", mode="before")
+    @field_validator("machine_count", mode="before")
     @classmethod
     def validate_machine_count(cls, value):
         return int_validator(value=value, min_value=1, field_name="machine_count")
@@ -217,4 +217,14 @@ class ModifyMachineForm(BaseModel):
     def validate_tags(cls, value):
         if value is None:
             return value
-        return {short_name_validator(tag) for tag in value}
\ No newline at end of file
+        return {short_name_validator(tag) for tag in value}
+
+################################
+#   Parsed parameters cache
+################################
+class MachineParametersCacheMetrics(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    invalidations: int
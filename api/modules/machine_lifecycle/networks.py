@@ -10,6 +10,7 @@ from uuid import UUID
 from modules.libvirt_socket import LibvirtConnection
 from modules.machine_lifecycle.xml_translator import get_required_xml_tag, get_required_xml_tag_attribute, parse_machine_xml, create_machine_network_interface_xml
 from modules.machine_lifecycle.models import MachineNetworkInterface, InternetInterface
+from modules.machine_lifecycle.parameters_cache import MachineParametersCache
 from modules.postgresql.main import pool
 from modules.postgresql.simple_select import select_single_field
 
@@ -39,19 +40,14 @@ def get_machine_framebuffer_port(machine_uuid: UUID) -> str:
     """
     Find framebuffer port of a given machine.
     """
-    with LibvirtConnection("ro") as libvirt_connection:
-        machine = libvirt_connection.lookupByUUID(machine_uuid.bytes)
-        
-        machine_xml = machine.XMLDesc()
-        
-        machine_parameters = parse_machine_xml(machine_xml)
-        
-        framebuffer_port = machine_parameters.framebuffer.port
-        
-        if framebuffer_port is None:
-            raise Exception(f"Failed to extract framebuffer port of {machine_uuid}")
-        
-        return framebuffer_port
+    machine_parameters = MachineParametersCache.get(machine_uuid)
+    
+    framebuffer_port = machine_parameters.framebuffer.port
+    
+    if framebuffer_port is None:
+        raise Exception(f"Failed to extract framebuffer port of {machine_uuid}")
+    
+    return framebuffer_port
 
 
 def attach_network_interface(machine_uuid: UUID, network_interface: MachineNetworkInterface):
@@ -78,6 +74,8 @@ def attach_network_interface(machine_uuid: UUID, network_interface: MachineNetwo
                         machine = libvirt_connection.lookupByUUID(machine_uuid.bytes)
                         
                         machine.attachDeviceFlags(interface_xml, flags)    
+                    
+                    MachineParametersCache.invalidate(machine_uuid)
                         
                     if network_interface.name == InternetInterface().name:
                         # If given network interface is the Internet interface a different table needs to be updated in the database 
@@ -126,6 +124,8 @@ def detach_network_interface(machine_uuid: UUID, mac_address: str):
                         
                         machine.detachDeviceFlags(interface_minimal_xml, flags)
                     
+                    MachineParametersCache.invalidate(machine_uuid)
+                    
                     # No checking is done here to ensure whether the interface being detached is the Internet interface or a regular one. 
                     # Both cases are handled by deleting the interface from both tables in the database as this is significantly faster than checking the interface type first and then deleting it from the appropriate table.
                     cursor.execute("DELETE FROM internet_connections WHERE machine_uuid = %s AND interface_mac = %s", (machine_uuid, mac_address))
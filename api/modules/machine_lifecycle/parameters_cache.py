@@ -0,0 +1,132 @@
+import libvirt
+import logging
+import threading
+
+from uuid import UUID
+from typing import Iterable
+from cachetools import LRUCache
+
+from config.machines_config import MACHINES_CONFIG
+from modules.libvirt_socket import LibvirtConnection
+from modules.machine_lifecycle.models import MachineParameters, MachineParametersCacheMetrics
+from modules.machine_lifecycle.xml_translator import parse_machine_xml_definition
+from modules.machine_state.state_cache import MachineStateCache
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["MachineParametersCache"]
+
+
+class _MachineParametersCache():
+    """
+    LRU cache of MachineParameters parsed from the live domain XML (without database enrichment).
+    Entries are dropped on libvirt definition/lifecycle/device events and by the API's own modification paths.
+    While libvirt events are not delivered the cache is bypassed.
+    """
+    def __init__(self):
+        self._cache: LRUCache[UUID, MachineParameters] = LRUCache(maxsize=MACHINES_CONFIG.parameters_cache_size)
+        self._versions: dict[UUID, int] = {}
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+        MachineStateCache.add_definition_listener(self.invalidate)
+
+    def get(self, machine_uuid: UUID) -> MachineParameters:
+        parameters = self._get_cached(machine_uuid)
+        if parameters is not None:
+            return parameters
+
+        version = self._get_version(machine_uuid)
+
+        with LibvirtConnection("ro") as libvirt_connection:
+            machine_xml = libvirt_connection.lookupByUUID(machine_uuid.bytes).XMLDesc()
+
+        parameters = parse_machine_xml_definition(machine_xml)
+        self._store(machine_uuid, parameters, version)
+
+        return parameters
+
+    def get_many(self, machine_uuids: Iterable[UUID]) -> dict[UUID, MachineParameters]:
+        """
+        Returns parameters of all given machines, borrowing a single connection for the cache misses.
+        Machines that are not defined in libvirt or fail to parse are skipped.
+        """
+        machines_parameters: dict[UUID, MachineParameters] = {}
+        missing: list[UUID] = []
+
+        for machine_uuid in machine_uuids:
+            parameters = self._get_cached(machine_uuid)
+            if parameters is not None:
+                machines_parameters[machine_uuid] = parameters
+            else:
+                missing.append(machine_uuid)
+
+        if not missing:
+            return machines_parameters
+
+        with LibvirtConnection("ro") as libvirt_connection:
+            for machine_uuid in missing:
+                version = self._get_version(machine_uuid)
+                try:
+                    machine_xml = libvirt_connection.lookupByUUID(machine_uuid.bytes).XMLDesc()
+                    parameters = parse_machine_xml_definition(machine_xml)
+                except libvirt.libvirtError as e:
+                    logger.debug(f"Skipping machine {machine_uuid}: {e}")
+                    continue
+                except Exception:
+                    logger.exception(f"Failed to parse XML of machine {machine_uuid}.")
+                    continue
+
+                self._store(machine_uuid, parameters, version)
+                machines_parameters[machine_uuid] = parameters
+
+        return machines_parameters
+
+    def invalidate(self, machine_uuid: UUID | None = None):
+        """
+        Drops the cached parameters of a machine, or of all machines if no UUID is given.
+        """
+        with self._lock:
+            self._invalidations += 1
+            if machine_uuid is None:
+                for cached_uuid in self._versions:
+                    self._versions[cached_uuid] += 1
+                self._cache.clear()
+            else:
+                self._versions[machine_uuid] = self._versions.get(machine_uuid, 0) + 1
+                self._cache.pop(machine_uuid, None)
+
+    def _get_cached(self, machine_uuid: UUID) -> MachineParameters | None:
+        with self._lock:
+            parameters = self._cache.get(machine_uuid)
+            if parameters is not None:
+                self._hits += 1
+            else:
+                self._misses += 1
+            return parameters
+
+    def _get_version(self, machine_uuid: UUID) -> int:
+        with self._lock:
+            return self._versions.setdefault(machine_uuid, 0)
+
+    def _store(self, machine_uuid: UUID, parameters: MachineParameters, version: int):
+        with self._lock:
+            # skip storing if the machine was invalidated while its XML was being parsed
+            if MachineStateCache.active and self._versions.get(machine_uuid) == version:
+                self._cache[machine_uuid] = parameters
+
+    def get_metrics(self) -> MachineParametersCacheMetrics:
+        with self._lock:
+            return MachineParametersCacheMetrics(
+                size=len(self._cache),
+                max_size=int(self._cache.maxsize),
+                hits=self._hits,
+                misses=self._misses,
+                invalidations=self._invalidations,
+            )
+
+
+MachineParametersCache = _MachineParametersCache()
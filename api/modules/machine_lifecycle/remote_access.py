@@ -16,7 +16,7 @@ def update_machine_clients(machine_uuid: UUID, clients_uuid: set[UUID]):
     """
     
     select_guacamole_connection_id = """
-        SELECT connection_id FROM guacamole_connection WHERE connection_name LIKE %s;
+        SELECT connection_id FROM machine_connections WHERE machine_uuid = %s;
     """
     
     # DELETE
@@ -40,8 +40,6 @@ def update_machine_clients(machine_uuid: UUID, clients_uuid: set[UUID]):
         VALUES (%s, %s, %s);
     """
     
-    select_pattern = f"{machine_uuid}_%"
-
     owner = get_machine_owner(machine_uuid)
     if owner is not None:
         owner_uuid = owner.uuid
@@ -54,7 +52,7 @@ def update_machine_clients(machine_uuid: UUID, clients_uuid: set[UUID]):
     else:
         raise Exception(f"Could not find corresponding guacamole entity_id for owner {owner_uuid}")
     
-    machine_connections = select_single_field("connection_id", select_guacamole_connection_id, (select_pattern,))
+    machine_connections = select_single_field("connection_id", select_guacamole_connection_id, (machine_uuid,))
     
     logger.debug(f"Updating {machine_uuid} clients records.")
     
@@ -389,8 +389,44 @@ def parse_machine_graphics(graphics_element: ET.Element) -> MachineGraphicalFram
 
 def parse_machine_xml(machine_xml: str) -> MachineParameters:
     """
-    Gets XML string and parses it back into a MachineParameters object.\n
-    Only parses elements that exist in MachineParameters model.
+    Gets XML string and parses it back into a MachineParameters object, including assigned clients from the database.
+    """
+    machine_parameters = parse_machine_xml_definition(machine_xml)
+    
+    if machine_parameters.uuid is None:
+        raise ValueError("Element uuid not found in XML string.")
+    
+    return enrich_machine_parameters({machine_parameters.uuid: machine_parameters})[machine_parameters.uuid]
+
+
+def enrich_machine_parameters(machines_parameters: dict[UUID, MachineParameters]) -> dict[UUID, MachineParameters]:
+    """
+    Fills assigned clients of the given machines with a single database query.\n
+    Returns enriched copies, the passed models are left untouched.
+    """
+    if not machines_parameters:
+        return {}
+    
+    assigned_clients_query = select_rows(
+        "SELECT machine_uuid, client_uuid FROM deployed_machines_clients WHERE machine_uuid = ANY(%s)", 
+        (list(machines_parameters.keys()),)
+    )
+    
+    assigned_clients: dict[UUID, set[UUID]] = {machine_uuid: set() for machine_uuid in machines_parameters}
+    
+    for row in assigned_clients_query:
+        assigned_clients[row["machine_uuid"]].add(row["client_uuid"])
+    
+    return {
+        machine_uuid: machine_parameters.model_copy(update={"assigned_clients": assigned_clients[machine_uuid]})
+        for machine_uuid, machine_parameters in machines_parameters.items()
+    }
+
+
+def parse_machine_xml_definition(machine_xml: str) -> MachineParameters:
+    """
+    Gets XML string and parses it back into a MachineParameters object without touching the database.\n
+    Only parses elements that exist in MachineParameters model, assigned_clients is left empty.
     """
     try:
         domain = ET.fromstring(machine_xml)
@@ -463,10 +499,6 @@ def parse_machine_xml(machine_xml: str) -> MachineParameters:
         graphics_element = get_required_xml_tag(devices_el, "graphics")
         framebuffer = parse_machine_graphics(graphics_element)
 
-        assigned_clients_query = select_rows("SELECT client_uuid FROM deployed_machines_clients WHERE machine_uuid = %s", (uuid,))
-        
-        assigned_clients = {row["client_uuid"] for row in assigned_clients_query}
-        
         return MachineParameters(
             uuid=uuid,
             title=title,
@@ -480,7 +512,7 @@ def parse_machine_xml(machine_xml: str) -> MachineParameters:
             network_interfaces=network_interfaces if network_interfaces else None,
             internet_connectivity=internet_connectivity,
             framebuffer=framebuffer,
-            assigned_clients=assigned_clients
+            assigned_clients=set()
         )   
     except ValueError as e:
         raise ValueError(f"Failed to parse machine XML: {e}")
@@ -5,6 +5,7 @@ from uuid import UUID
 from .models import CreateIsoRecordArgs, IsoRecord, IsoRecordInDB
 from modules.postgresql import pool
 from modules.postgresql.simple_table_manager import SimpleTableManager
+from modules.users.models import Administrator
 from modules.users.sublibraries.administrator_library import AdministratorLibrary
 
 logger = logging.getLogger(__name__)
@@ -13,6 +14,33 @@ logger = logging.getLogger(__name__)
 def prepare_from_database_record(record: IsoRecordInDB) -> IsoRecord:
     imported_by = AdministratorLibrary.get_record_by_uuid(record.imported_by) if record.imported_by else None
     last_modified_by = AdministratorLibrary.get_record_by_uuid(record.last_modified_by) if record.last_modified_by else None
+    
+    return build_iso_record(record, imported_by, last_modified_by)
+
+async def prepare_from_database_record_async(record: IsoRecordInDB) -> IsoRecord:
+    imported_by = await AdministratorLibrary.get_record_by_uuid_async(record.imported_by) if record.imported_by else None
+    last_modified_by = await AdministratorLibrary.get_record_by_uuid_async(record.last_modified_by) if record.last_modified_by else None
+    
+    return build_iso_record(record, imported_by, last_modified_by)
+
+def prepare_from_database_records(records: list[IsoRecordInDB]) -> list[IsoRecord]:
+    administrators = AdministratorLibrary.get_all_records_matching("uuid", get_referenced_administrator_uuids(records))
+    return [build_iso_record_from_administrators(record, administrators) for record in records]
+
+async def prepare_from_database_records_async(records: list[IsoRecordInDB]) -> list[IsoRecord]:
+    administrators = await AdministratorLibrary.get_all_records_matching_async("uuid", get_referenced_administrator_uuids(records))
+    return [build_iso_record_from_administrators(record, administrators) for record in records]
+
+def get_referenced_administrator_uuids(records: list[IsoRecordInDB]) -> list[UUID]:
+    return list({uuid for record in records for uuid in (record.imported_by, record.last_modified_by) if uuid})
+
+def build_iso_record_from_administrators(record: IsoRecordInDB, administrators: dict[UUID, Administrator]) -> IsoRecord:
+    imported_by = administrators.get(record.imported_by) if record.imported_by else None
+    last_modified_by = administrators.get(record.last_modified_by) if record.last_modified_by else None
+    
+    return build_iso_record(record, imported_by, last_modified_by)
+
+def build_iso_record(record: IsoRecordInDB, imported_by: Administrator | None, last_modified_by: Administrator | None) -> IsoRecord:
     file_location = record.file_location if record.remote else None
     
     return IsoRecord(
@@ -35,4 +63,7 @@ IsoLibrary = SimpleTableManager(
     model_in_db=IsoRecordInDB,
     model_creation_args=CreateIsoRecordArgs,
     prepare_record=prepare_from_database_record,
+    prepare_record_async=prepare_from_database_record_async,
+    prepare_records=prepare_from_database_records,
+    prepare_records_async=prepare_from_database_records_async,
 )
\ No newline at end of file
@@ -11,6 +11,18 @@ def prepare_from_database_record(record: MachineTemplateInDB) -> MachineTemplate
     owner = AdministratorLibrary.get_record_by_uuid(record.owner_uuid)
     return MachineTemplate(**record.model_dump(), owner=owner)
 
+async def prepare_from_database_record_async(record: MachineTemplateInDB) -> MachineTemplate:
+    owner = await AdministratorLibrary.get_record_by_uuid_async(record.owner_uuid)
+    return MachineTemplate(**record.model_dump(), owner=owner)
+
+def prepare_from_database_records(records: list[MachineTemplateInDB]) -> list[MachineTemplate]:
+    owners = AdministratorLibrary.get_all_records_matching("uuid", list({record.owner_uuid for record in records}))
+    return [MachineTemplate(**record.model_dump(), owner=owners.get(record.owner_uuid)) for record in records]
+
+async def prepare_from_database_records_async(records: list[MachineTemplateInDB]) -> list[MachineTemplate]:
+    owners = await AdministratorLibrary.get_all_records_matching_async("uuid", list({record.owner_uuid for record in records}))
+    return [MachineTemplate(**record.model_dump(), owner=owners.get(record.owner_uuid)) for record in records]
+
 
 MachineTemplatesLibrary = SimpleTableManager(
     table_name="machine_templates",
@@ -18,6 +30,9 @@ MachineTemplatesLibrary = SimpleTableManager(
     model=MachineTemplate,
     model_in_db=MachineTemplateInDB,
     model_creation_args=CreateMachineTemplateArgs,
-    prepare_record=prepare_from_database_record
+    prepare_record=prepare_from_database_record,
+    prepare_record_async=prepare_from_database_record_async,
+    prepare_records=prepare_from_database_records,
+    prepare_records_async=prepare_from_database_records_async,
 )
 
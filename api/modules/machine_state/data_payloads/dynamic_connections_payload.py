@@ -4,7 +4,7 @@ from uuid import UUID
 from fastapi import HTTPException
 from modules.users.models import AnyUser
 from modules.machine_state.models import MachineConnectionsPayload
-from modules.machine_state.queries import check_machine_existence, check_machine_membership, get_active_connections, get_all_machine_uuids, get_user_machine_uuids
+from modules.machine_state.queries import check_machine_membership, get_active_connections, get_all_machine_uuids, get_existing_machine_uuids, get_machines_active_connections, get_user_machine_uuids
 
 
 logger = logging.getLogger(__name__)
@@ -24,17 +24,23 @@ def get_machine_connections_payload(machine_uuid: UUID, skip_membership_check: b
 def get_machine_connections_payloads_by_uuids(machine_uuids: set[UUID] | list[UUID]) -> dict[UUID, MachineConnectionsPayload]:  
     machine_states: dict[UUID, MachineConnectionsPayload] = dict()
     
-    for machine_uuid in machine_uuids.copy():
-        if check_machine_existence(machine_uuid):
-            state = None
-            try:
-                state = get_machine_connections_payload(machine_uuid, skip_membership_check=True)
-            except Exception as e:
-                logger.error(f"Exception occured when fetching machine state in get_machine_connections_payload function for machine with uuid={machine_uuid}")
-                logger.debug(pprint(e))
-                
-            if state is not None:
-                machine_states[machine_uuid] = state    
+    existing_machine_uuids = get_existing_machine_uuids(machine_uuids)
+    
+    if not existing_machine_uuids:
+        return machine_states
+    
+    try:
+        active_connections = get_machines_active_connections(list(existing_machine_uuids))
+    except Exception as e:
+        logger.error(f"Exception occured when fetching active connections of machines {existing_machine_uuids}")
+        logger.debug(pprint(e))
+        return machine_states
+    
+    for machine_uuid, connections in active_connections.items():
+        machine_states[machine_uuid] = MachineConnectionsPayload(
+            uuid = machine_uuid,
+            active_connections = connections,
+        )
             
     return machine_states
    
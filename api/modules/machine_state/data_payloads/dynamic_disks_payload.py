@@ -4,11 +4,11 @@ from uuid import UUID
 from devtools import pprint
 
 from modules.exceptions.models import RaisedException
-from modules.machine_state.queries import check_machine_existence, check_machine_membership, get_all_machine_uuids, get_user_machine_uuids
+from modules.machine_state.queries import check_machine_membership, get_all_machine_uuids, get_user_machine_uuids
 from modules.machine_state.models import MachineDisksPayload, DynamicDiskInfo
-from modules.libvirt_socket import LibvirtConnection
 from modules.users.models import AnyUser
-from modules.machine_lifecycle.xml_translator import parse_machine_xml
+from modules.machine_lifecycle.parameters_cache import MachineParametersCache
+from modules.machine_lifecycle.models import MachineParameters
 
 
 logger = logging.getLogger(__name__)
@@ -19,11 +19,10 @@ def get_machine_disks_payload(machine_uuid: UUID, skip_membership_check: bool =
     if not skip_membership_check and not check_machine_membership(machine_uuid):
         raise HTTPException(status_code=500, detail="Requested data of a machine that is not managed by Cherry VM Studio.")
     
-    with LibvirtConnection("ro") as libvirt_connection:
-        machine = libvirt_connection.lookupByUUID(machine_uuid.bytes)
-        
-    machine_parameters = parse_machine_xml(machine.XMLDesc())
-    
+    return build_machine_disks_payload(machine_uuid, MachineParametersCache.get(machine_uuid))
+
+
+def build_machine_disks_payload(machine_uuid: UUID, machine_parameters: MachineParameters) -> MachineDisksPayload:
     if machine_parameters.system_disk.uuid is None:
         raise RaisedException("Supplied an inprocessable MachineDisk model without a valid UUID!")
     
@@ -52,17 +51,12 @@ def get_machine_disks_payload(machine_uuid: UUID, skip_membership_check: bool =
 def get_machine_disks_payloads_by_uuids(machine_uuids: set[UUID] | list[UUID]) -> dict[UUID, MachineDisksPayload]:  
     machine_disk_states: dict[UUID, MachineDisksPayload] = dict()
     
-    for machine_uuid in machine_uuids.copy():
-        if check_machine_existence(machine_uuid):
-            state = None
-            try:
-                state = get_machine_disks_payload(machine_uuid, skip_membership_check=True)
-            except Exception as e:
-                logger.error(f"Exception occured when fetching machine state in get_machine_disks_payload function for machine with uuid={machine_uuid}")
-                logger.debug(pprint(e))
-                
-            if state is not None:
-                machine_disk_states[machine_uuid] = state    
+    for machine_uuid, machine_parameters in MachineParametersCache.get_many(machine_uuids).items():
+        try:
+            machine_disk_states[machine_uuid] = build_machine_disks_payload(machine_uuid, machine_parameters)
+        except Exception as e:
+            logger.error(f"Exception occured when building disks payload for machine with uuid={machine_uuid}")
+            logger.debug(pprint(e))
             
     return machine_disk_states
    
@@ -1,75 +1,81 @@
 import logging
 import libvirt
 
-
+from datetime import datetime
+from typing import Any
 from fastapi import HTTPException
 from uuid import UUID
-from devtools import pprint
 
-from modules.machine_lifecycle.xml_translator import parse_machine_xml
-from modules.machine_state.queries import check_machine_existence, check_machine_membership, get_all_machine_uuids, get_machine_boot_timestamp, get_user_machine_uuids
+from modules.machine_state.queries import check_machine_membership, get_all_machine_uuids, get_machine_boot_timestamp, get_machine_boot_timestamps, get_user_machine_uuids
 from modules.machine_state.state_management import is_vm_loading
+from modules.machine_state.domain_stats import STATE_STATS, get_all_domain_stats, get_domain_stats
 from modules.machine_state.models import MachineStatePayload
-from modules.libvirt_socket import LibvirtConnection
+from modules.machine_lifecycle.parameters_cache import MachineParametersCache
 from modules.users.models import AnyUser
 
 
 logger = logging.getLogger(__name__)
 
-
-# Returns main dynamic data of the machine.
-def get_machine_state_payload(machine_uuid: UUID, skip_membership_check: bool = False) -> MachineStatePayload:
-    if not skip_membership_check and not check_machine_membership(machine_uuid):
-        raise HTTPException(status_code=500, detail="Requested data of a machine that is not managed by Cherry VM Studio.")
-    
-    with LibvirtConnection("ro") as libvirt_connection:
-        machine = libvirt_connection.lookupByUUID(machine_uuid.bytes)
-        parsed_machine = parse_machine_xml(machine.XMLDesc())
-    
-    is_active: bool = machine.state()[0] == libvirt.VIR_DOMAIN_RUNNING
-    
-    ras_port = None
-    
-    if parsed_machine.framebuffer is not None and parsed_machine.framebuffer.port is not None:
-        ras_port = int(parsed_machine.framebuffer.port)
+def get_machine_ras_port(machine_uuid: UUID) -> int | None:
+    framebuffer = MachineParametersCache.get(machine_uuid).framebuffer
     
+    if framebuffer is not None and framebuffer.port is not None:
+        return int(framebuffer.port)
+    return None
+
+
+def build_machine_state_payload(machine_uuid: UUID, stats: dict[str, Any], boot_timestamp: datetime | None) -> MachineStatePayload:
+    is_active: bool = stats.get("state.state") == libvirt.VIR_DOMAIN_RUNNING
+
     return MachineStatePayload(
         uuid = machine_uuid,
         active = is_active,
-        loading = is_vm_loading(machine.UUID()),
-        vcpu = (machine.info()[3]),
-        ram_max = (machine.info()[1]/1024),
-        ram_used = (machine.info()[2]/1024) if is_active else 0,
-        boot_timestamp = get_machine_boot_timestamp(machine_uuid),
-        ras_port = ras_port,
+        loading = is_vm_loading(machine_uuid),
+        vcpu = stats.get("vcpu.current", 0),
+        ram_max = stats.get("balloon.maximum", 0) // 1024,
+        ram_used = (stats.get("balloon.current", 0) // 1024) if is_active else 0,
+        boot_timestamp = boot_timestamp,
+        ras_port = get_machine_ras_port(machine_uuid) if is_active else None,
     )
-    
 
-def get_machine_state_payloads_by_uuids(machine_uuids: set[UUID] | list[UUID]) -> dict[UUID, MachineStatePayload]:  
+
+# Returns main dynamic data of the machine.
+def get_machine_state_payload(machine_uuid: UUID, skip_membership_check: bool = False) -> MachineStatePayload:
+    if not skip_membership_check and not check_machine_membership(machine_uuid):
+        raise HTTPException(status_code=500, detail="Requested data of a machine that is not managed by Cherry VM Studio.")
+
+    stats = get_domain_stats(machine_uuid, STATE_STATS)
+
+    return build_machine_state_payload(machine_uuid, stats, get_machine_boot_timestamp(machine_uuid))
+
+
+# Builds state payloads of all given machines from a single getAllDomainStats call.
+# Machines not defined in libvirt are skipped.
+def get_machine_state_payloads_by_uuids(machine_uuids: set[UUID] | list[UUID]) -> dict[UUID, MachineStatePayload]:
     machine_states: dict[UUID, MachineStatePayload] = dict()
-    
-    for machine_uuid in machine_uuids.copy():
-        if check_machine_existence(machine_uuid):
-            state = None
-            try:
-                state = get_machine_state_payload(machine_uuid, skip_membership_check=True)
-            except Exception as e:
-                logger.error(f"Exception occured when fetching machine state in get_machine_state_payload function for machine with uuid={machine_uuid}")
-                logger.debug(pprint(e))
-                
-            if state is not None:
-                machine_states[machine_uuid] = state    
-            
+
+    if not machine_uuids:
+        return machine_states
+
+    domain_stats = get_all_domain_stats(STATE_STATS, machine_uuids)
+    boot_timestamps = get_machine_boot_timestamps(list(domain_stats.keys()))
+
+    for machine_uuid, stats in domain_stats.items():
+        try:
+            machine_states[machine_uuid] = build_machine_state_payload(machine_uuid, stats, boot_timestamps.get(machine_uuid))
+        except Exception:
+            logger.exception(f"Exception occured when building machine state payload for machine with uuid={machine_uuid}")
+
     return machine_states
-   
-    
+
+
 # Returns main dynamic machine data for all machines owned and assigned to an account.
 def get_user_machine_state_payloads(user: AnyUser) -> dict[UUID, MachineStatePayload]:
     machine_uuids = get_user_machine_uuids(user)
     return get_machine_state_payloads_by_uuids(machine_uuids)
-    
-    
+
+
 # Returns main dynamic machine data for all machines managed by the Cherry VM Studio.
 def get_all_machine_state_payloads() -> dict[UUID, MachineStatePayload]:
     machine_uuids = get_all_machine_uuids()
-    return get_machine_state_payloads_by_uuids(machine_uuids)
\ No newline at end of file
+    return get_machine_state_payloads_by_uuids(machine_uuids)
@@ -1,14 +1,16 @@
 import logging
 
 from fastapi import HTTPException
+from typing import Literal
 from uuid import UUID
 from devtools import pprint
 
-from modules.machine_state.queries import check_machine_existence, check_machine_membership, get_machine_assigned_clients, get_machine_connections, get_machine_owner, get_user_machine_uuids
+from modules.machine_state.queries import check_machine_membership, get_machine_assigned_clients, get_machines_assigned_clients, get_machine_connections, get_machines_connections, get_machine_owner, get_machines_owners, get_user_machine_uuids
 from modules.machine_state.models import MachinePropertiesPayload, StaticDiskInfo
 from modules.libvirt_socket import LibvirtConnection
-from modules.users.models import AnyUser
-from modules.machine_lifecycle.xml_translator import parse_machine_xml
+from modules.users.models import Administrator, AnyUser, Client
+from modules.machine_lifecycle.parameters_cache import MachineParametersCache
+from modules.machine_lifecycle.models import MachineParameters
 
 logger = logging.getLogger(__name__)
 
@@ -17,9 +19,22 @@ def get_machine_properties_payload(machine_uuid: UUID, skip_membership_check: bo
     if not skip_membership_check and not check_machine_membership(machine_uuid):
         raise HTTPException(status_code=500, detail="Requested data of a machine that is not managed by Cherry VM Studio.")
     
-    with LibvirtConnection("ro") as libvirt_connection:
-        parsed_machine = parse_machine_xml(libvirt_connection.lookupByUUID(machine_uuid.bytes).XMLDesc())
+    return build_machine_properties_payload(
+        machine_uuid, 
+        MachineParametersCache.get(machine_uuid), 
+        get_machine_owner(machine_uuid), 
+        get_machine_assigned_clients(machine_uuid), 
+        get_machine_connections(machine_uuid)
+    )
+
 
+def build_machine_properties_payload(
+    machine_uuid: UUID, 
+    parsed_machine: MachineParameters, 
+    owner: Administrator | None, 
+    assigned_clients: dict[UUID, Client], 
+    connections: dict[Literal["ssh", "rdp", "vnc"], str]
+) -> MachinePropertiesPayload:
     machine_disks = [StaticDiskInfo(system=True, name=parsed_machine.system_disk.name, size_bytes=parsed_machine.system_disk.size, type=parsed_machine.system_disk.type)]
     
     if parsed_machine.additional_disks:
@@ -30,26 +45,39 @@ def get_machine_properties_payload(machine_uuid: UUID, skip_membership_check: bo
         title = parsed_machine.title,
         tags = [machine_metadata.value for machine_metadata in parsed_machine.metadata] if parsed_machine.metadata is not None else None,
         description = parsed_machine.description,
-        owner = get_machine_owner(machine_uuid),
-        assigned_clients = get_machine_assigned_clients(machine_uuid),
+        owner = owner,
+        assigned_clients = assigned_clients,
         disks = machine_disks,
-        connections = get_machine_connections(machine_uuid)
+        connections = connections
     )
    
     
 def get_machine_properties_payloads_by_uuids(machine_uuids: set[UUID] | list[UUID]) -> dict[UUID, MachinePropertiesPayload]: 
     machine_properties: dict[UUID, MachinePropertiesPayload] = dict()
     
-    for machine_uuid in machine_uuids.copy():
-        if check_machine_existence(machine_uuid):
-            properties = None
-            try:
-                properties = get_machine_properties_payload(machine_uuid, skip_membership_check=True)
-            except Exception as e:
-                logger.error(f"Exception occured when fetching machine state in get_machine_properties_payload function for machine with uuid={machine_uuid}")
-                logger.debug(pprint(e))
-            if properties is not None:
-                machine_properties[machine_uuid] = properties    
+    machines_parameters = MachineParametersCache.get_many(machine_uuids)
+    
+    if not machines_parameters:
+        return machine_properties
+    
+    # Owners, clients and connections of all machines are loaded in a constant number of queries
+    loaded_machine_uuids = list(machines_parameters.keys())
+    machines_owners = get_machines_owners(loaded_machine_uuids)
+    machines_assigned_clients = get_machines_assigned_clients(loaded_machine_uuids)
+    machines_connections = get_machines_connections(loaded_machine_uuids)
+    
+    for machine_uuid, parsed_machine in machines_parameters.items():
+        try:
+            machine_properties[machine_uuid] = build_machine_properties_payload(
+                machine_uuid, 
+                parsed_machine, 
+                machines_owners.get(machine_uuid), 
+                machines_assigned_clients[machine_uuid], 
+                machines_connections[machine_uuid]
+            )
+        except Exception as e:
+            logger.error(f"Exception occured when building properties payload for machine with uuid={machine_uuid}")
+            logger.debug(pprint(e))
             
     return machine_properties
     
@@ -0,0 +1,44 @@
+import libvirt
+import logging
+
+from uuid import UUID
+from typing import Any, Iterable
+
+from modules.libvirt_socket import LibvirtConnection
+
+logger = logging.getLogger(__name__)
+
+# Stats groups needed to build MachineStatePayload
+STATE_STATS = libvirt.VIR_DOMAIN_STATS_STATE | libvirt.VIR_DOMAIN_STATS_BALLOON | libvirt.VIR_DOMAIN_STATS_VCPU
+
+
+def get_all_domain_stats(stats: int, machine_uuids: Iterable[UUID] | None = None) -> dict[UUID, dict[str, Any]]:
+    """
+    Collects the requested stats groups of every domain on the host with a single getAllDomainStats call.
+    When machine_uuids is given, only stats of these machines are returned.
+    """
+    wanted = set(machine_uuids) if machine_uuids is not None else None
+    
+    with LibvirtConnection("ro") as libvirt_connection:
+        records = libvirt_connection.getAllDomainStats(stats)
+    
+    domain_stats: dict[UUID, dict[str, Any]] = {}
+    
+    for domain, record in records:
+        # virDomainGetUUID is resolved locally, no additional RPC
+        uuid = UUID(bytes=domain.UUID())
+        if wanted is None or uuid in wanted:
+            domain_stats[uuid] = record
+    
+    return domain_stats
+
+
+def get_domain_stats(machine_uuid: UUID, stats: int) -> dict[str, Any]:
+    """
+    Collects the requested stats groups of a single domain.
+    """
+    with LibvirtConnection("ro") as libvirt_connection:
+        machine = libvirt_connection.lookupByUUID(machine_uuid.bytes)
+        records = libvirt_connection.domainListGetStats([machine], stats)
+    
+    return records[0][1] if records else {}
@@ -4,10 +4,10 @@ from uuid import UUID
 from datetime import datetime
 
 from modules.libvirt_socket import LibvirtConnection
-from modules.authentication.validation import encode_guacamole_connection_string
+from modules.authentication.validation import encode_guacamole_connection_id
 from modules.users.permissions import is_admin, is_client
-from modules.postgresql.simple_select import select_single_field
-from modules.users.models import Administrator, AnyUser, Client
+from modules.postgresql.simple_select import select_rows, select_rows_async, select_single_field
+from modules.users.models import Administrator, AdministratorInDB, AnyUser, Client, ClientInDB
 from modules.users.sublibraries.administrator_library import AdministratorLibrary
 from modules.users.sublibraries.client_library import ClientLibrary
 from config import ENV_CONFIG
@@ -50,6 +50,60 @@ def get_machine_assigned_clients(machine_uuid: UUID) -> dict[UUID, Client]:
     
     return ClientLibrary.get_all_records_matching("uuid", assigned_client_uuids)
 
+def get_machines_owners(machine_uuids: list[UUID]) -> dict[UUID, Administrator]:
+    """
+    Loads owners of all given machines together with their roles in a single query.
+    """
+    rows = select_rows("""
+        SELECT 
+            deployed_machines_owners.machine_uuid, 
+            administrators.*,
+            COALESCE(array_agg(roles.uuid) FILTER (WHERE roles.uuid IS NOT NULL), '{}') AS role_uuids,
+            COALESCE(bit_or(roles.permissions), 0) AS role_permissions
+        FROM deployed_machines_owners
+        JOIN administrators ON administrators.uuid = deployed_machines_owners.owner_uuid
+        LEFT JOIN administrators_roles ON administrators_roles.administrator_uuid = administrators.uuid
+        LEFT JOIN roles ON roles.uuid = administrators_roles.role_uuid
+        WHERE deployed_machines_owners.machine_uuid = ANY(%s)
+        GROUP BY deployed_machines_owners.machine_uuid, administrators.uuid
+    """, (list(machine_uuids),))
+    
+    owners: dict[UUID, Administrator] = {}
+    
+    for row in rows:
+        owner = Administrator.model_validate(AdministratorInDB.model_validate(row).model_dump())
+        owner.roles = list(row["role_uuids"])
+        owner.permissions |= row["role_permissions"]
+        owners[row["machine_uuid"]] = owner
+    
+    return owners
+
+
+def get_machines_assigned_clients(machine_uuids: list[UUID]) -> dict[UUID, dict[UUID, Client]]:
+    """
+    Loads clients assigned to all given machines together with their groups in a single query.
+    """
+    rows = select_rows("""
+        SELECT 
+            deployed_machines_clients.machine_uuid, 
+            clients.*,
+            COALESCE(array_agg(clients_groups.group_uuid) FILTER (WHERE clients_groups.group_uuid IS NOT NULL), '{}') AS group_uuids
+        FROM deployed_machines_clients
+        JOIN clients ON clients.uuid = deployed_machines_clients.client_uuid
+        LEFT JOIN clients_groups ON clients_groups.client_uuid = clients.uuid
+        WHERE deployed_machines_clients.machine_uuid = ANY(%s)
+        GROUP BY deployed_machines_clients.machine_uuid, clients.uuid
+    """, (list(machine_uuids),))
+    
+    assigned_clients: dict[UUID, dict[UUID, Client]] = {machine_uuid: {} for machine_uuid in machine_uuids}
+    
+    for row in rows:
+        client = Client.model_validate(ClientInDB.model_validate(row).model_dump())
+        client.groups = list(row["group_uuids"])
+        assigned_clients[row["machine_uuid"]][client.uuid] = client
+    
+    return assigned_clients
+
 # Get combined list of uuids of owner + assigned_clients to the machine
 def get_machine_linked_account_uuids(machine_uuid: UUID) -> list[UUID]:
     owner_uuid = get_machine_owner_uuid(machine_uuid)
@@ -66,6 +120,24 @@ def get_client_machine_uuids(client: Client) -> list[UUID]:
     return select_single_field("machine_uuid", "SELECT DISTINCT machine_uuid FROM deployed_machines_clients WHERE client_uuid = %s", (client.uuid,))
 
 
+async def get_accounts_machine_uuids_async(account_uuids: set[UUID] | list[UUID]) -> dict[UUID, set[UUID]]:
+    """
+    Builds an index of machines accessible by each of the given accounts (owned or assigned) in a single query.
+    """
+    rows = await select_rows_async("""
+        SELECT owner_uuid AS account_uuid, machine_uuid FROM deployed_machines_owners WHERE owner_uuid = ANY(%(accounts)s)
+        UNION
+        SELECT client_uuid AS account_uuid, machine_uuid FROM deployed_machines_clients WHERE client_uuid = ANY(%(accounts)s)
+    """, {"accounts": list(account_uuids)})
+    
+    accounts_machine_uuids: dict[UUID, set[UUID]] = {account_uuid: set() for account_uuid in account_uuids}
+    
+    for row in rows:
+        accounts_machine_uuids[row["account_uuid"]].add(row["machine_uuid"])
+    
+    return accounts_machine_uuids
+
+
 def get_all_machine_uuids() -> list[UUID]:
     return select_single_field("machine_uuid", "SELECT DISTINCT machine_uuid FROM deployed_machines_owners")
 
@@ -94,22 +166,43 @@ def check_machine_access(machine_uuid: UUID, user: AnyUser) -> bool:
 
 def get_active_connections(machine_uuid: UUID) -> list[UUID]:
     
-    # Either <machine_uuid>_rdp or <machine_uuid>_vnc
-    regex_pattern = f"^{machine_uuid}_(vnc|rdp)$"
-    
+    # Either the machine's rdp or vnc connection
     select_connected_uuids = """
         SELECT DISTINCT gch.username 
         FROM guacamole_connection_history gch
-        JOIN guacamole_connection gc ON gch.connection_id = gc.connection_id
-        WHERE gc.connection_name ~ %s
+        JOIN machine_connections mc ON gch.connection_id = mc.connection_id
+        WHERE mc.machine_uuid = %s
+        AND mc.protocol IN ('vnc', 'rdp')
         AND gch.end_date IS NULL;
     """
     
-    connected_uuids = select_single_field("username", select_connected_uuids, (regex_pattern, ))
+    connected_uuids = select_single_field("username", select_connected_uuids, (machine_uuid, ))
    
     return connected_uuids
 
 
+def get_machines_active_connections(machine_uuids: list[UUID]) -> dict[UUID, list[UUID]]:
+    
+    # Either the machine's rdp or vnc connection
+    select_connected_uuids = """
+        SELECT DISTINCT mc.machine_uuid, gch.username 
+        FROM guacamole_connection_history gch
+        JOIN machine_connections mc ON gch.connection_id = mc.connection_id
+        WHERE mc.machine_uuid = ANY(%s)
+        AND mc.protocol IN ('vnc', 'rdp')
+        AND gch.end_date IS NULL;
+    """
+    
+    rows = select_rows(select_connected_uuids, (list(machine_uuids),))
+    
+    active_connections: dict[UUID, list[UUID]] = {machine_uuid: [] for machine_uuid in machine_uuids}
+    
+    for row in rows:
+        active_connections[row["machine_uuid"]].append(row["username"])
+    
+    return active_connections
+
+
 def get_machine_boot_timestamp(machine_uuid: UUID) -> datetime | None:
     select_machine_boot_timestamp = """
         SELECT started_at FROM deployed_machines_owners WHERE machine_uuid = %s;
@@ -123,20 +216,32 @@ def get_machine_boot_timestamp(machine_uuid: UUID) -> datetime | None:
     return None
 
 
-def get_machine_connections(machine_uuid: UUID) -> dict[Literal["ssh", "rdp", "vnc"], str]:
+def get_machine_boot_timestamps(machine_uuids: list[UUID]) -> dict[UUID, datetime | None]:
+    select_machine_boot_timestamps = """
+        SELECT machine_uuid, started_at FROM deployed_machines_owners WHERE machine_uuid = ANY(%s);
+    """
     
-    regex_pattern = f"^{machine_uuid}_.*$"
+    rows = select_rows(select_machine_boot_timestamps, (list(machine_uuids),))
+    
+    return {
+        row["machine_uuid"]: datetime.fromisoformat(str(row["started_at"])) if row["started_at"] is not None else None 
+        for row in rows
+    }
+
+
+def get_machine_connections(machine_uuid: UUID) -> dict[Literal["ssh", "rdp", "vnc"], str]:
     
     select_connection = """
-        SELECT protocol FROM guacamole_connection WHERE connection_name ~ %s
+        SELECT protocol, connection_id FROM machine_connections WHERE machine_uuid = %s
     """
     
-    available_protocols = select_single_field("protocol", select_connection, (regex_pattern,))
+    rows = select_rows(select_connection, (machine_uuid,))
 
     connections: dict[Literal["ssh", "rdp", "vnc"], str] = {}
     
-    for protocol in available_protocols:
-        encoded_connection_string = encode_guacamole_connection_string(machine_uuid, protocol)
+    for row in rows:
+        protocol = row["protocol"]
+        encoded_connection_string = encode_guacamole_connection_id(row["connection_id"])
         # connections[protocol] = f"https://session.{ENV_CONFIG.DOMAIN_NAME}/{protocol}/{machine_uuid}"
         connections[protocol] = f"http://{ENV_CONFIG.DOMAIN_NAME}/guacamole/#/client/{encoded_connection_string}"
         
@@ -144,6 +249,27 @@ def get_machine_connections(machine_uuid: UUID) -> dict[Literal["ssh", "rdp", "v
     return connections
 
 
+def get_machines_connections(machine_uuids: list[UUID]) -> dict[UUID, dict[Literal["ssh", "rdp", "vnc"], str]]:
+    """
+    Builds guacamole connection links of all given machines from a single query.
+    """
+    select_connections = """
+        SELECT machine_uuid, protocol, connection_id 
+        FROM machine_connections 
+        WHERE machine_uuid = ANY(%s)
+    """
+    
+    rows = select_rows(select_connections, (list(machine_uuids),))
+    
+    connections: dict[UUID, dict[Literal["ssh", "rdp", "vnc"], str]] = {machine_uuid: {} for machine_uuid in machine_uuids}
+    
+    for row in rows:
+        encoded_connection_string = encode_guacamole_connection_id(row["connection_id"])
+        connections[row["machine_uuid"]][row["protocol"]] = f"http://{ENV_CONFIG.DOMAIN_NAME}/guacamole/#/client/{encoded_connection_string}"
+    
+    return connections
+
+
 def check_machine_membership(machine_uuid: UUID) -> bool:
     query_uuid_in_db = select_single_field("machine_uuid", "SELECT machine_uuid FROM deployed_machines_owners WHERE machine_uuid = %s", (machine_uuid, ))
     
@@ -157,6 +283,16 @@ def check_machine_membership(machine_uuid: UUID) -> bool:
     return machine_uuid == machine_uuid_in_db
 
 
+def get_existing_machine_uuids(machine_uuids: set[UUID] | list[UUID]) -> set[UUID]:
+    """
+    Filters the given machines down to the ones defined in libvirt with a single listAllDomains call.
+    """
+    with LibvirtConnection("ro") as libvirt_readonly_connection:
+        defined_uuids = {UUID(bytes=machine.UUID()) for machine in libvirt_readonly_connection.listAllDomains(0)}
+    
+    return defined_uuids.intersection(machine_uuids)
+
+
 def check_machine_existence(uuid: UUID) -> bool:  
     with LibvirtConnection("ro") as libvirt_readonly_connection:
         return libvirt_readonly_connection.lookupByUUID(uuid.bytes) is not None
@@ -0,0 +1,275 @@
+import asyncio
+import logging
+import libvirt
+import libvirtaio
+
+from uuid import UUID
+from typing import Callable, Iterable
+
+from config.libvirt_config import LIBVIRT_CONFIG
+from config.machines_config import MACHINES_CONFIG
+from modules.libvirt_socket import LibvirtConnection, LibvirtExecutor
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["MachineStateCache"]
+
+###############################
+#   lifecycle event mapping
+###############################
+# Domain state a machine ends up in after a given lifecycle event.
+# VIR_DOMAIN_EVENT_DEFINED and VIR_DOMAIN_EVENT_UNDEFINED are handled separately.
+LIFECYCLE_EVENT_STATES = {
+    libvirt.VIR_DOMAIN_EVENT_STARTED: libvirt.VIR_DOMAIN_RUNNING,
+    libvirt.VIR_DOMAIN_EVENT_SUSPENDED: libvirt.VIR_DOMAIN_PAUSED,
+    libvirt.VIR_DOMAIN_EVENT_RESUMED: libvirt.VIR_DOMAIN_RUNNING,
+    libvirt.VIR_DOMAIN_EVENT_STOPPED: libvirt.VIR_DOMAIN_SHUTOFF,
+    libvirt.VIR_DOMAIN_EVENT_SHUTDOWN: libvirt.VIR_DOMAIN_SHUTDOWN,
+    libvirt.VIR_DOMAIN_EVENT_PMSUSPENDED: libvirt.VIR_DOMAIN_PMSUSPENDED,
+    libvirt.VIR_DOMAIN_EVENT_CRASHED: libvirt.VIR_DOMAIN_CRASHED,
+}
+
+_event_loop_registered = False
+
+def register_event_loop():
+    """
+    Registers the asyncio libvirt event loop implementation.
+    Has to happen before any connection that should receive events or keepalives is opened.
+    """
+    global _event_loop_registered
+
+    if not _event_loop_registered:
+        libvirtaio.virEventRegisterAsyncIOImpl(loop=asyncio.get_running_loop())
+        _event_loop_registered = True
+
+
+###############################
+#   state cache
+###############################
+class _MachineStateCache():
+    """
+    In-memory map of machine UUID to libvirt domain state, kept up to date by domain lifecycle events.
+    Every transition bumps the machine's generation and wakes up coroutines waiting for it.
+    """
+    def __init__(self):
+        self.uri = LIBVIRT_CONFIG.hypervisor_uri
+        self.active = False
+
+        self._states: dict[UUID, int] = {}
+        self._generations: dict[UUID, int] = {}
+        self._waiters: dict[UUID, set[asyncio.Future]] = {}
+        self._definition_listeners: list[Callable[[UUID | None], None]] = []
+
+        self._connection: libvirt.virConnect | None = None
+        self._callback_ids: list[int] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._reconnect_task: asyncio.Task | None = None
+
+    async def start(self, uri: str = LIBVIRT_CONFIG.hypervisor_uri):
+        self.uri = uri
+        self._loop = asyncio.get_running_loop()
+        register_event_loop()
+
+        try:
+            await self._connect()
+        except Exception:
+            logger.exception(f"Failed to subscribe to libvirt lifecycle events on {self.uri}, retrying in the background.")
+            self._schedule_reconnect()
+
+    async def stop(self):
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+
+        self.active = False
+        connection, callback_ids = self._connection, self._callback_ids
+        self._connection, self._callback_ids = None, []
+
+        if connection is not None:
+            await asyncio.to_thread(self._disconnect, connection, callback_ids)
+
+    def get_state(self, uuid: UUID) -> int | None:
+        """
+        Returns the cached domain state. None means the machine is not defined.
+        While the event subscription is down the last known state is served, all states are resynchronized on reconnect.
+        """
+        return self._states.get(uuid)
+
+    def get_states(self) -> dict[UUID, int]:
+        return dict(self._states)
+
+    def get_generation(self, uuid: UUID) -> int:
+        return self._generations.get(uuid, 0)
+
+    def add_definition_listener(self, listener: Callable[[UUID | None], None]):
+        """
+        Registers a callback run whenever the domain XML of a machine may have changed
+        (lifecycle transitions, definitions, device hot(un)plug). None means any machine may have changed.
+        """
+        self._definition_listeners.append(listener)
+
+    async def wait_for_state(self, uuid: UUID, states: Iterable[int], since: int, timeout: float) -> int | None:
+        """
+        Waits until the machine transitions into one of the given states after the given generation.
+        Returns the reached state or None if the timeout was exceeded.
+        """
+        states = set(states)
+
+        try:
+            async with asyncio.timeout(timeout):
+                while True:
+                    if not self.active:
+                        await self._refresh(uuid)
+
+                    if self.get_generation(uuid) > since and self._states.get(uuid) in states:
+                        return self._states[uuid]
+
+                    future = asyncio.get_running_loop().create_future()
+                    self._waiters.setdefault(uuid, set()).add(future)
+
+                    try:
+                        if self.active:
+                            await future
+                        else:
+                            # events are not delivered while reconnecting, fall back to periodic checks
+                            await asyncio.wait({future}, timeout=MACHINES_CONFIG.vm_state_poll_interval)
+                    finally:
+                        self._waiters.get(uuid, set()).discard(future)
+        except TimeoutError:
+            return None
+
+    def _set_state(self, uuid: UUID, state: int | None):
+        if state is None:
+            self._states.pop(uuid, None)
+        else:
+            self._states[uuid] = state
+
+        self._generations[uuid] = self._generations.get(uuid, 0) + 1
+
+        for future in self._waiters.pop(uuid, set()):
+            if not future.done():
+                future.set_result(state)
+
+    def _notify_definition_listeners(self, uuid: UUID | None):
+        for listener in self._definition_listeners:
+            try:
+                listener(uuid)
+            except Exception:
+                logger.exception(f"Definition listener {listener} failed for machine {uuid}.")
+
+    async def _refresh(self, uuid: UUID):
+        try:
+            state = await LibvirtExecutor.run(self._lookup_state, uuid)
+        except Exception as e:
+            # libvirt unreachable - keep the last known state until the next poll
+            logger.debug(f"Failed to look up the state of machine {uuid}: {e!r}")
+            return
+
+        if state != self._states.get(uuid):
+            self._set_state(uuid, state)
+
+    @staticmethod
+    def _lookup_state(uuid: UUID) -> int | None:
+        try:
+            with LibvirtConnection("ro") as libvirt_connection:
+                state, _ = libvirt_connection.lookupByUUID(uuid.bytes).state()
+                return state
+        except libvirt.libvirtError:
+            return None
+
+    ###############################
+    #   event subscription
+    ###############################
+    async def _connect(self):
+        generations = dict(self._generations)
+        connection, callback_ids, states = await asyncio.to_thread(self._subscribe)
+
+        # machines that changed state while the domain list was fetched keep their event-sourced state
+        for uuid in set(self._states) - set(states):
+            if self._generations.get(uuid) == generations.get(uuid):
+                self._set_state(uuid, None)
+        for uuid, state in states.items():
+            if self._generations.get(uuid) == generations.get(uuid) and self._states.get(uuid) != state:
+                self._set_state(uuid, state)
+
+        self._connection, self._callback_ids = connection, callback_ids
+        self.active = True
+        # events might have been missed while disconnected
+        self._notify_definition_listeners(None)
+        logger.info(f"Subscribed to libvirt lifecycle events on {self.uri}, tracking {len(self._states)} machines.")
+
+    def _subscribe(self) -> tuple[libvirt.virConnect, list[int], dict[UUID, int]]:
+        connection = libvirt.openReadOnly(self.uri)
+
+        try:
+            connection.setKeepAlive(LIBVIRT_CONFIG.keepalive_interval, LIBVIRT_CONFIG.keepalive_count)
+            connection.registerCloseCallback(self._on_connection_closed, None)
+            callback_ids = [
+                connection.domainEventRegisterAny(None, libvirt.VIR_DOMAIN_EVENT_ID_LIFECYCLE, self._on_lifecycle_event, None),
+                connection.domainEventRegisterAny(None, libvirt.VIR_DOMAIN_EVENT_ID_DEVICE_ADDED, self._on_device_event, None),
+                connection.domainEventRegisterAny(None, libvirt.VIR_DOMAIN_EVENT_ID_DEVICE_REMOVED, self._on_device_event, None),
+            ]
+
+            states = {UUID(domain.UUIDString()): domain.state()[0] for domain in connection.listAllDomains(0)}
+        except libvirt.libvirtError:
+            connection.close()
+            raise
+
+        return connection, callback_ids, states
+
+    @staticmethod
+    def _disconnect(connection: libvirt.virConnect, callback_ids: list[int]):
+        try:
+            for callback_id in callback_ids:
+                connection.domainEventDeregisterAny(callback_id)
+            connection.unregisterCloseCallback()
+            connection.close()
+        except libvirt.libvirtError as e:
+            logger.debug(repr(e))
+
+    def _schedule_reconnect(self):
+        if self._loop is None or (self._reconnect_task is not None and not self._reconnect_task.done()):
+            return
+        self._reconnect_task = self._loop.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        connection, callback_ids = self._connection, self._callback_ids
+        self._connection, self._callback_ids = None, []
+
+        if connection is not None:
+            await asyncio.to_thread(self._disconnect, connection, callback_ids)
+
+        while True:
+            await asyncio.sleep(LIBVIRT_CONFIG.event_reconnect_interval)
+            try:
+                await self._connect()
+                return
+            except Exception as e:
+                logger.warning(f"Failed to resubscribe to libvirt lifecycle events on {self.uri}: {e}")
+
+    def _on_lifecycle_event(self, connection: libvirt.virConnect, domain: libvirt.virDomain, event: int, detail: int, opaque):
+        uuid = UUID(domain.UUIDString())
+        self._notify_definition_listeners(uuid)
+
+        match event:
+            case libvirt.VIR_DOMAIN_EVENT_UNDEFINED:
+                self._set_state(uuid, None)
+            case libvirt.VIR_DOMAIN_EVENT_DEFINED:
+                # redefinitions of already known machines (e.g. device changes) do not change the run state
+                if uuid not in self._states:
+                    self._set_state(uuid, libvirt.VIR_DOMAIN_SHUTOFF)
+            case _ if event in LIFECYCLE_EVENT_STATES:
+                self._set_state(uuid, LIFECYCLE_EVENT_STATES[event])
+
+    def _on_device_event(self, connection: libvirt.virConnect, domain: libvirt.virDomain, device_alias: str, opaque):
+        self._notify_definition_listeners(UUID(domain.UUIDString()))
+
+    def _on_connection_closed(self, connection: libvirt.virConnect, reason: int, opaque):
+        logger.warning(f"Libvirt event connection to {self.uri} closed (reason {reason}), reconnecting.")
+        self.active = False
+
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._schedule_reconnect)
+
+
+MachineStateCache = _MachineStateCache()
@@ -1,10 +1,12 @@
 import logging
 import libvirt
 import asyncio
+import time
 
 from uuid import UUID
 
-from modules.libvirt_socket import LibvirtConnection
+from modules.libvirt_socket import LibvirtExecutor
+from modules.machine_state.state_cache import MachineStateCache
 from modules.postgresql.main import async_pool
 from config.machines_config import MACHINES_CONFIG
 from modules.machine_lifecycle.networks import get_machine_framebuffer_port
@@ -18,28 +20,36 @@ ERROR_STATES = [libvirt.VIR_DOMAIN_SHUTOFF, libvirt.VIR_DOMAIN_CRASHED]
 
 vm_tasks: dict[UUID, asyncio.Task] = {}
 
-async def wait_for_machine_state(machine):
+# Machines being started or stopped by any API worker, maintained from the cluster-wide websocket events.
+# Marks expire in case the worker performing the operation went away before reporting its result.
+cluster_vm_operations: dict[UUID, float] = {}
+
+def mark_vm_operation(uuid: UUID):
+    cluster_vm_operations[uuid] = time.monotonic()
+
+def clear_vm_operation(uuid: UUID):
+    cluster_vm_operations.pop(uuid, None)
+
+def is_vm_operation_pending(uuid: UUID) -> bool:
+    marked_at = cluster_vm_operations.get(uuid)
+    return marked_at is not None and time.monotonic() - marked_at < 2 * MACHINES_CONFIG.vm_state_wait_timeout
+
+async def wait_for_machine_state(uuid: UUID, since: int):
     """
-    Every state_poll_interval checks for VM state after starting it.
+    Awaits the first state transition of the machine after the given state cache generation.
     
     Returns:
         - 'running' if machine started succesfully,
         - 'error' if error state,
         - 'unknown' if timeout exceeded,
     """
-    async def poll_state():
-        while True:
-            state, _ = machine.state() #Unpacking only the 'state' part of the tuple, machine.state() called periodically returns the state() dynamically - machine is a reference not a static object with properties set during the connection lookup time
-            if state == libvirt.VIR_DOMAIN_RUNNING:
-                return 'running'
-            elif state in ERROR_STATES:
-                return 'error'
-            await asyncio.sleep(MACHINES_CONFIG.vm_state_poll_interval)
+    state = await MachineStateCache.wait_for_state(uuid, [libvirt.VIR_DOMAIN_RUNNING, *ERROR_STATES], since, MACHINES_CONFIG.vm_state_wait_timeout)
     
-    try:
-        return await asyncio.wait_for(poll_state(), MACHINES_CONFIG.vm_state_wait_timeout)
-    except asyncio.TimeoutError:
-        return 'unknown'
+    if state == libvirt.VIR_DOMAIN_RUNNING:
+        return 'running'
+    elif state in ERROR_STATES:
+        return 'error'
+    return 'unknown'
     
     
 ###############################
@@ -50,58 +60,54 @@ async def start_machine_async(uuid: UUID):
     Final async wrapper - starting VM and waiting for state feedback
     """
     
-    with LibvirtConnection("rw") as libvirt_read_write_connection:
-        try:
-            machine = libvirt_read_write_connection.lookupByUUID(uuid.bytes) 
-            logging.debug(f"Trying to start {machine}")
-            machine.create()
-            result = await wait_for_machine_state(machine)   
-                
-        except libvirt.libvirtError as e:
-            logging.error(f"Failed to start VM: {e}")
-            raise libvirt.libvirtError(str(e))
-        
-        if result == "running":
+    try:
+        logging.debug(f"Trying to start {uuid}")
+        since = MachineStateCache.get_generation(uuid)
+        await LibvirtExecutor.domain_call("rw", uuid, "create")
+        result = await wait_for_machine_state(uuid, since)   
+            
+    except libvirt.libvirtError as e:
+        logging.error(f"Failed to start VM: {e}")
+        raise libvirt.libvirtError(str(e))
+    
+    if result == "running":
 
-            update_boot_timestamp = """
-                UPDATE deployed_machines_owners
-                SET started_at = LOCALTIMESTAMP
-                WHERE machine_uuid = %s
-            """
+        update_boot_timestamp = """
+            UPDATE deployed_machines_owners
+            SET started_at = LOCALTIMESTAMP
+            WHERE machine_uuid = %s
+        """
 
-            framebuffer_port = get_machine_framebuffer_port(uuid)
-            
-            select_guacamole_connection_id = """
-                SELECT connection_id FROM guacamole_connection WHERE connection_name ~ %s;
-            """
-            
-            # Either <machine_uuid>_rdp or <machine_uuid>_vnc
-            regex_pattern = f"^{uuid}_(vnc|rdp)$"
-            
-            update_guacamole_connection_parameter = """
-                UPDATE guacamole_connection_parameter 
-                SET parameter_value = %s 
-                WHERE parameter_name = %s AND connection_id = %s;
-            """
-            
-            async with async_pool.connection() as connection:
-                async with connection.cursor() as cursor:
-                    async with connection.transaction():
-                        try:
-                            await cursor.execute(update_boot_timestamp, (uuid,))
-                            
-                            # Find connection_id associated with machine's rdp/vnc connection
-                            await cursor.execute(select_guacamole_connection_id, (regex_pattern,))
-                            result = await cursor.fetchone()
-                            
-                            if result:
-                                connection_id = result["connection_id"]
-                                await cursor.execute(update_guacamole_connection_parameter, (framebuffer_port, "port", connection_id))
-                            else:
-                                raise Exception(f"Failed to retrieve connection_id from guacamole_connection for {uuid}.")
-                        except Exception:
-                            logger.exception(f"Failed to update {uuid} connection parameters - port {framebuffer_port}.")
+        framebuffer_port = await LibvirtExecutor.run(get_machine_framebuffer_port, uuid)
+        
+        select_guacamole_connection_id = """
+            SELECT connection_id FROM machine_connections WHERE machine_uuid = %s AND protocol IN ('vnc', 'rdp');
+        """
         
+        update_guacamole_connection_parameter = """
+            UPDATE guacamole_connection_parameter 
+            SET parameter_value = %s 
+            WHERE parameter_name = %s AND connection_id = %s;
+        """
+        
+        async with async_pool.connection() as connection:
+            async with connection.cursor() as cursor:
+                async with connection.transaction():
+                    try:
+                        await cursor.execute(update_boot_timestamp, (uuid,))
+                        
+                        # Find connection_id associated with machine's rdp/vnc connection
+                        await cursor.execute(select_guacamole_connection_id, (uuid,))
+                        result = await cursor.fetchone()
+                        
+                        if result:
+                            connection_id = result["connection_id"]
+                            await cursor.execute(update_guacamole_connection_parameter, (framebuffer_port, "port", connection_id))
+                        else:
+                            raise Exception(f"Failed to retrieve connection_id from guacamole_connection for {uuid}.")
+                    except Exception:
+                        logger.exception(f"Failed to update {uuid} connection parameters - port {framebuffer_port}.")
+    
     return result
 
 
@@ -141,31 +147,31 @@ async def stop_machine_async(uuid: UUID):
      Final async wrapper - stopping VM and waiting for state feedback
     """
 
-    with LibvirtConnection("rw") as libvirt_read_write_connection:
-        try:
-            machine = libvirt_read_write_connection.lookupByUUID(uuid.bytes) 
-            
-            for FLAG in SHUTDOWN_FLAGS:
-                try:
-                    logging.debug(f"Trying to stop {machine} with {FLAG}")
-                    machine.shutdownFlags(FLAG)
-                    result = await wait_for_machine_state(machine)
-                    
-                    if result in ERROR_STATES:
-                        return result
-                    continue
-                
-                except libvirt.libvirtError as e:
-                    logging.error(f"Failed to stop VM with flag {FLAG}: {e}")
-                    continue
+    try:
+        for FLAG in SHUTDOWN_FLAGS:
+            try:
+                logging.debug(f"Trying to stop {uuid} with {FLAG}")
+                since = MachineStateCache.get_generation(uuid)
+                await LibvirtExecutor.domain_call("rw", uuid, "shutdownFlags", FLAG)
+                result = await wait_for_machine_state(uuid, since)
                 
+                # shut off machines end up in one of the error states
+                if result == 'error':
+                    break
+                continue
+            
+            except libvirt.libvirtError as e:
+                logging.error(f"Failed to stop VM with flag {FLAG}: {e}")
+                continue
+        else:
             logging.warning("Failed to stop VM gracefully. Forcing destroy.")
-            machine.destroy()
-            result = await wait_for_machine_state(machine)
-             
-        except libvirt.libvirtError as e:
-            logging.error(f"Failed to stop VM: {e}")
-            raise libvirt.libvirtError(str(e))
+            since = MachineStateCache.get_generation(uuid)
+            await LibvirtExecutor.domain_call("rw", uuid, "destroy")
+            result = await wait_for_machine_state(uuid, since)
+         
+    except libvirt.libvirtError as e:
+        logging.error(f"Failed to stop VM: {e}")
+        raise libvirt.libvirtError(str(e))
     
     update_boot_timestamp = """
         UPDATE deployed_machines_owners
@@ -174,11 +180,8 @@ async def stop_machine_async(uuid: UUID):
     """
     
     select_guacamole_connection_id = """
-        SELECT connection_id FROM guacamole_connection WHERE connection_name ~ %s;
+        SELECT connection_id FROM machine_connections WHERE machine_uuid = %s AND protocol IN ('vnc', 'rdp');
     """
-
-    # Either <machine_uuid>_rdp or <machine_uuid>_vnc
-    regex_pattern = f"^{uuid}_(vnc|rdp)$"
         
     update_guacamole_connection_parameter = """
         UPDATE guacamole_connection_parameter 
@@ -193,7 +196,7 @@ async def stop_machine_async(uuid: UUID):
                     await cursor.execute(update_boot_timestamp, (uuid,))
                     
                     # Find connection_id associated with machine's rdp/vnc connection
-                    await cursor.execute(select_guacamole_connection_id, (regex_pattern,))
+                    await cursor.execute(select_guacamole_connection_id, (uuid,))
                     result = await cursor.fetchone()
                     
                     if result:
@@ -229,13 +232,7 @@ async def stop_machine(uuid: UUID):
 # ! to be moved to data_retrieval.py when we stop depending on the task list
 def is_vm_loading(uuid: UUID) -> bool:
     task = vm_tasks.get(uuid)
-    return task is not None and not task.done()
+    return (task is not None and not task.done()) or is_vm_operation_pending(uuid) or MachineStateCache.get_state(uuid) == libvirt.VIR_DOMAIN_SHUTDOWN
 
 def is_vm_running(uuid: UUID) -> bool:
-    with LibvirtConnection("ro") as libvirt_connection:
-        machine = libvirt_connection.lookupByUUID(uuid.bytes)
-        state, _ = machine.state()
-        if state == libvirt.VIR_DOMAIN_RUNNING:
-            return True
-        else:
-            return False
\ No newline at end of file
+    return MachineStateCache.get_state(uuid) == libvirt.VIR_DOMAIN_RUNNING
\ No newline at end of file
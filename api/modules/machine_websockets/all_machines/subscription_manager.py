@@ -2,23 +2,42 @@ import logging
 from uuid import UUID
 from pydantic import BaseModel, ConfigDict, Field
 from starlette.websockets import WebSocket
+from modules.machine_websockets.event_journal import EventJournal
+from modules.machine_websockets.state_deltas import MachineStateDeltas
+from modules.websockets.broadcast_scheduler import BroadcastScheduler
 
 logger = logging.getLogger(__name__)
 
+# all websockets share a single view of all machines
+JOURNAL_TOPIC = "all_machines"
+
 
 class SubscriptionManager(BaseModel):
     subscriptions: dict[int, WebSocket] = Field(default_factory=dict)
+    state_deltas: MachineStateDeltas = Field(default_factory=MachineStateDeltas)
+    journal: EventJournal[str] = Field(default_factory=EventJournal)
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
     
     def subscribe(self, websocket: WebSocket):
         websocket_id = id(websocket)
         self.subscriptions[websocket_id] = websocket
+        self.journal.track(JOURNAL_TOPIC)
+        BroadcastScheduler.refresh()
+        
+    def is_idle(self) -> bool:
+        """
+        True if events have neither websockets to be sent to nor journal topics to be recorded for.
+        """
+        return not self.subscriptions and not self.journal.has_topics()
         
     def unsubscribe(self, websocket: WebSocket):
-        websocket_id = id(websocket)
-        del self.subscriptions[websocket_id]
+        self.remove_subscriptions_by_keys([id(websocket)])
         
     def remove_subscriptions_by_keys(self, keys: list[int]):
         for key in keys:
-            self.subscriptions.pop(key, None)
\ No newline at end of file
+            self.subscriptions.pop(key, None)
+            self.state_deltas.discard(key)
+            
+        if not self.subscriptions:
+            self.journal.release(JOURNAL_TOPIC)
\ No newline at end of file
@@ -8,7 +8,8 @@ from modules.machine_state.data_payloads.dynamic_connections_payload import get_
 from modules.machine_state.data_payloads.dynamic_disks_payload import get_all_machine_disks_payloads
 from modules.machine_state.data_payloads.dynamic_state_payload import get_all_machine_state_payloads
 from modules.machine_state.data_payloads.static_properties_payload import get_all_machine_properties_payloads
-from modules.machine_websockets.all_machines.subscription_manager import SubscriptionManager
+from modules.machine_websockets.all_machines.subscription_manager import JOURNAL_TOPIC, SubscriptionManager
+from modules.libvirt_socket import LibvirtExecutor
 from modules.machine_websockets.machine_websocket_messanger import MachineWebSocketMessanger
 from modules.users.permissions import has_permissions
 from config.permissions_config import PERMISSIONS
@@ -34,7 +35,7 @@ class AllMachinesWebsocketHandler(WebSocketHandler):
             logging.exception(f"Unhandled expection within websocket {self.websocket}.")
     
     @override
-    async def accept(self, access_token):
+    async def accept(self, access_token: str, last_seq: int | None = None, epoch: str | None = None):
         await super().accept(access_token)
 
         if self.user is None or not has_permissions(self.user, PERMISSIONS.VIEW_ALL_VMS):
@@ -44,39 +45,44 @@ class AllMachinesWebsocketHandler(WebSocketHandler):
             return
 
         self.subscription_manager.subscribe(self.websocket)
-        await self.__send_messages_on_connect__()
+        await self.__send_messages_on_connect__(last_seq, epoch)
 
-    async def __send_messages_on_connect__(self):
+    async def __send_messages_on_connect__(self, last_seq: int | None, epoch: str | None):
         if self.user is None:
             return
         
-        try:
-            properties_payload = get_all_machine_properties_payloads()
-            await machine_websocket_messanger.send_data_static(self.websocket, properties_payload)
-        except WebSocketDisconnect:
-            pass
-        except Exception as e:
-            logging.error("Failed to send STATIC PROPERTIES payload for machines accessed globaly by user %s over websocket: %s", self.user.uuid, e, exc_info=True)
+        events = self.subscription_manager.journal.replay(JOURNAL_TOPIC, epoch, last_seq)
+        machine_websocket_messanger.send_sync(self.websocket, events)
+        
+        # missed events were replayed, the static properties the client holds are up to date
+        if events is None:
+            try:
+                properties_payload = await LibvirtExecutor.run(get_all_machine_properties_payloads)
+                machine_websocket_messanger.send_data_static(self.websocket, properties_payload)
+            except WebSocketDisconnect:
+                pass
+            except Exception as e:
+                logging.error("Failed to send STATIC PROPERTIES payload for machines accessed globaly by user %s over websocket: %s", self.user.uuid, e, exc_info=True)
 
         try:
-            state_payload = get_all_machine_state_payloads()
-            await machine_websocket_messanger.send_data_dynamic(self.websocket, state_payload)
+            state_payload = await LibvirtExecutor.run(get_all_machine_state_payloads)
+            self.subscription_manager.state_deltas.send_keyframe([self.websocket], state_payload)
         except WebSocketDisconnect:
             pass
         except Exception as e:
             logging.error("Failed to send DYNAMIC STATE payload for machines accessed globaly by user %s over websocket: %s", self.user.uuid, e, exc_info=True)
 
         try:
-            disks_payload = get_all_machine_disks_payloads()
-            await machine_websocket_messanger.send_data_dynamic_disks(self.websocket, disks_payload)
+            disks_payload = await LibvirtExecutor.run(get_all_machine_disks_payloads)
+            machine_websocket_messanger.send_data_dynamic_disks(self.websocket, disks_payload)
         except WebSocketDisconnect:
             pass
         except Exception as e:
             logging.error("Failed to send DYNAMIC DISKS payload for machines accessed globaly by user %s over websocket: %s", self.user.uuid, e,exc_info=True)
             
         try:
-            connections_payload = get_all_machine_connections_payloads()
-            await machine_websocket_messanger.send_data_dynamic_connections(self.websocket, connections_payload)
+            connections_payload = await LibvirtExecutor.run(get_all_machine_connections_payloads)
+            machine_websocket_messanger.send_data_dynamic_connections(self.websocket, connections_payload)
         except WebSocketDisconnect:
             pass
         except Exception as e:
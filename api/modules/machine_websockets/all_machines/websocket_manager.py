@@ -1,6 +1,5 @@
-import asyncio
 import logging
-from typing import Awaitable, Callable, Literal, TypeVar
+from typing import Callable, TypeVar
 from uuid import UUID
 
 from fastapi import HTTPException, WebSocket, WebSocketDisconnect
@@ -10,13 +9,13 @@ from pydantic import BaseModel
 from modules.users.models import AnyUser
 from modules.users.users import UsersManager
 from modules.machine_state.queries import  get_machine_linked_account_uuids
-from config.websockets_config import WEBSOCKETS_CONFIG
-from modules.machine_state.data_payloads.dynamic_connections_payload import get_all_machine_connections_payloads, get_machine_connections_payload, get_user_machine_connections_payloads
-from modules.machine_state.data_payloads.dynamic_disks_payload import get_all_machine_disks_payloads, get_machine_disks_payload, get_machine_disks_payloads_by_uuids, get_user_machine_disks_payloads
-from modules.machine_state.data_payloads.dynamic_state_payload import get_all_machine_state_payloads, get_machine_state_payload, get_user_machine_state_payloads
-from modules.machine_state.data_payloads.static_properties_payload import get_machine_properties_payload
+from modules.machine_state.models import MachineConnectionsPayload, MachineDisksPayload, MachineStatePayload
+from modules.machine_state.data_payloads.static_properties_payload import get_machine_properties_payload, get_machine_properties_payloads_by_uuids
+from modules.libvirt_socket import LibvirtExecutor
 from modules.machine_websockets.machine_websocket_messanger import MachineWebSocketMessanger
-from .subscription_manager import SubscriptionManager
+from modules.machine_websockets.broadcast_topics import MACHINE_CONNECTIONS_TOPIC, MACHINE_DISKS_TOPIC, MACHINE_STATES_TOPIC, MachinePayloadsSnapshot
+from modules.websockets.broadcast_scheduler import BroadcastScheduler
+from .subscription_manager import JOURNAL_TOPIC, SubscriptionManager
 
 T = TypeVar("T", bound=BaseModel)
 
@@ -26,30 +25,29 @@ machine_websocket_messanger = MachineWebSocketMessanger()
 
 class AllMachinesWebsocketManager:
     subscription_manager = SubscriptionManager()
-    _broadcast_flags: dict[Literal["states", "disks", "connections"], bool] = {}
-    _broadcast_tasks: dict[Literal["states", "disks", "connections"], asyncio.Task] = {}
     
     
     """ Prepares and sends approperiate payload for each websocket."""
-    """ payload_retriever - callback for a function retrieving the payload from the machine uuid."""
-    """ payload_sender - callback for a function sending the payload through the provided websocket."""
+    """ snapshot - payloads of the current broadcast tick, shared with the other managers."""
+    """ payload_sender - callback for a function sending the payload through all provided websockets."""
     async def __broadcast_machine_payload__(
         self,
-        payload_retriever: Callable[[], dict[UUID, T]],
-        payload_sender: Callable[[WebSocket, dict[UUID, T]], Awaitable[None]],
+        snapshot: MachinePayloadsSnapshot[T],
+        payload_sender: Callable[[list[WebSocket], dict[UUID, T]], None],
     ):
         dead_subscriptions = []
-        payload = payload_retriever()
+        websockets = []
         
         for key, ws in self.subscription_manager.subscriptions.items():
             if ws.application_state != WebSocketState.CONNECTED or ws.client_state != WebSocketState.CONNECTED:
                 dead_subscriptions.append(key)
                 continue
-
+            
+            websockets.append(ws)
+            
+        if websockets:
             try:
-                await payload_sender(ws, payload)
-            except (WebSocketDisconnect, HTTPException,  RuntimeError) as e:
-                dead_subscriptions.append(key)
+                payload_sender(websockets, await snapshot.get_all())
             except Exception as e:
                 logger.error("Unexpected error while broadcasting payload of machines globally: %s", e, exc_info=True)
 
@@ -57,116 +55,102 @@ class AllMachinesWebsocketManager:
             self.subscription_manager.remove_subscriptions_by_keys(dead_subscriptions)
            
     """ Sends machine states data for each websocket based on the subscriptions. """            
-    async def __broadcast_machine_states__(self):
+    async def __broadcast_machine_states__(self, snapshot: MachinePayloadsSnapshot[MachineStatePayload]):
         await self.__broadcast_machine_payload__(
-            payload_retriever=get_all_machine_state_payloads, 
-            payload_sender=machine_websocket_messanger.send_data_dynamic
+            snapshot=snapshot, 
+            payload_sender=self.subscription_manager.state_deltas.send
         )
         
     """ Sends machine disks data for each websocket based on the subscriptions. """                
-    async def __broadcast_machine_disks__(self):
+    async def __broadcast_machine_disks__(self, snapshot: MachinePayloadsSnapshot[MachineDisksPayload]):
         await self.__broadcast_machine_payload__(
-            payload_retriever=get_all_machine_disks_payloads, 
+            snapshot=snapshot, 
             payload_sender=machine_websocket_messanger.send_data_dynamic_disks
         )
         
     """ Sends machine connections data for each websocket based on the subscriptions. """     
-    async def __broadcast_machine_connections__(self):
+    async def __broadcast_machine_connections__(self, snapshot: MachinePayloadsSnapshot[MachineConnectionsPayload]):
         await self.__broadcast_machine_payload__(
-            payload_retriever=get_all_machine_connections_payloads, 
+            snapshot=snapshot, 
             payload_sender=machine_websocket_messanger.send_data_dynamic_connections
         )
         
-    """ Starts a continous broadcast for provided payload type (name). """     
-    async def _run_continuous_broadcast(self, name: Literal["states", "disks", "connections"], callback: Callable[[], Awaitable[None]], intervalInSeconds: int):
-        if self._broadcast_flags.get(name):
-            return  # already running
-        
-        self._broadcast_flags[name] = True
-        
-        while self._broadcast_flags.get(name):
-            try: 
-                await callback()
-            except Exception:
-                logger.exception(f"Exception occured during '{name}' broadcast in the UserMachinesWebsocketManager.")
-            await asyncio.sleep(intervalInSeconds)
-    
-    """ Starts all the broadcasts using intervals from the config. """
+    """ Registers the broadcasts in the scheduler, they only run while there are subscribed websockets. """
     def start_broadcasts(self):
-        self._broadcast_tasks["states"] = asyncio.create_task(
-            self._run_continuous_broadcast("states", self.__broadcast_machine_states__, WEBSOCKETS_CONFIG.state_broadcast_interval)
-        )
-        self._broadcast_tasks["disks"] = asyncio.create_task(
-            self._run_continuous_broadcast("disks", self.__broadcast_machine_disks__, WEBSOCKETS_CONFIG.disks_broadcast_interval)
-        )
-        self._broadcast_tasks["connections"] = asyncio.create_task(
-            self._run_continuous_broadcast("connections", self.__broadcast_machine_connections__, WEBSOCKETS_CONFIG.connections_broadcast_interval)
-        )
+        has_subscribers = lambda: bool(self.subscription_manager.subscriptions)
+        
+        BroadcastScheduler.add_consumer(MACHINE_STATES_TOPIC, "all_machines", self.__broadcast_machine_states__, has_subscribers)
+        BroadcastScheduler.add_consumer(MACHINE_DISKS_TOPIC, "all_machines", self.__broadcast_machine_disks__, has_subscribers)
+        BroadcastScheduler.add_consumer(MACHINE_CONNECTIONS_TOPIC, "all_machines", self.__broadcast_machine_connections__, has_subscribers)
         
     """ Stops all the broadcasts """
     def stop_broadcasts(self):
-        self._broadcast_flags["states"] = False
-        self._broadcast_flags["disks"] = False
-        self._broadcast_flags["connections"] = False
+        BroadcastScheduler.remove_consumer(MACHINE_STATES_TOPIC, "all_machines")
+        BroadcastScheduler.remove_consumer(MACHINE_DISKS_TOPIC, "all_machines")
+        BroadcastScheduler.remove_consumer(MACHINE_CONNECTIONS_TOPIC, "all_machines")
+        
+    """ Records the event in the journal of the all machines view. """
+    def __recorder__(self):
+        return self.subscription_manager.journal.recorder([JOURNAL_TOPIC])
         
     """ Sends newly created machine data for all websockets subscribed to a relevant account. """
-    def on_machine_create(self, machine_uuid: UUID):
-        machine_properties_payload = get_machine_properties_payload(machine_uuid)
+    async def on_machine_create(self, machine_uuid: UUID):
+        if self.subscription_manager.is_idle():
+            return
+        
+        machine_properties_payload = await LibvirtExecutor.run(get_machine_properties_payload, machine_uuid)
 
-        for websocket in self.subscription_manager.subscriptions.values():
-            asyncio.create_task(machine_websocket_messanger.send_create(websocket, machine_properties_payload))
+        machine_websocket_messanger.send_create(self.subscription_manager.subscriptions.values(), machine_properties_payload, self.__recorder__())
+        self.subscription_manager.state_deltas.request_keyframe(self.subscription_manager.subscriptions.values())
         
     """ Sends deletion message on relevant machine deletion. """
     def on_machine_delete(self, machine_uuid: UUID):       
-        for websocket in self.subscription_manager.subscriptions.values():
-            asyncio.create_task(machine_websocket_messanger.send_delete(websocket, machine_uuid))
+        machine_websocket_messanger.send_delete(self.subscription_manager.subscriptions.values(), machine_uuid, self.__recorder__())
        
+    """ Sends data of machines created in bulk in a single message, the properties are built in one batched pass. """
+    async def on_machines_create(self, machine_uuids: list[UUID]):
+        if self.subscription_manager.is_idle():
+            return
+        
+        machine_properties_payloads = await LibvirtExecutor.run(get_machine_properties_payloads_by_uuids, machine_uuids)
+        
+        if machine_properties_payloads:
+            machine_websocket_messanger.send_create_many(self.subscription_manager.subscriptions.values(), machine_properties_payloads, self.__recorder__())
+            self.subscription_manager.state_deltas.request_keyframe(self.subscription_manager.subscriptions.values())
+        
     """ Sends updated machine properties (static data) to all websockets subscribed to a relevant account. """
-    def on_machine_modify(self, machine_uuid: UUID):
-        machine_properties_payload = get_machine_properties_payload(machine_uuid)
+    async def on_machine_modify(self, machine_uuid: UUID):
+        if self.subscription_manager.is_idle():
+            return
+        
+        machine_properties_payload = await LibvirtExecutor.run(get_machine_properties_payload, machine_uuid)
         
-        for websocket in self.subscription_manager.subscriptions.values():
-            asyncio.create_task(machine_websocket_messanger.send_data_static(websocket, {machine_uuid: machine_properties_payload}))
+        machine_websocket_messanger.send_data_static(self.subscription_manager.subscriptions.values(), {machine_uuid: machine_properties_payload}, self.__recorder__())
+        self.subscription_manager.state_deltas.request_keyframe(self.subscription_manager.subscriptions.values())
         
         
     def on_machine_bootup_start(self, machine_uuid: UUID):      
-        for websocket in self.subscription_manager.subscriptions.values():
-            asyncio.create_task(machine_websocket_messanger.send_bootup_start(websocket, machine_uuid))
+        machine_websocket_messanger.send_bootup_start(self.subscription_manager.subscriptions.values(), machine_uuid, self.__recorder__())
     
     
     def on_machine_bootup_success(self, machine_uuid: UUID):
-        for websocket in self.subscription_manager.subscriptions.values():
-            asyncio.create_task(
-                machine_websocket_messanger.send_bootup_success(websocket, machine_uuid)
-            )
+        machine_websocket_messanger.send_bootup_success(self.subscription_manager.subscriptions.values(), machine_uuid, self.__recorder__())
 
 
     def on_machine_bootup_fail(self, machine_uuid: UUID, error: str):
-        for websocket in self.subscription_manager.subscriptions.values():
-            asyncio.create_task(
-                machine_websocket_messanger.send_bootup_fail(websocket, machine_uuid, error)
-            )
+        machine_websocket_messanger.send_bootup_fail(self.subscription_manager.subscriptions.values(), machine_uuid, error, self.__recorder__())
 
 
     def on_machine_shutdown_start(self, machine_uuid: UUID):
-        for websocket in self.subscription_manager.subscriptions.values():
-            asyncio.create_task(
-                machine_websocket_messanger.send_shutdown_start(websocket, machine_uuid)
-            )
+        machine_websocket_messanger.send_shutdown_start(self.subscription_manager.subscriptions.values(), machine_uuid, self.__recorder__())
 
 
     def on_machine_shutdown_success(self, machine_uuid: UUID):
-        for websocket in self.subscription_manager.subscriptions.values():
-            asyncio.create_task(
-                machine_websocket_messanger.send_shutdown_success(websocket, machine_uuid)
-            )
+        machine_websocket_messanger.send_shutdown_success(self.subscription_manager.subscriptions.values(), machine_uuid, self.__recorder__())
 
 
     def on_machine_shutdown_fail(self, machine_uuid: UUID, error: str):
-        for websocket in self.subscription_manager.subscriptions.values():
-            asyncio.create_task(
-                machine_websocket_messanger.send_shutdown_fail(websocket, machine_uuid, error)
-            )
+        machine_websocket_messanger.send_shutdown_fail(self.subscription_manager.subscriptions.values(), machine_uuid, error, self.__recorder__())
 
 
     
\ No newline at end of file
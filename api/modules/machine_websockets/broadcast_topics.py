@@ -0,0 +1,99 @@
+import json
+import logging
+from typing import Callable, Generic, Iterable, TypeVar
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from config.websockets_config import WEBSOCKETS_CONFIG
+from modules.machine_state.models import MachineConnectionsPayload, MachineDisksPayload, MachineStatePayload
+from modules.machine_state.queries import get_all_machine_uuids
+from modules.machine_state.data_payloads.dynamic_connections_payload import get_machine_connections_payloads_by_uuids
+from modules.machine_state.data_payloads.dynamic_disks_payload import get_machine_disks_payloads_by_uuids
+from modules.machine_state.data_payloads.dynamic_state_payload import get_machine_state_payloads_by_uuids
+from modules.libvirt_socket import LibvirtExecutor
+from modules.websockets.broadcast_scheduler import BroadcastScheduler
+
+T = TypeVar("T", bound=BaseModel)
+
+logger = logging.getLogger(__name__)
+
+MACHINE_STATES_TOPIC = "machine_states"
+MACHINE_DISKS_TOPIC = "machine_disks"
+MACHINE_CONNECTIONS_TOPIC = "machine_connections"
+
+
+class MachinePayloadsSnapshot(Generic[T]):
+    """
+    Payloads of a single broadcast tick shared by all websocket managers consuming the topic.
+    Each machine is retrieved at most once per tick, by whichever manager asks for it first.
+    Payloads are retrieved on the libvirt executor, the event loop keeps serving other websockets meanwhile.
+    """
+    def __init__(self, payload_retriever: Callable[[list[UUID]], dict[UUID, T]]):
+        self._payload_retriever = payload_retriever
+        self._payloads: dict[UUID, T] = {}
+        self._retrieved: set[UUID] = set()
+        self._complete = False
+
+    @classmethod
+    def from_payloads(cls, payloads: dict[UUID, T]) -> "MachinePayloadsSnapshot[T]":
+        """
+        Snapshot of payloads produced by another worker - nothing is retrieved locally.
+        """
+        snapshot = cls(lambda machine_uuids: {})
+        snapshot._payloads = payloads
+        snapshot._complete = True
+        return snapshot
+
+    async def get_many(self, machine_uuids: Iterable[UUID]) -> dict[UUID, T]:
+        machine_uuids = set(machine_uuids)
+        missing = machine_uuids - self._retrieved
+
+        if missing:
+            self._payloads.update(await LibvirtExecutor.run(self._payload_retriever, list(missing)))
+            self._retrieved |= missing
+
+        return {machine_uuid: self._payloads[machine_uuid] for machine_uuid in machine_uuids if machine_uuid in self._payloads}
+
+    async def get_all(self) -> dict[UUID, T]:
+        if not self._complete:
+            await self.get_many(await LibvirtExecutor.run(get_all_machine_uuids))
+            self._complete = True
+        return dict(self._payloads)
+
+
+async def encode_machine_payloads_snapshot(snapshot: MachinePayloadsSnapshot) -> str:
+    return json.dumps({str(machine_uuid): payload.model_dump(mode="json") for machine_uuid, payload in (await snapshot.get_all()).items()})
+
+
+def machine_payloads_snapshot_decoder(model: type[T]) -> Callable[[str], MachinePayloadsSnapshot[T]]:
+    def decode(data: str) -> MachinePayloadsSnapshot[T]:
+        return MachinePayloadsSnapshot.from_payloads({UUID(machine_uuid): model.model_validate(payload) for machine_uuid, payload in json.loads(data).items()})
+    return decode
+
+
+def register_machine_broadcast_topics():
+    BroadcastScheduler.register_topic(
+        MACHINE_STATES_TOPIC,
+        WEBSOCKETS_CONFIG.state_broadcast_interval,
+        WEBSOCKETS_CONFIG.state_broadcast_jitter,
+        lambda: MachinePayloadsSnapshot(get_machine_state_payloads_by_uuids),
+        encode_machine_payloads_snapshot,
+        machine_payloads_snapshot_decoder(MachineStatePayload),
+    )
+    BroadcastScheduler.register_topic(
+        MACHINE_DISKS_TOPIC,
+        WEBSOCKETS_CONFIG.disks_broadcast_interval,
+        WEBSOCKETS_CONFIG.disks_broadcast_jitter,
+        lambda: MachinePayloadsSnapshot(get_machine_disks_payloads_by_uuids),
+        encode_machine_payloads_snapshot,
+        machine_payloads_snapshot_decoder(MachineDisksPayload),
+    )
+    BroadcastScheduler.register_topic(
+        MACHINE_CONNECTIONS_TOPIC,
+        WEBSOCKETS_CONFIG.connections_broadcast_interval,
+        WEBSOCKETS_CONFIG.connections_broadcast_jitter,
+        lambda: MachinePayloadsSnapshot(get_machine_connections_payloads_by_uuids),
+        encode_machine_payloads_snapshot,
+        machine_payloads_snapshot_decoder(MachineConnectionsPayload),
+    )
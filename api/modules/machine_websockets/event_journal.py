@@ -0,0 +1,127 @@
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Generic, Hashable, Iterable, TypeVar
+from uuid import uuid4
+
+from cachetools import LRUCache
+
+from config.websockets_config import WEBSOCKETS_CONFIG
+from modules.machine_websockets.models import WebSocketMessage
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+
+
+class _EventSequence():
+    """
+    Sequence numbers of machine websocket events, shared by all journals of the worker.
+    The epoch identifies the worker's process - numbers of another worker or of a previous run are never replayed.
+    """
+    def __init__(self):
+        self.epoch = uuid4().hex
+        self.value = 0
+        
+    def next(self) -> int:
+        self.value += 1
+        return self.value
+    
+    
+EventSequence = _EventSequence()
+
+
+@dataclass
+class TopicBuffer:
+    # sequence number up to which the events of the topic are no longer buffered
+    floor: int
+    events: deque[WebSocketMessage] = field(default_factory=lambda: deque(maxlen=WEBSOCKETS_CONFIG.event_journal_size))
+
+
+class EventJournal(Generic[K]):
+    """
+    Ring buffers of the recent events of each topic - a view the websockets subscribe to (all machines, an account or a machine).
+    A reconnecting websocket passing its last sequence number gets the events it missed, as long as they are still buffered.
+    A topic left without subscribers is kept for event_journal_retention seconds, the replay window of its websockets, and expires afterwards.
+    As the sequence numbers only grow, a topic evicted from the journal and tracked again can't replay a stale gap.
+    """
+    def __init__(self):
+        self._buffers: LRUCache[K, TopicBuffer] = LRUCache(maxsize=WEBSOCKETS_CONFIG.event_journal_topics)
+        # topics without subscribers in the order they were released, with the time of their release
+        self._released: dict[K, float] = {}
+        
+    def has_topics(self) -> bool:
+        self._expire()
+        return len(self._buffers) > 0
+        
+    def track(self, topic: K):
+        self._expire()
+        self._released.pop(topic, None)
+        
+        if self._buffers.get(topic) is None:
+            self._buffers[topic] = TopicBuffer(floor=EventSequence.value)
+            
+    def release(self, topic: K):
+        """
+        Marks the topic as left without subscribers, it expires once its replay window has passed.
+        """
+        if topic in self._buffers:
+            self._released.pop(topic, None)
+            self._released[topic] = time.monotonic()
+            
+    def get_topics(self) -> list[K]:
+        self._expire()
+        return list(self._buffers)
+            
+    def get_tracked(self, topics: Iterable[K]) -> list[K]:
+        self._expire()
+        return [topic for topic in topics if topic in self._buffers]
+            
+    def record(self, topics: Iterable[K], message: WebSocketMessage):
+        """
+        Numbers the message and buffers it for all tracked topics, must happen before the message is serialized.
+        """
+        message.seq = EventSequence.next()
+        self._expire()
+        
+        for topic in topics:
+            buffer = self._buffers.get(topic)
+            
+            if buffer is None:
+                continue
+            
+            if len(buffer.events) == buffer.events.maxlen:
+                buffer.floor = buffer.events[0].seq or buffer.floor
+                
+            buffer.events.append(message)
+            
+    def recorder(self, topics: Iterable[K]) -> Callable[[WebSocketMessage], None]:
+        topics = list(topics)
+        return lambda message: self.record(topics, message)
+    
+    def replay(self, topic: K, epoch: str | None, last_seq: int | None) -> list[WebSocketMessage] | None:
+        """
+        Returns the events of the topic following last_seq, or None if they can't be replayed and a snapshot has to be sent.
+        """
+        buffer = self._buffers.get(topic)
+        
+        if buffer is None or last_seq is None or epoch != EventSequence.epoch:
+            return None
+        
+        if not buffer.floor <= last_seq <= EventSequence.value:
+            return None
+        
+        return [message for message in buffer.events if message.seq is not None and message.seq > last_seq]
+    
+    def _expire(self):
+        deadline = time.monotonic() - WEBSOCKETS_CONFIG.event_journal_retention
+        
+        while self._released:
+            topic, released_at = next(iter(self._released.items()))
+            
+            if released_at > deadline:
+                break
+            
+            del self._released[topic]
+            self._buffers.pop(topic, None)
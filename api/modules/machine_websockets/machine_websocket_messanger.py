@@ -1,84 +1,124 @@
 import logging
+from typing import Any, Callable, Iterable
 from uuid import UUID
 
 from fastapi import WebSocket
-from fastapi.encoders import jsonable_encoder
 from modules.machine_state.models import MachineConnectionsPayload, MachineDisksPayload, MachinePropertiesPayload, MachineStatePayload
-from .models import WebSocketMessage, WebSocketMessageBaseBody
+from modules.websockets.send_queue import WebSocketSendQueues
+from .event_journal import EventSequence
+from .models import WebSocketMessage, WebSocketMessageBaseBody, WebSocketMessageDeltaBody, WebSocketMessageSyncBody
 
 logger = logging.getLogger(__name__)
 
 class MachineWebSocketMessanger:
+    """
+    Messages are placed on the websockets' send queues, the methods return without waiting for the sockets.
+    Each message is serialized once and the same frame is queued for every recipient.
+    Events passed a recorder are numbered and kept in the event journal, so they can be replayed to resumed sessions.
+    """
     
-    async def send_create(self, ws: WebSocket, machine_properties_payload: MachinePropertiesPayload):
-        await ws.send_json(jsonable_encoder(WebSocketMessage(
+    def _enqueue(self, ws: WebSocket | Iterable[WebSocket], message: WebSocketMessage, recorder: Callable[[WebSocketMessage], None] | None = None):
+        websockets = [ws] if isinstance(ws, WebSocket) else ws
+        
+        if recorder is not None:
+            recorder(message)
+        
+        frame = message.model_dump_json()
+        
+        for websocket in websockets:
+            WebSocketSendQueues.enqueue(websocket, message.type, frame)
+    
+    def send_create(self, ws: WebSocket | Iterable[WebSocket], machine_properties_payload: MachinePropertiesPayload, recorder: Callable[[WebSocketMessage], None] | None = None):
+        self._enqueue(ws, WebSocketMessage(
             type="CREATE",
             body=machine_properties_payload
-        )))
+        ), recorder)
         
-    async def send_delete(self, ws: WebSocket, machine_uuid: UUID):
-        await ws.send_json(jsonable_encoder(WebSocketMessage(
+    def send_delete(self, ws: WebSocket | Iterable[WebSocket], machine_uuid: UUID, recorder: Callable[[WebSocketMessage], None] | None = None):
+        self._enqueue(ws, WebSocketMessage(
             type="DELETE", 
             body=WebSocketMessageBaseBody(uuid=machine_uuid)
-        )))
+        ), recorder)
         
-    async def send_data_static(self, ws: WebSocket, machine_properties_payloads: dict[UUID, MachinePropertiesPayload]):
-        await ws.send_json(jsonable_encoder(WebSocketMessage(
+    def send_create_many(self, ws: WebSocket | Iterable[WebSocket], machine_properties_payloads: dict[UUID, MachinePropertiesPayload], recorder: Callable[[WebSocketMessage], None] | None = None):
+        self._enqueue(ws, WebSocketMessage(
+            type="CREATE_MANY",
+            body=machine_properties_payloads
+        ), recorder)
+        
+    def send_sync(self, ws: WebSocket | Iterable[WebSocket], events: list[WebSocketMessage] | None):
+        """
+        Opens a session - with the events missed since the client's last sequence number,
+        or with resumed=False if they are unavailable and the snapshot follows.
+        """
+        self._enqueue(ws, WebSocketMessage(
+            type="SYNC",
+            body=WebSocketMessageSyncBody(epoch=EventSequence.epoch, seq=EventSequence.value, resumed=events is not None, events=events or [])
+        ))
+        
+    def send_data_static(self, ws: WebSocket | Iterable[WebSocket], machine_properties_payloads: dict[UUID, MachinePropertiesPayload], recorder: Callable[[WebSocketMessage], None] | None = None):
+        self._enqueue(ws, WebSocketMessage(
             type="DATA_STATIC",
             body=machine_properties_payloads
-        )))
+        ), recorder)
         
-    async def send_data_dynamic(self, ws: WebSocket, machine_state_payloads: dict[UUID, MachineStatePayload]):
-        await ws.send_json(jsonable_encoder(WebSocketMessage(
+    def send_data_dynamic(self, ws: WebSocket | Iterable[WebSocket], machine_state_payloads: dict[UUID, MachineStatePayload]):
+        self._enqueue(ws, WebSocketMessage(
             type="DATA_DYNAMIC",
             body=machine_state_payloads
-        )))
+        ))
+        
+    def send_data_dynamic_delta(self, ws: WebSocket | Iterable[WebSocket], changed: dict[UUID, dict[str, Any]], removed: list[UUID]):
+        self._enqueue(ws, WebSocketMessage(
+            type="DATA_DYNAMIC_DELTA",
+            body=WebSocketMessageDeltaBody(changed=changed, removed=removed)
+        ))
         
-    async def send_data_dynamic_disks(self, ws: WebSocket, machine_disk_payloads: dict[UUID, MachineDisksPayload]):
-        await ws.send_json(jsonable_encoder(WebSocketMessage(
+    def send_data_dynamic_disks(self, ws: WebSocket | Iterable[WebSocket], machine_disk_payloads: dict[UUID, MachineDisksPayload]):
+        self._enqueue(ws, WebSocketMessage(
             type="DATA_DYNAMIC_DISKS",
             body=machine_disk_payloads
-        )))
+        ))
         
-    async def send_data_dynamic_connections(self, ws: WebSocket, machine_connections_payloads: dict[UUID, MachineConnectionsPayload]):
-        await ws.send_json(jsonable_encoder(WebSocketMessage(
+    def send_data_dynamic_connections(self, ws: WebSocket | Iterable[WebSocket], machine_connections_payloads: dict[UUID, MachineConnectionsPayload]):
+        self._enqueue(ws, WebSocketMessage(
             type="DATA_DYNAMIC_CONNECTIONS",
             body=machine_connections_payloads
-        )))
+        ))
         
-    async def send_bootup_start(self, ws: WebSocket, machine_uuid: UUID):
-        await ws.send_json(jsonable_encoder(WebSocketMessage(
+    def send_bootup_start(self, ws: WebSocket | Iterable[WebSocket], machine_uuid: UUID, recorder: Callable[[WebSocketMessage], None] | None = None):
+        self._enqueue(ws, WebSocketMessage(
             type="BOOTUP_START",
             body=WebSocketMessageBaseBody(uuid=machine_uuid)
-        )))
+        ), recorder)
 
-    async def send_bootup_success(self, ws: WebSocket, machine_uuid: UUID):
-        await ws.send_json(jsonable_encoder(WebSocketMessage(
+    def send_bootup_success(self, ws: WebSocket | Iterable[WebSocket], machine_uuid: UUID, recorder: Callable[[WebSocketMessage], None] | None = None):
+        self._enqueue(ws, WebSocketMessage(
             type="BOOTUP_SUCCESS",
             body=WebSocketMessageBaseBody(uuid=machine_uuid)
-        )))
+        ), recorder)
 
-    async def send_bootup_fail(self, ws: WebSocket, machine_uuid: UUID, error: str):
-        await ws.send_json(jsonable_encoder(WebSocketMessage(
+    def send_bootup_fail(self, ws: WebSocket | Iterable[WebSocket], machine_uuid: UUID, error: str, recorder: Callable[[WebSocketMessage], None] | None = None):
+        self._enqueue(ws, WebSocketMessage(
             type="BOOTUP_FAIL",
             body=WebSocketMessageBaseBody(uuid=machine_uuid, error=error)
-        )))
+        ), recorder)
 
-    async def send_shutdown_start(self, ws: WebSocket, machine_uuid: UUID):
-        await ws.send_json(jsonable_encoder(WebSocketMessage(
+    def send_shutdown_start(self, ws: WebSocket | Iterable[WebSocket], machine_uuid: UUID, recorder: Callable[[WebSocketMessage], None] | None = None):
+        self._enqueue(ws, WebSocketMessage(
             type="SHUTDOWN_START",
             body=WebSocketMessageBaseBody(uuid=machine_uuid)
-        )))
+        ), recorder)
 
-    async def send_shutdown_success(self, ws: WebSocket, machine_uuid: UUID):
-        await ws.send_json(jsonable_encoder(WebSocketMessage(
+    def send_shutdown_success(self, ws: WebSocket | Iterable[WebSocket], machine_uuid: UUID, recorder: Callable[[WebSocketMessage], None] | None = None):
+        self._enqueue(ws, WebSocketMessage(
             type="SHUTDOWN_SUCCESS",
             body=WebSocketMessageBaseBody(uuid=machine_uuid)
-        )))
+        ), recorder)
 
-    async def send_shutdown_fail(self, ws: WebSocket, machine_uuid: UUID, error: str):
-        await ws.send_json(jsonable_encoder(WebSocketMessage(
+    def send_shutdown_fail(self, ws: WebSocket | Iterable[WebSocket], machine_uuid: UUID, error: str, recorder: Callable[[WebSocketMessage], None] | None = None):
+        self._enqueue(ws, WebSocketMessage(
             type="SHUTDOWN_FAIL",
             body=WebSocketMessageBaseBody(uuid=machine_uuid, error=error)
-        )))
+        ), recorder)
 
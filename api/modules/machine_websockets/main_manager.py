@@ -4,6 +4,10 @@ from uuid import UUID
 from .all_machines.websocket_manager import AllMachinesWebsocketManager
 from .user_machines.websocket_manager import UserMachinesWebsocketManager
 from .subscribed_machine.websocket_manager import SubscribedMachineWebsocketsManager
+from .broadcast_topics import register_machine_broadcast_topics
+from modules.websockets.broadcast_scheduler import BroadcastScheduler
+from modules.websockets.cluster_bus import ClusterBus
+from modules.machine_state.state_management import mark_vm_operation, clear_vm_operation
 
 
 @dataclass(frozen=True)
@@ -23,61 +27,125 @@ class _MainMachineWebsocketManager:
         return self._all_machines_websocket_manager
     
     def start_all_broadcasts(self):
+        register_machine_broadcast_topics()
         self._subscribed_machine_websocket_manager.start_broadcasts()
         self._user_machines_websocket_manager.start_broadcasts()
         self._all_machines_websocket_manager.start_broadcasts()
+        BroadcastScheduler.start()
         
     def stop_all_broadcasts(self):
+        BroadcastScheduler.stop()
         self._subscribed_machine_websocket_manager.stop_broadcasts()
         self._user_machines_websocket_manager.stop_broadcasts()
         self._all_machines_websocket_manager.stop_broadcasts()
         
+    ###############################
+    #   cluster-wide events
+    ###############################
+    # Events are published to every API worker, each worker fans them out to its own websockets.
     def on_machine_create(self, machine_uuid: UUID):
-        self._user_machines_websocket_manager.on_machine_create(machine_uuid)
-        self._all_machines_websocket_manager.on_machine_create(machine_uuid)
+        ClusterBus.publish_event("machine_create", machine_uuid)
         
     def on_machine_delete(self, machine_uuid: UUID, machine_linked_account_uuids: list[UUID]):
+        ClusterBus.publish_event("machine_delete", machine_uuid, machine_linked_account_uuids)
+        
+    def on_machine_modify(self, machine_uuid: UUID):
+        ClusterBus.publish_event("machine_modify", machine_uuid)
+        
+    def on_machines_create(self, machine_uuids: list[UUID]):
+        ClusterBus.publish_event("machines_create", machine_uuids)
+
+    def on_machine_bootup_start(self, machine_uuid: UUID):
+        ClusterBus.publish_event("machine_bootup_start", machine_uuid)
+
+    def on_machine_bootup_success(self, machine_uuid: UUID):
+        ClusterBus.publish_event("machine_bootup_success", machine_uuid)
+
+    def on_machine_bootup_fail(self, machine_uuid: UUID, error: str):
+        ClusterBus.publish_event("machine_bootup_fail", machine_uuid, error)
+
+    def on_machine_shutdown_start(self, machine_uuid: UUID):
+        ClusterBus.publish_event("machine_shutdown_start", machine_uuid)
+
+    def on_machine_shutdown_success(self, machine_uuid: UUID):
+        ClusterBus.publish_event("machine_shutdown_success", machine_uuid)
+
+    def on_machine_shutdown_fail(self, machine_uuid: UUID, error: str):
+        ClusterBus.publish_event("machine_shutdown_fail", machine_uuid, error)
+        
+    def __post_init__(self):
+        ClusterBus.add_event_handler("machine_create", lambda machine_uuid: self._fan_out_machine_create(UUID(machine_uuid)))
+        ClusterBus.add_event_handler("machine_delete", lambda machine_uuid, account_uuids: self._fan_out_machine_delete(UUID(machine_uuid), [UUID(account_uuid) for account_uuid in account_uuids]))
+        ClusterBus.add_event_handler("machine_modify", lambda machine_uuid: self._fan_out_machine_modify(UUID(machine_uuid)))
+        ClusterBus.add_event_handler("machines_create", lambda machine_uuids: self._fan_out_machines_create([UUID(machine_uuid) for machine_uuid in machine_uuids]))
+        ClusterBus.add_event_handler("machine_bootup_start", lambda machine_uuid: self._fan_out_machine_bootup_start(UUID(machine_uuid)))
+        ClusterBus.add_event_handler("machine_bootup_success", lambda machine_uuid: self._fan_out_machine_bootup_success(UUID(machine_uuid)))
+        ClusterBus.add_event_handler("machine_bootup_fail", lambda machine_uuid, error: self._fan_out_machine_bootup_fail(UUID(machine_uuid), error))
+        ClusterBus.add_event_handler("machine_shutdown_start", lambda machine_uuid: self._fan_out_machine_shutdown_start(UUID(machine_uuid)))
+        ClusterBus.add_event_handler("machine_shutdown_success", lambda machine_uuid: self._fan_out_machine_shutdown_success(UUID(machine_uuid)))
+        ClusterBus.add_event_handler("machine_shutdown_fail", lambda machine_uuid, error: self._fan_out_machine_shutdown_fail(UUID(machine_uuid), error))
+
+    ###############################
+    #   local fan-out
+    ###############################
+    async def _fan_out_machine_create(self, machine_uuid: UUID):
+        await self._user_machines_websocket_manager.on_machine_create(machine_uuid)
+        await self._all_machines_websocket_manager.on_machine_create(machine_uuid)
+        
+    def _fan_out_machine_delete(self, machine_uuid: UUID, machine_linked_account_uuids: list[UUID]):
         self._subscribed_machine_websocket_manager.on_machine_delete(machine_uuid)
         self._user_machines_websocket_manager.on_machine_delete(machine_uuid, machine_linked_account_uuids)
         self._all_machines_websocket_manager.on_machine_delete(machine_uuid)
         
-    def on_machine_modify(self, machine_uuid: UUID):
-        self._subscribed_machine_websocket_manager.on_machine_modify(machine_uuid)
-        self._user_machines_websocket_manager.on_machine_modify(machine_uuid)
-        self._all_machines_websocket_manager.on_machine_modify(machine_uuid)
+    async def _fan_out_machine_modify(self, machine_uuid: UUID):
+        await self._subscribed_machine_websocket_manager.on_machine_modify(machine_uuid)
+        await self._user_machines_websocket_manager.on_machine_modify(machine_uuid)
+        await self._all_machines_websocket_manager.on_machine_modify(machine_uuid)
 
 
-    def on_machine_bootup_start(self, machine_uuid: UUID):
+    async def _fan_out_machines_create(self, machine_uuids: list[UUID]):
+        await self._user_machines_websocket_manager.on_machines_create(machine_uuids)
+        await self._all_machines_websocket_manager.on_machines_create(machine_uuids)
+
+
+    def _fan_out_machine_bootup_start(self, machine_uuid: UUID):
+        # keeps the machine loading in the payloads produced by any worker
+        mark_vm_operation(machine_uuid)
         self._subscribed_machine_websocket_manager.on_machine_bootup_start(machine_uuid)
         self._user_machines_websocket_manager.on_machine_bootup_start(machine_uuid)
         self._all_machines_websocket_manager.on_machine_bootup_start(machine_uuid)
 
 
-    def on_machine_bootup_success(self, machine_uuid: UUID):
+    def _fan_out_machine_bootup_success(self, machine_uuid: UUID):
+        clear_vm_operation(machine_uuid)
         self._subscribed_machine_websocket_manager.on_machine_bootup_success(machine_uuid)
         self._user_machines_websocket_manager.on_machine_bootup_success(machine_uuid)
         self._all_machines_websocket_manager.on_machine_bootup_success(machine_uuid)
 
 
-    def on_machine_bootup_fail(self, machine_uuid: UUID, error: str):
+    def _fan_out_machine_bootup_fail(self, machine_uuid: UUID, error: str):
+        clear_vm_operation(machine_uuid)
         self._subscribed_machine_websocket_manager.on_machine_bootup_fail(machine_uuid, error)
         self._user_machines_websocket_manager.on_machine_bootup_fail(machine_uuid, error)
         self._all_machines_websocket_manager.on_machine_bootup_fail(machine_uuid, error)
 
 
-    def on_machine_shutdown_start(self, machine_uuid: UUID):
+    def _fan_out_machine_shutdown_start(self, machine_uuid: UUID):
+        mark_vm_operation(machine_uuid)
         self._subscribed_machine_websocket_manager.on_machine_shutdown_start(machine_uuid)
         self._user_machines_websocket_manager.on_machine_shutdown_start(machine_uuid)
         self._all_machines_websocket_manager.on_machine_shutdown_start(machine_uuid)
 
 
-    def on_machine_shutdown_success(self, machine_uuid: UUID):
+    def _fan_out_machine_shutdown_success(self, machine_uuid: UUID):
+        clear_vm_operation(machine_uuid)
         self._subscribed_machine_websocket_manager.on_machine_shutdown_success(machine_uuid)
         self._user_machines_websocket_manager.on_machine_shutdown_success(machine_uuid)
         self._all_machines_websocket_manager.on_machine_shutdown_success(machine_uuid)
 
 
-    def on_machine_shutdown_fail(self, machine_uuid: UUID, error: str):
+    def _fan_out_machine_shutdown_fail(self, machine_uuid: UUID, error: str):
+        clear_vm_operation(machine_uuid)
         self._subscribed_machine_websocket_manager.on_machine_shutdown_fail(machine_uuid, error)
         self._user_machines_websocket_manager.on_machine_shutdown_fail(machine_uuid, error)
         self._all_machines_websocket_manager.on_machine_shutdown_fail(machine_uuid, error)
@@ -7,22 +7,30 @@ from pydantic import BaseModel, Field
 
 
 WebSocketMessageTypes = Literal[
-    "CREATE", "DELETE", 
+    "CREATE", "DELETE", "CREATE_MANY", 
     "BOOTUP_START", "BOOTUP_SUCCESS", "BOOTUP_FAIL", 
     "SHUTDOWN_START", "SHUTDOWN_SUCCESS", "SHUTDOWN_FAIL", 
-    "DATA_STATIC", 
-    "DATA_DYNAMIC", "DATA_DYNAMIC_DISKS", "DATA_DYNAMIC_CONNECTIONS"
+    "SYNC", "DATA_STATIC", 
+    "DATA_DYNAMIC", "DATA_DYNAMIC_DELTA", "DATA_DYNAMIC_DISKS", "DATA_DYNAMIC_CONNECTIONS"
 ]
     
 class WebSocketMessage(BaseModel):
     uuid: UUID = Field(default_factory=uuid4)
     timestamp: Optional[datetime] = Field(default_factory=lambda: datetime.now(timezone.utc))
     type: WebSocketMessageTypes
+    seq: Optional[int] = None
     body: Any
 
-class WebSocketMessageUuidsBody(BaseModel):
-    uuids: list[UUID]
-
 class WebSocketMessageBaseBody(BaseModel):
     uuid: UUID
-    error: str | None = None 
\ No newline at end of file
+    error: str | None = None
+
+class WebSocketMessageDeltaBody(BaseModel):
+    changed: dict[UUID, dict[str, Any]]
+    removed: list[UUID]
+
+class WebSocketMessageSyncBody(BaseModel):
+    epoch: str
+    seq: int
+    resumed: bool
+    events: list[WebSocketMessage]
@@ -0,0 +1,110 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Iterable
+from uuid import UUID
+
+from starlette.websockets import WebSocket
+from config.websockets_config import WEBSOCKETS_CONFIG
+from modules.machine_state.models import MachineStatePayload
+from modules.websockets.send_queue import WebSocketSendQueues
+from modules.machine_websockets.machine_websocket_messanger import MachineWebSocketMessanger
+
+logger = logging.getLogger(__name__)
+
+machine_websocket_messanger = MachineWebSocketMessanger()
+
+# Fields sent with every changed machine, the client derives the machine state from both of them
+STATE_FIELDS = {"active", "loading"}
+
+
+@dataclass(frozen=True)
+class SentStateView:
+    snapshot: dict[UUID, dict[str, Any]]
+    keyframe_at: float
+
+
+def dump_machine_state_payloads(machine_state_payloads: dict[UUID, MachineStatePayload]) -> dict[UUID, dict[str, Any]]:
+    return {machine_uuid: payload.model_dump(mode="json") for machine_uuid, payload in machine_state_payloads.items()}
+
+
+def diff_machine_state_snapshots(previous: dict[UUID, dict[str, Any]], current: dict[UUID, dict[str, Any]]) -> tuple[dict[UUID, dict[str, Any]], list[UUID]]:
+    changed: dict[UUID, dict[str, Any]] = {}
+
+    for machine_uuid, fields in current.items():
+        previous_fields = previous.get(machine_uuid)
+
+        if previous_fields is None:
+            changed[machine_uuid] = fields
+            continue
+
+        changed_fields = {key: value for key, value in fields.items() if previous_fields.get(key) != value}
+
+        if changed_fields:
+            changed[machine_uuid] = {**{key: fields[key] for key in STATE_FIELDS if key in fields}, **changed_fields}
+
+    removed = [machine_uuid for machine_uuid in previous if machine_uuid not in current]
+
+    return changed, removed
+
+
+class MachineStateDeltas():
+    """
+    Tracks the DATA_DYNAMIC state last sent to each websocket and sends only the changes as DATA_DYNAMIC_DELTA.
+    A full DATA_DYNAMIC keyframe is sent on subscribe, every state_keyframe_interval seconds, after a dropped delta
+    and after new machine properties were sent, as clients drop the state of machines they do not know yet.
+    Websockets that received the same frames share one view, so each delta is computed and serialized once.
+    """
+    def __init__(self):
+        self._views: dict[int, SentStateView] = {}
+
+    def send_keyframe(self, websockets: Iterable[WebSocket], machine_state_payloads: dict[UUID, MachineStatePayload]):
+        websockets = list(websockets)
+        view = SentStateView(snapshot=dump_machine_state_payloads(machine_state_payloads), keyframe_at=time.monotonic())
+
+        machine_websocket_messanger.send_data_dynamic(websockets, machine_state_payloads)
+
+        for websocket in websockets:
+            self._views[id(websocket)] = view
+
+    def send(self, websockets: Iterable[WebSocket], machine_state_payloads: dict[UUID, MachineStatePayload]):
+        now = time.monotonic()
+        keyframe_websockets: list[WebSocket] = []
+        delta_groups: dict[int, tuple[SentStateView, list[WebSocket]]] = {}
+
+        for websocket in websockets:
+            view = self._views.get(id(websocket))
+            resync = WebSocketSendQueues.pop_resync(websocket)
+
+            if view is None or resync or now - view.keyframe_at >= WEBSOCKETS_CONFIG.state_keyframe_interval:
+                keyframe_websockets.append(websocket)
+            else:
+                delta_groups.setdefault(id(view), (view, []))[1].append(websocket)
+
+        if keyframe_websockets:
+            self.send_keyframe(keyframe_websockets, machine_state_payloads)
+
+        if not delta_groups:
+            return
+
+        snapshot = dump_machine_state_payloads(machine_state_payloads)
+
+        for view, group in delta_groups.values():
+            changed, removed = diff_machine_state_snapshots(view.snapshot, snapshot)
+            next_view = SentStateView(snapshot=snapshot, keyframe_at=view.keyframe_at)
+
+            if changed or removed:
+                machine_websocket_messanger.send_data_dynamic_delta(group, changed, removed)
+
+            for websocket in group:
+                self._views[id(websocket)] = next_view
+
+    def request_keyframe(self, websockets: Iterable[WebSocket]):
+        """
+        Makes the next tick send a keyframe to the websockets.
+        """
+        for websocket in websockets:
+            self._views.pop(id(websocket), None)
+
+    def discard(self, websocket_id: int):
+        self._views.pop(websocket_id, None)
@@ -2,6 +2,9 @@ import logging
 from uuid import UUID
 from pydantic import BaseModel, ConfigDict, Field
 from starlette.websockets import WebSocket
+from modules.machine_websockets.event_journal import EventJournal
+from modules.machine_websockets.state_deltas import MachineStateDeltas
+from modules.websockets.broadcast_scheduler import BroadcastScheduler
 
 logger = logging.getLogger(__name__)
 
@@ -13,25 +16,50 @@ class Subscription(BaseModel):
 
 
 class SubscriptionManager(BaseModel):
+    """
+    Subscriptions keyed by id(websocket), indexed by the subscribed machine for targeted events.
+    """
     subscriptions: dict[int, Subscription] = Field(default_factory=dict)
+    machine_index: dict[UUID, set[int]] = Field(default_factory=dict)
+    state_deltas: MachineStateDeltas = Field(default_factory=MachineStateDeltas)
+    journal: EventJournal[UUID] = Field(default_factory=EventJournal)
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
     
     def subscribe(self, websocket: WebSocket, machine_uuid: UUID):
         websocket_id = id(websocket)
+        self.__remove__(websocket_id)
         self.subscriptions[websocket_id] = Subscription(websocket=websocket, machine=machine_uuid)  
+        self.machine_index.setdefault(machine_uuid, set()).add(websocket_id)
+        self.journal.track(machine_uuid)
+        BroadcastScheduler.refresh()
+        
+    def is_idle(self) -> bool:
+        """
+        True if events have neither websockets to be sent to nor journal topics to be recorded for.
+        """
+        return not self.subscriptions and not self.journal.has_topics()
         
     def unsubscribe(self, websocket: WebSocket):
-        websocket_id = id(websocket)
-        del self.subscriptions[websocket_id]
+        self.__remove__(id(websocket))
     
     def get_websockets_for_machine(self, machine_uuid: UUID) -> list[WebSocket]:
-        return [
-            sub.websocket
-            for sub in self.subscriptions.values()
-            if sub.machine == machine_uuid
-        ]
+        return [self.subscriptions[key].websocket for key in self.machine_index.get(machine_uuid, ())]
         
     def remove_subscriptions_by_keys(self, keys: list[int]):
         for key in keys:
-            self.subscriptions.pop(key, None)
\ No newline at end of file
+            self.__remove__(key)
+            
+    def __remove__(self, websocket_id: int):
+        subscription = self.subscriptions.pop(websocket_id, None)
+        self.state_deltas.discard(websocket_id)
+        
+        if subscription is None:
+            return
+        
+        websocket_ids = self.machine_index.get(subscription.machine)
+        if websocket_ids is not None:
+            websocket_ids.discard(websocket_id)
+            if not websocket_ids:
+                del self.machine_index[subscription.machine]
+                self.journal.release(subscription.machine)
@@ -9,6 +9,7 @@ from modules.users.permissions import has_permissions
 from modules.machine_state.data_payloads.dynamic_disks_payload import get_machine_disks_payload
 from modules.machine_state.data_payloads.dynamic_state_payload import get_machine_state_payload
 from modules.machine_state.data_payloads.static_properties_payload import get_machine_properties_payload
+from modules.libvirt_socket import LibvirtExecutor
 from modules.machine_websockets.machine_websocket_messanger import MachineWebSocketMessanger
 from modules.websockets.websocket_handler import WebSocketHandler
 from modules.machine_websockets.subscribed_machine.subscription_manager import SubscriptionManager
@@ -34,7 +35,7 @@ class SubscribedMachinesWebsocketHandler(WebSocketHandler):
             logging.exception(f"Unhandled expection within websocket {self.websocket}.")
 
     @override
-    async def accept(self, access_token: str, machine_uuid: UUID):
+    async def accept(self, access_token: str, machine_uuid: UUID, last_seq: int | None = None, epoch: str | None = None):
         await super().accept(access_token)
         
         if not self.is_connected() or self.user is None:
@@ -44,36 +45,41 @@ class SubscribedMachinesWebsocketHandler(WebSocketHandler):
             return await self.close(code=4403, reason="You do not have the necessary permissions to access this resource.")
         
         self.subscription_manager.subscribe(self.websocket, machine_uuid)
-        await self.__send_messages_on_connect__(machine_uuid)
+        await self.__send_messages_on_connect__(machine_uuid, last_seq, epoch)
             
-    async def __send_messages_on_connect__(self, machine_uuid: UUID):
-        try:
-            properties_payload = get_machine_properties_payload(machine_uuid)
-            await machine_websocket_messanger.send_data_static(self.websocket, {machine_uuid: properties_payload})
-        except WebSocketDisconnect:
-            pass
-        except Exception as e:
-            logging.error("Failed to send STATIC PROPERTIES payload for machine %s over websocket: %s", machine_uuid, e, exc_info=True)
+    async def __send_messages_on_connect__(self, machine_uuid: UUID, last_seq: int | None, epoch: str | None):
+        events = self.subscription_manager.journal.replay(machine_uuid, epoch, last_seq)
+        machine_websocket_messanger.send_sync(self.websocket, events)
+        
+        # missed events were replayed, the static properties the client holds are up to date
+        if events is None:
+            try:
+                properties_payload = await LibvirtExecutor.run(get_machine_properties_payload, machine_uuid)
+                machine_websocket_messanger.send_data_static(self.websocket, {machine_uuid: properties_payload})
+            except WebSocketDisconnect:
+                pass
+            except Exception as e:
+                logging.error("Failed to send STATIC PROPERTIES payload for machine %s over websocket: %s", machine_uuid, e, exc_info=True)
 
         try:
-            state_payload = get_machine_state_payload(machine_uuid)
-            await machine_websocket_messanger.send_data_dynamic(self.websocket, {machine_uuid: state_payload})
+            state_payload = await LibvirtExecutor.run(get_machine_state_payload, machine_uuid)
+            self.subscription_manager.state_deltas.send_keyframe([self.websocket], {machine_uuid: state_payload})
         except WebSocketDisconnect:
             pass
         except Exception as e:
             logging.error("Failed to send DYNAMIC STATE payload for machine %s over websocket: %s", machine_uuid, e, exc_info=True)
 
         try:
-            disks_payload = get_machine_disks_payload(machine_uuid)
-            await machine_websocket_messanger.send_data_dynamic_disks(self.websocket, {machine_uuid: disks_payload})
+            disks_payload = await LibvirtExecutor.run(get_machine_disks_payload, machine_uuid)
+            machine_websocket_messanger.send_data_dynamic_disks(self.websocket, {machine_uuid: disks_payload})
         except WebSocketDisconnect:
             pass
         except Exception as e:
             logging.error("Failed to send DYNAMIC DISKS payload for machine %s over websocket: %s", machine_uuid, e,exc_info=True)
             
         try:
-            connections_payload = get_machine_connections_payload(machine_uuid)
-            await machine_websocket_messanger.send_data_dynamic_connections(self.websocket, {machine_uuid: connections_payload})
+            connections_payload = await LibvirtExecutor.run(get_machine_connections_payload, machine_uuid)
+            machine_websocket_messanger.send_data_dynamic_connections(self.websocket, {machine_uuid: connections_payload})
         except WebSocketDisconnect:
             pass
         except Exception as e:
@@ -1,18 +1,17 @@
-import asyncio
 import logging
-from typing import Awaitable, Callable, Literal, TypeVar
+from typing import Callable, TypeVar
 from uuid import UUID
 
 from fastapi import HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.websockets import WebSocketState
 from pydantic import BaseModel
 
-from config.websockets_config import WEBSOCKETS_CONFIG
-from modules.machine_state.data_payloads.dynamic_connections_payload import get_machine_connections_payload
-from modules.machine_state.data_payloads.dynamic_disks_payload import get_machine_disks_payload
-from modules.machine_state.data_payloads.dynamic_state_payload import get_machine_state_payload
+from modules.machine_state.models import MachineConnectionsPayload, MachineDisksPayload, MachineStatePayload
 from modules.machine_state.data_payloads.static_properties_payload import get_machine_properties_payload
+from modules.libvirt_socket import LibvirtExecutor
 from modules.machine_websockets.machine_websocket_messanger import MachineWebSocketMessanger
+from modules.machine_websockets.broadcast_topics import MACHINE_CONNECTIONS_TOPIC, MACHINE_DISKS_TOPIC, MACHINE_STATES_TOPIC, MachinePayloadsSnapshot
+from modules.websockets.broadcast_scheduler import BroadcastScheduler
 from modules.machine_websockets.subscribed_machine.subscription_manager import SubscriptionManager
 
 
@@ -24,33 +23,37 @@ machine_websocket_messanger = MachineWebSocketMessanger()
 
 class SubscribedMachineWebsocketsManager:
     subscription_manager = SubscriptionManager()
-    _broadcast_flags: dict[Literal["states", "disks", "connections"], bool] = {}
-    _broadcast_tasks: dict[Literal["states", "disks", "connections"], asyncio.Task] = {}
     
     
     """ Prepares and sends approperiate payload for each websocket."""
-    """ payload_retriever - callback for a function retrieving the payload from the machine uuid."""
-    """ payload_sender - callback for a function sending the payload through the provided websocket."""
+    """ snapshot - payloads of the current broadcast tick, shared with the other managers."""
+    """ payload_sender - callback for a function sending the payload through all provided websockets."""
     async def __broadcast_machine_payload__(
         self,
-        payload_retriever: Callable[[UUID], T],
-        payload_sender: Callable[[WebSocket, dict[UUID, T]], Awaitable[None]],
+        snapshot: MachinePayloadsSnapshot[T],
+        payload_sender: Callable[[list[WebSocket], dict[UUID, T]], None],
     ):
         dead_subscriptions = []
+        machine_websockets: dict[UUID, list[WebSocket]] = {}
 
         for key, subscription in list(self.subscription_manager.subscriptions.items()):
             ws: WebSocket = subscription.websocket
-            machine_uuid = subscription.machine
 
             if ws.application_state != WebSocketState.CONNECTED or ws.client_state != WebSocketState.CONNECTED:
                 dead_subscriptions.append(key)
                 continue
+            
+            machine_websockets.setdefault(subscription.machine, []).append(ws)
+        
+        payloads = await snapshot.get_many(machine_websockets.keys()) if machine_websockets else {}
 
+        # websockets subscribed to the same machine share the payload and the serialized frame
+        for machine_uuid, websockets in machine_websockets.items():
+            if machine_uuid not in payloads:
+                continue
+            
             try:
-                payload = payload_retriever(machine_uuid)
-                await payload_sender(ws, {machine_uuid: payload})
-            except (WebSocketDisconnect, HTTPException, RuntimeError) as e:
-                dead_subscriptions.append(key)
+                payload_sender(websockets, {machine_uuid: payloads[machine_uuid]})
             except Exception as e:
                 logger.error("Unexpected error while broadcasting payload for machine %s: %s", machine_uuid, e, exc_info=True)
 
@@ -58,124 +61,97 @@ class SubscribedMachineWebsocketsManager:
             self.subscription_manager.remove_subscriptions_by_keys(dead_subscriptions)
            
     """ Sends machine states data for each websocket based on the subscriptions. """            
-    async def __broadcast_machine_states__(self):
+    async def __broadcast_machine_states__(self, snapshot: MachinePayloadsSnapshot[MachineStatePayload]):
         await self.__broadcast_machine_payload__(
-            payload_retriever=get_machine_state_payload, 
-            payload_sender=machine_websocket_messanger.send_data_dynamic
+            snapshot=snapshot, 
+            payload_sender=self.subscription_manager.state_deltas.send
         )
         
     """ Sends machine disks data for each websocket based on the subscriptions. """                
-    async def __broadcast_machine_disks__(self):
+    async def __broadcast_machine_disks__(self, snapshot: MachinePayloadsSnapshot[MachineDisksPayload]):
         await self.__broadcast_machine_payload__(
-            payload_retriever=get_machine_disks_payload, 
+            snapshot=snapshot, 
             payload_sender=machine_websocket_messanger.send_data_dynamic_disks
         )
         
     """ Sends machine connections data for each websocket based on the subscriptions. """     
-    async def __broadcast_machine_connections__(self):
+    async def __broadcast_machine_connections__(self, snapshot: MachinePayloadsSnapshot[MachineConnectionsPayload]):
         await self.__broadcast_machine_payload__(
-            payload_retriever=get_machine_connections_payload, 
+            snapshot=snapshot, 
             payload_sender=machine_websocket_messanger.send_data_dynamic_connections
         )
         
-    """ Starts a continous broadcast for provided payload type (name). """     
-    async def _run_continuous_broadcast(self, name: Literal["states", "disks", "connections"], callback: Callable[[], Awaitable[None]], intervalInSeconds: int):
-        if self._broadcast_flags.get(name):
-            return  # already running
-        
-        self._broadcast_flags[name] = True
-        
-        while self._broadcast_flags.get(name):
-            try: 
-                await callback()
-            except Exception:
-                logger.exception(f"Exception occured during '{name}' broadcast in the SubscribedMachineWebsocketsManager.")
-            await asyncio.sleep(intervalInSeconds)
-    
-    """ Starts all the broadcasts using intervals from the config. """
+    """ Registers the broadcasts in the scheduler, they only run while there are subscribed websockets. """
     def start_broadcasts(self):
-        self._broadcast_tasks["states"] = asyncio.create_task(
-            self._run_continuous_broadcast("states", self.__broadcast_machine_states__, WEBSOCKETS_CONFIG.state_broadcast_interval)
-        )
-        self._broadcast_tasks["disks"] = asyncio.create_task(
-            self._run_continuous_broadcast("disks", self.__broadcast_machine_disks__, WEBSOCKETS_CONFIG.disks_broadcast_interval)
-        )
-        self._broadcast_tasks["connections"] = asyncio.create_task(
-            self._run_continuous_broadcast("connections", self.__broadcast_machine_connections__, WEBSOCKETS_CONFIG.connections_broadcast_interval)
-        )
+        has_subscribers = lambda: bool(self.subscription_manager.subscriptions)
+        
+        BroadcastScheduler.add_consumer(MACHINE_STATES_TOPIC, "subscribed_machine", self.__broadcast_machine_states__, has_subscribers)
+        BroadcastScheduler.add_consumer(MACHINE_DISKS_TOPIC, "subscribed_machine", self.__broadcast_machine_disks__, has_subscribers)
+        BroadcastScheduler.add_consumer(MACHINE_CONNECTIONS_TOPIC, "subscribed_machine", self.__broadcast_machine_connections__, has_subscribers)
         
     """ Stops all the broadcasts """
     def stop_broadcasts(self):
-        self._broadcast_flags["states"] = False
-        self._broadcast_flags["disks"] = False
-        self._broadcast_flags["connections"] = False
+        BroadcastScheduler.remove_consumer(MACHINE_STATES_TOPIC, "subscribed_machine")
+        BroadcastScheduler.remove_consumer(MACHINE_DISKS_TOPIC, "subscribed_machine")
+        BroadcastScheduler.remove_consumer(MACHINE_CONNECTIONS_TOPIC, "subscribed_machine")
+        
+    """ Returns websockets subscribed to the machine and the machine's topic if tracked by the event journal. """
+    def __get_recipients__(self, machine_uuid: UUID) -> tuple[list[WebSocket], list[UUID]]:
+        websockets = self.subscription_manager.get_websockets_for_machine(machine_uuid)
+        topics = self.subscription_manager.journal.get_tracked([machine_uuid])
+        
+        return websockets, topics
         
     """ Sends approperiate message for all websockets subscribed to deleted machine. """
     def on_machine_delete(self, machine_uuid: UUID):
-        websockets = self.subscription_manager.get_websockets_for_machine(machine_uuid)
+        websockets, topics = self.__get_recipients__(machine_uuid)
         
-        for websocket in websockets:
-            asyncio.create_task(machine_websocket_messanger.send_delete(websocket, machine_uuid))
+        machine_websocket_messanger.send_delete(websockets, machine_uuid, self.subscription_manager.journal.recorder(topics))
        
     """ Sends updated machine properties (static data) for all websockets subscribed to modified machine. """
-    def on_machine_modify(self, machine_uuid: UUID):
-        websockets = self.subscription_manager.get_websockets_for_machine(machine_uuid)
-        machine_properties_payload = get_machine_properties_payload(machine_uuid)
+    async def on_machine_modify(self, machine_uuid: UUID):
+        websockets, topics = self.__get_recipients__(machine_uuid)
         
-        for websocket in websockets:
-            asyncio.create_task(machine_websocket_messanger.send_data_static(websocket, {machine_uuid: machine_properties_payload}))
+        if not websockets and not topics:
+            return
         
+        machine_properties_payload = await LibvirtExecutor.run(get_machine_properties_payload, machine_uuid)
         
-    def on_machine_bootup_start(self, machine_uuid: UUID):
-        websockets = self.subscription_manager.get_websockets_for_machine(machine_uuid)
+        machine_websocket_messanger.send_data_static(websockets, {machine_uuid: machine_properties_payload}, self.subscription_manager.journal.recorder(topics))
+        self.subscription_manager.state_deltas.request_keyframe(websockets)
         
-        for websocket in websockets:
-            asyncio.create_task(machine_websocket_messanger.send_bootup_start(websocket, machine_uuid))
-    
-    
+        
+    def on_machine_bootup_start(self, machine_uuid: UUID):
+        websockets, topics = self.__get_recipients__(machine_uuid)
+
+        machine_websocket_messanger.send_bootup_start(websockets, machine_uuid, self.subscription_manager.journal.recorder(topics))
+
+
     def on_machine_bootup_success(self, machine_uuid: UUID):
-        websockets = self.subscription_manager.get_websockets_for_machine(machine_uuid)
+        websockets, topics = self.__get_recipients__(machine_uuid)
 
-        for websocket in websockets:
-            asyncio.create_task(
-                machine_websocket_messanger.send_bootup_success(websocket, machine_uuid)
-            )
+        machine_websocket_messanger.send_bootup_success(websockets, machine_uuid, self.subscription_manager.journal.recorder(topics))
 
 
     def on_machine_bootup_fail(self, machine_uuid: UUID, error: str):
-        websockets = self.subscription_manager.get_websockets_for_machine(machine_uuid)
+        websockets, topics = self.__get_recipients__(machine_uuid)
 
-        for websocket in websockets:
-            asyncio.create_task(
-                machine_websocket_messanger.send_bootup_fail(websocket, machine_uuid, error)
-            )
+        machine_websocket_messanger.send_bootup_fail(websockets, machine_uuid, error, self.subscription_manager.journal.recorder(topics))
 
 
     def on_machine_shutdown_start(self, machine_uuid: UUID):
-        websockets = self.subscription_manager.get_websockets_for_machine(machine_uuid)
+        websockets, topics = self.__get_recipients__(machine_uuid)
 
-        for websocket in websockets:
-            asyncio.create_task(
-                machine_websocket_messanger.send_shutdown_start(websocket, machine_uuid)
-            )
+        machine_websocket_messanger.send_shutdown_start(websockets, machine_uuid, self.subscription_manager.journal.recorder(topics))
 
 
     def on_machine_shutdown_success(self, machine_uuid: UUID):
-        websockets = self.subscription_manager.get_websockets_for_machine(machine_uuid)
+        websockets, topics = self.__get_recipients__(machine_uuid)
 
-        for websocket in websockets:
-            asyncio.create_task(
-                machine_websocket_messanger.send_shutdown_success(websocket, machine_uuid)
-            )
+        machine_websocket_messanger.send_shutdown_success(websockets, machine_uuid, self.subscription_manager.journal.recorder(topics))
 
 
     def on_machine_shutdown_fail(self, machine_uuid: UUID, error: str):
-        websockets = self.subscription_manager.get_websockets_for_machine(machine_uuid)
-
-        for websocket in websockets:
-            asyncio.create_task(
-                machine_websocket_messanger.send_shutdown_fail(websocket, machine_uuid, error)
-            )
-
+        websockets, topics = self.__get_recipients__(machine_uuid)
 
-    
\ No newline at end of file
+        machine_websocket_messanger.send_shutdown_fail(websockets, machine_uuid, error, self.subscription_manager.journal.recorder(topics))
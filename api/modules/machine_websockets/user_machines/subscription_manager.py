@@ -2,6 +2,9 @@ import logging
 from uuid import UUID
 from pydantic import BaseModel, ConfigDict, Field
 from starlette.websockets import WebSocket
+from modules.machine_websockets.event_journal import EventJournal
+from modules.machine_websockets.state_deltas import MachineStateDeltas
+from modules.websockets.broadcast_scheduler import BroadcastScheduler
 
 logger = logging.getLogger(__name__)
 
@@ -13,34 +16,57 @@ class Subscription(BaseModel):
 
 
 class SubscriptionManager(BaseModel):
+    """
+    Subscriptions keyed by id(websocket), indexed by the subscribed user for targeted events.
+    """
     subscriptions: dict[int, Subscription] = Field(default_factory=dict)
+    user_index: dict[UUID, set[int]] = Field(default_factory=dict)
+    state_deltas: MachineStateDeltas = Field(default_factory=MachineStateDeltas)
+    journal: EventJournal[UUID] = Field(default_factory=EventJournal)
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
     
     def subscribe(self, websocket: WebSocket, user_uuid: UUID):
         websocket_id = id(websocket)
+        self.__remove__(websocket_id)
         self.subscriptions[websocket_id] = Subscription(websocket=websocket, user=user_uuid)  
+        self.user_index.setdefault(user_uuid, set()).add(websocket_id)
+        self.journal.track(user_uuid)
+        BroadcastScheduler.refresh()
+        
+    def is_idle(self) -> bool:
+        """
+        True if events have neither websockets to be sent to nor journal topics to be recorded for.
+        """
+        return not self.subscriptions and not self.journal.has_topics()
         
     def unsubscribe(self, websocket: WebSocket):
-        websocket_id = id(websocket)
-        del self.subscriptions[websocket_id]
+        self.__remove__(id(websocket))
     
     def get_websockets_for_user(self, user_uuid: UUID) -> list[WebSocket]:
-        return [
-            sub.websocket
-            for sub in self.subscriptions.values()
-            if sub.user == user_uuid
-        ]
+        return [self.subscriptions[key].websocket for key in self.user_index.get(user_uuid, ())]
         
     def get_websockets_for_users(self, user_uuids: set[UUID] | list[UUID]) -> list[WebSocket]:
-        user_uuid_set = set(user_uuids)
-
         return [
-            sub.websocket
-            for sub in self.subscriptions.values()
-            if sub.user in user_uuid_set
+            self.subscriptions[key].websocket
+            for user_uuid in set(user_uuids)
+            for key in self.user_index.get(user_uuid, ())
         ]
         
     def remove_subscriptions_by_keys(self, keys: list[int]):
         for key in keys:
-            self.subscriptions.pop(key, None)
\ No newline at end of file
+            self.__remove__(key)
+            
+    def __remove__(self, websocket_id: int):
+        subscription = self.subscriptions.pop(websocket_id, None)
+        self.state_deltas.discard(websocket_id)
+        
+        if subscription is None:
+            return
+        
+        websocket_ids = self.user_index.get(subscription.user)
+        if websocket_ids is not None:
+            websocket_ids.discard(websocket_id)
+            if not websocket_ids:
+                del self.user_index[subscription.user]
+                self.journal.release(subscription.user)
@@ -8,6 +8,7 @@ from modules.machine_state.data_payloads.dynamic_disks_payload import get_user_m
 from modules.machine_state.data_payloads.dynamic_state_payload import get_user_machine_state_payloads
 from modules.machine_websockets.user_machines.subscription_manager import SubscriptionManager
 from modules.machine_state.data_payloads.static_properties_payload import get_user_machine_properties_payloads
+from modules.libvirt_socket import LibvirtExecutor
 from modules.machine_websockets.machine_websocket_messanger import MachineWebSocketMessanger
 from modules.websockets.websocket_handler import WebSocketHandler
 
@@ -31,46 +32,51 @@ class UserMachinesWebsocketHandler(WebSocketHandler):
             logging.exception(f"Unhandled expection within websocket {self.websocket}.")
     
     @override
-    async def accept(self, access_token: str):
+    async def accept(self, access_token: str, last_seq: int | None = None, epoch: str | None = None):
         await super().accept(access_token)
         
         if not self.is_connected() or self.user is None:
             return
 
         self.subscription_manager.subscribe(self.websocket, self.user.uuid)
-        await self.__send_messages_on_connect__()
+        await self.__send_messages_on_connect__(last_seq, epoch)
    
-    async def __send_messages_on_connect__(self):
+    async def __send_messages_on_connect__(self, last_seq: int | None, epoch: str | None):
         if self.user is None:
             return
         
-        try:
-            properties_payload = get_user_machine_properties_payloads(self.user)
-            await machine_websocket_messanger.send_data_static(self.websocket, properties_payload)
-        except WebSocketDisconnect:
-            pass
-        except Exception as e:
-            logging.error("Failed to send STATIC PROPERTIES payload for machines accessed by user %s over websocket: %s", self.user.uuid, e, exc_info=True)
+        events = self.subscription_manager.journal.replay(self.user.uuid, epoch, last_seq)
+        machine_websocket_messanger.send_sync(self.websocket, events)
+        
+        # missed events were replayed, the static properties the client holds are up to date
+        if events is None:
+            try:
+                properties_payload = await LibvirtExecutor.run(get_user_machine_properties_payloads, self.user)
+                machine_websocket_messanger.send_data_static(self.websocket, properties_payload)
+            except WebSocketDisconnect:
+                pass
+            except Exception as e:
+                logging.error("Failed to send STATIC PROPERTIES payload for machines accessed by user %s over websocket: %s", self.user.uuid, e, exc_info=True)
 
         try:
-            state_payload = get_user_machine_state_payloads(self.user)
-            await machine_websocket_messanger.send_data_dynamic(self.websocket, state_payload)
+            state_payload = await LibvirtExecutor.run(get_user_machine_state_payloads, self.user)
+            self.subscription_manager.state_deltas.send_keyframe([self.websocket], state_payload)
         except WebSocketDisconnect:
             pass
         except Exception as e:
             logging.error("Failed to send DYNAMIC STATE payload for machines accessed by user %s over websocket: %s", self.user.uuid, e, exc_info=True)
 
         try:
-            disks_payload = get_user_machine_disks_payloads(self.user)
-            await machine_websocket_messanger.send_data_dynamic_disks(self.websocket, disks_payload)
+            disks_payload = await LibvirtExecutor.run(get_user_machine_disks_payloads, self.user)
+            machine_websocket_messanger.send_data_dynamic_disks(self.websocket, disks_payload)
         except WebSocketDisconnect:
             pass
         except Exception as e:
             logging.error("Failed to send DYNAMIC DISKS payload for machines accessed by user %s over websocket: %s", self.user.uuid, e,exc_info=True)
 
         try:
-            connections_payload = get_user_machine_connections_payloads(self.user)
-            await machine_websocket_messanger.send_data_dynamic_connections(self.websocket, connections_payload)
+            connections_payload = await LibvirtExecutor.run(get_user_machine_connections_payloads, self.user)
+            machine_websocket_messanger.send_data_dynamic_connections(self.websocket, connections_payload)
         except WebSocketDisconnect:
             pass
         except Exception as e:
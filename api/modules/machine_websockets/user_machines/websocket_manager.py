@@ -1,21 +1,18 @@
-import asyncio
 import logging
-from typing import Awaitable, Callable, Literal, TypeVar
+from typing import Callable, TypeVar
 from uuid import UUID
 
 from fastapi import HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.websockets import WebSocketState
 from pydantic import BaseModel
 
-from modules.users.models import AnyUser
-from modules.users.users import UsersManager
-from modules.machine_state.queries import  get_machine_linked_account_uuids
-from config.websockets_config import WEBSOCKETS_CONFIG
-from modules.machine_state.data_payloads.dynamic_connections_payload import get_machine_connections_payload, get_user_machine_connections_payloads
-from modules.machine_state.data_payloads.dynamic_disks_payload import get_machine_disks_payload, get_machine_disks_payloads_by_uuids, get_user_machine_disks_payloads
-from modules.machine_state.data_payloads.dynamic_state_payload import get_machine_state_payload, get_user_machine_state_payloads
-from modules.machine_state.data_payloads.static_properties_payload import get_machine_properties_payload
+from modules.machine_state.queries import get_accounts_machine_uuids_async, get_machine_linked_account_uuids
+from modules.machine_state.models import MachineConnectionsPayload, MachineDisksPayload, MachineStatePayload
+from modules.machine_state.data_payloads.static_properties_payload import get_machine_properties_payload, get_machine_properties_payloads_by_uuids
+from modules.libvirt_socket import LibvirtExecutor
 from modules.machine_websockets.machine_websocket_messanger import MachineWebSocketMessanger
+from modules.machine_websockets.broadcast_topics import MACHINE_CONNECTIONS_TOPIC, MACHINE_DISKS_TOPIC, MACHINE_STATES_TOPIC, MachinePayloadsSnapshot
+from modules.websockets.broadcast_scheduler import BroadcastScheduler
 from .subscription_manager import SubscriptionManager
 
 T = TypeVar("T", bound=BaseModel)
@@ -26,180 +23,217 @@ machine_websocket_messanger = MachineWebSocketMessanger()
 
 class UserMachinesWebsocketManager:
     subscription_manager = SubscriptionManager()
-    _broadcast_flags: dict[Literal["states", "disks", "connections"], bool] = {}
-    _broadcast_tasks: dict[Literal["states", "disks", "connections"], asyncio.Task] = {}
     
     
     """ Prepares and sends approperiate payload for each websocket."""
-    """ payload_retriever - callback for a function retrieving the payload from the machine uuid."""
-    """ payload_sender - callback for a function sending the payload through the provided websocket."""
+    """ One snapshot of all machines accessible by the subscribed users and one access index are built per tick, """
+    """ each user's slice of the snapshot is then sent to all of the user's websockets. """
+    """ snapshot - payloads of the current broadcast tick, shared with the other managers."""
+    """ payload_sender - callback for a function sending the payload through all provided websockets."""
     async def __broadcast_machine_payload__(
         self,
-        payload_retriever: Callable[[AnyUser], dict[UUID, T]],
-        payload_sender: Callable[[WebSocket, dict[UUID, T]], Awaitable[None]],
+        snapshot: MachinePayloadsSnapshot[T],
+        payload_sender: Callable[[list[WebSocket], dict[UUID, T]], None],
     ):
         dead_subscriptions = []
+        
+        subscriptions = list(self.subscription_manager.subscriptions.items())
+        
+        if not subscriptions:
+            return
+        
+        # users with several open websockets share the same slice and the same serialized frame
+        user_websockets: dict[UUID, list[WebSocket]] = {}
 
-        for key, subscription in self.subscription_manager.subscriptions.items():
+        for key, subscription in subscriptions:
             ws: WebSocket = subscription.websocket
-            user_uuid = subscription.user
 
             if ws.application_state != WebSocketState.CONNECTED or ws.client_state != WebSocketState.CONNECTED:
                 dead_subscriptions.append(key)
                 continue
+            
+            user_websockets.setdefault(subscription.user, []).append(ws)
+        
+        if dead_subscriptions:
+            self.subscription_manager.remove_subscriptions_by_keys(dead_subscriptions)
+        
+        if not user_websockets:
+            return
+        
+        access_index = await get_accounts_machine_uuids_async(set(user_websockets))
+        payloads = await snapshot.get_many(set().union(*access_index.values()))
 
+        for user_uuid, websockets in user_websockets.items():
             try:
-                user = UsersManager.get_user(user_uuid)
-                
-                if user is None:
-                    logger.error(f"Couldn't retrieve user with uuid={user_uuid} in the /ws/machine/account websocket. Removing subscription.")
-                    raise RuntimeError
+                user_payload = {
+                    machine_uuid: payloads[machine_uuid] 
+                    for machine_uuid in access_index.get(user_uuid, set()) 
+                    if machine_uuid in payloads
+                }
                 
-                payload = payload_retriever(user)
-                await payload_sender(ws, payload)
-            except (WebSocketDisconnect, HTTPException,  RuntimeError) as e:
-                dead_subscriptions.append(key)
+                payload_sender(websockets, user_payload)
             except Exception as e:
                 logger.error("Unexpected error while broadcasting payload of machines for user %s: %s", user_uuid, e, exc_info=True)
-
-        if dead_subscriptions:
-            self.subscription_manager.remove_subscriptions_by_keys(dead_subscriptions)
            
     """ Sends machine states data for each websocket based on the subscriptions. """            
-    async def __broadcast_machine_states__(self):
+    async def __broadcast_machine_states__(self, snapshot: MachinePayloadsSnapshot[MachineStatePayload]):
         await self.__broadcast_machine_payload__(
-            payload_retriever=get_user_machine_state_payloads, 
-            payload_sender=machine_websocket_messanger.send_data_dynamic
+            snapshot=snapshot, 
+            payload_sender=self.subscription_manager.state_deltas.send
         )
         
     """ Sends machine disks data for each websocket based on the subscriptions. """                
-    async def __broadcast_machine_disks__(self):
+    async def __broadcast_machine_disks__(self, snapshot: MachinePayloadsSnapshot[MachineDisksPayload]):
         await self.__broadcast_machine_payload__(
-            payload_retriever=get_user_machine_disks_payloads, 
+            snapshot=snapshot, 
             payload_sender=machine_websocket_messanger.send_data_dynamic_disks
         )
         
     """ Sends machine connections data for each websocket based on the subscriptions. """     
-    async def __broadcast_machine_connections__(self):
+    async def __broadcast_machine_connections__(self, snapshot: MachinePayloadsSnapshot[MachineConnectionsPayload]):
         await self.__broadcast_machine_payload__(
-            payload_retriever=get_user_machine_connections_payloads, 
+            snapshot=snapshot, 
             payload_sender=machine_websocket_messanger.send_data_dynamic_connections
         )
         
-    """ Starts a continous broadcast for provided payload type (name). """     
-    async def _run_continuous_broadcast(self, name: Literal["states", "disks", "connections"], callback: Callable[[], Awaitable[None]], intervalInSeconds: int):
-        if self._broadcast_flags.get(name):
-            return  # already running
-        
-        self._broadcast_flags[name] = True
-        
-        while self._broadcast_flags.get(name):
-            try: 
-                await callback()
-            except Exception:
-                logger.exception(f"Exception occured during '{name}' broadcast in the UserMachinesWebsocketManager.")
-            await asyncio.sleep(intervalInSeconds)
-    
-    """ Starts all the broadcasts using intervals from the config. """
+    """ Registers the broadcasts in the scheduler, they only run while there are subscribed websockets. """
     def start_broadcasts(self):
-        self._broadcast_tasks["states"] = asyncio.create_task(
-            self._run_continuous_broadcast("states", self.__broadcast_machine_states__, WEBSOCKETS_CONFIG.state_broadcast_interval)
-        )
-        self._broadcast_tasks["disks"] = asyncio.create_task(
-            self._run_continuous_broadcast("disks", self.__broadcast_machine_disks__, WEBSOCKETS_CONFIG.disks_broadcast_interval)
-        )
-        self._broadcast_tasks["connections"] = asyncio.create_task(
-            self._run_continuous_broadcast("connections", self.__broadcast_machine_connections__, WEBSOCKETS_CONFIG.connections_broadcast_interval)
-        )
+        has_subscribers = lambda: bool(self.subscription_manager.subscriptions)
+        
+        BroadcastScheduler.add_consumer(MACHINE_STATES_TOPIC, "user_machines", self.__broadcast_machine_states__, has_subscribers)
+        BroadcastScheduler.add_consumer(MACHINE_DISKS_TOPIC, "user_machines", self.__broadcast_machine_disks__, has_subscribers)
+        BroadcastScheduler.add_consumer(MACHINE_CONNECTIONS_TOPIC, "user_machines", self.__broadcast_machine_connections__, has_subscribers)
         
     """ Stops all the broadcasts """
     def stop_broadcasts(self):
-        self._broadcast_flags["states"] = False
-        self._broadcast_flags["disks"] = False
-        self._broadcast_flags["connections"] = False
+        BroadcastScheduler.remove_consumer(MACHINE_STATES_TOPIC, "user_machines")
+        BroadcastScheduler.remove_consumer(MACHINE_DISKS_TOPIC, "user_machines")
+        BroadcastScheduler.remove_consumer(MACHINE_CONNECTIONS_TOPIC, "user_machines")
         
-    """ Sends newly created machine data for all websockets subscribed to a relevant account. """
-    def on_machine_create(self, machine_uuid: UUID):
-        user_uuids = get_machine_linked_account_uuids(machine_uuid)
+    """ Returns websockets of the users and the users' topics tracked by the event journal. """
+    def __get_recipients__(self, user_uuids: set[UUID] | list[UUID]) -> tuple[list[WebSocket], list[UUID]]:
         websockets = self.subscription_manager.get_websockets_for_users(user_uuids)
-        machine_properties_payload = get_machine_properties_payload(machine_uuid)
+        topics = self.subscription_manager.journal.get_tracked(set(user_uuids))
+        
+        return websockets, topics
+        
+    """ Sends newly created machine data for all websockets subscribed to a relevant account. """
+    async def on_machine_create(self, machine_uuid: UUID):
+        if self.subscription_manager.is_idle():
+            return
+        
+        websockets, topics = self.__get_recipients__(get_machine_linked_account_uuids(machine_uuid))
+        
+        if not websockets and not topics:
+            return
+        
+        machine_properties_payload = await LibvirtExecutor.run(get_machine_properties_payload, machine_uuid)
 
-        for websocket in websockets:
-            asyncio.create_task(machine_websocket_messanger.send_create(websocket, machine_properties_payload))
+        machine_websocket_messanger.send_create(websockets, machine_properties_payload, self.subscription_manager.journal.recorder(topics))
+        self.subscription_manager.state_deltas.request_keyframe(websockets)
         
     """ Sends deletion message on relevant machine deletion. """
     def on_machine_delete(self, machine_uuid: UUID, user_uuids: list[UUID]):
-        websockets = self.subscription_manager.get_websockets_for_users(user_uuids)
+        websockets, topics = self.__get_recipients__(user_uuids)
         
-        for websocket in websockets:
-            asyncio.create_task(machine_websocket_messanger.send_delete(websocket, machine_uuid))
+        machine_websocket_messanger.send_delete(websockets, machine_uuid, self.subscription_manager.journal.recorder(topics))
        
+    """ Sends data of machines created in bulk in a single message per account, the properties are built in one batched pass. """
+    async def on_machines_create(self, machine_uuids: list[UUID]):
+        if self.subscription_manager.is_idle():
+            return
+        
+        created_machine_uuids = set(machine_uuids)
+        access_index = await get_accounts_machine_uuids_async(set(self.subscription_manager.user_index) | set(self.subscription_manager.journal.get_topics()))
+        
+        user_machine_uuids = {
+            user_uuid: accessible_machine_uuids & created_machine_uuids
+            for user_uuid, accessible_machine_uuids in access_index.items()
+            if accessible_machine_uuids & created_machine_uuids
+        }
+        
+        if not user_machine_uuids:
+            return
+        
+        machine_properties_payloads = await LibvirtExecutor.run(get_machine_properties_payloads_by_uuids, set().union(*user_machine_uuids.values()))
+        
+        for user_uuid, machine_uuids_of_user in user_machine_uuids.items():
+            user_payloads = {
+                machine_uuid: machine_properties_payloads[machine_uuid] 
+                for machine_uuid in machine_uuids_of_user 
+                if machine_uuid in machine_properties_payloads
+            }
+            
+            if user_payloads:
+                websockets, topics = self.__get_recipients__([user_uuid])
+                machine_websocket_messanger.send_create_many(websockets, user_payloads, self.subscription_manager.journal.recorder(topics))
+                self.subscription_manager.state_deltas.request_keyframe(websockets)
+        
     """ Sends updated machine properties (static data) to all websockets subscribed to a relevant account. """
-    def on_machine_modify(self, machine_uuid: UUID):
-        user_uuids = get_machine_linked_account_uuids(machine_uuid)
-        websockets = self.subscription_manager.get_websockets_for_users(user_uuids)
-        machine_properties_payload = get_machine_properties_payload(machine_uuid)
+    async def on_machine_modify(self, machine_uuid: UUID):
+        if self.subscription_manager.is_idle():
+            return
         
-        for websocket in websockets:
-            asyncio.create_task(machine_websocket_messanger.send_data_static(websocket, {machine_uuid: machine_properties_payload}))
+        websockets, topics = self.__get_recipients__(get_machine_linked_account_uuids(machine_uuid))
+        
+        if not websockets and not topics:
+            return
+        
+        machine_properties_payload = await LibvirtExecutor.run(get_machine_properties_payload, machine_uuid)
+        
+        machine_websocket_messanger.send_data_static(websockets, {machine_uuid: machine_properties_payload}, self.subscription_manager.journal.recorder(topics))
+        self.subscription_manager.state_deltas.request_keyframe(websockets)
         
         
     def on_machine_bootup_start(self, machine_uuid: UUID):
-        user_uuids = get_machine_linked_account_uuids(machine_uuid)
-        websockets = self.subscription_manager.get_websockets_for_users(user_uuids)
+        if self.subscription_manager.is_idle():
+            return
         
-        for websocket in websockets:
-            asyncio.create_task(machine_websocket_messanger.send_bootup_start(websocket, machine_uuid))
-    
-    
+        websockets, topics = self.__get_recipients__(get_machine_linked_account_uuids(machine_uuid))
+
+        machine_websocket_messanger.send_bootup_start(websockets, machine_uuid, self.subscription_manager.journal.recorder(topics))
+
+
     def on_machine_bootup_success(self, machine_uuid: UUID):
-        user_uuids = get_machine_linked_account_uuids(machine_uuid)
-        websockets = self.subscription_manager.get_websockets_for_users(user_uuids)
+        if self.subscription_manager.is_idle():
+            return
+        
+        websockets, topics = self.__get_recipients__(get_machine_linked_account_uuids(machine_uuid))
 
-        for websocket in websockets:
-            asyncio.create_task(
-                machine_websocket_messanger.send_bootup_success(websocket, machine_uuid)
-            )
+        machine_websocket_messanger.send_bootup_success(websockets, machine_uuid, self.subscription_manager.journal.recorder(topics))
 
 
     def on_machine_bootup_fail(self, machine_uuid: UUID, error: str):
-        user_uuids = get_machine_linked_account_uuids(machine_uuid)
-        websockets = self.subscription_manager.get_websockets_for_users(user_uuids)
+        if self.subscription_manager.is_idle():
+            return
+        
+        websockets, topics = self.__get_recipients__(get_machine_linked_account_uuids(machine_uuid))
 
-        for websocket in websockets:
-            asyncio.create_task(
-                machine_websocket_messanger.send_bootup_fail(websocket, machine_uuid, error)
-            )
+        machine_websocket_messanger.send_bootup_fail(websockets, machine_uuid, error, self.subscription_manager.journal.recorder(topics))
 
 
     def on_machine_shutdown_start(self, machine_uuid: UUID):
-        user_uuids = get_machine_linked_account_uuids(machine_uuid)
-        websockets = self.subscription_manager.get_websockets_for_users(user_uuids)
+        if self.subscription_manager.is_idle():
+            return
+        
+        websockets, topics = self.__get_recipients__(get_machine_linked_account_uuids(machine_uuid))
 
-        for websocket in websockets:
-            asyncio.create_task(
-                machine_websocket_messanger.send_shutdown_start(websocket, machine_uuid)
-            )
+        machine_websocket_messanger.send_shutdown_start(websockets, machine_uuid, self.subscription_manager.journal.recorder(topics))
 
 
     def on_machine_shutdown_success(self, machine_uuid: UUID):
-        user_uuids = get_machine_linked_account_uuids(machine_uuid)
-        websockets = self.subscription_manager.get_websockets_for_users(user_uuids)
+        if self.subscription_manager.is_idle():
+            return
+        
+        websockets, topics = self.__get_recipients__(get_machine_linked_account_uuids(machine_uuid))
 
-        for websocket in websockets:
-            asyncio.create_task(
-                machine_websocket_messanger.send_shutdown_success(websocket, machine_uuid)
-            )
+        machine_websocket_messanger.send_shutdown_success(websockets, machine_uuid, self.subscription_manager.journal.recorder(topics))
 
 
     def on_machine_shutdown_fail(self, machine_uuid: UUID, error: str):
-        user_uuids = get_machine_linked_account_uuids(machine_uuid)
-        websockets = self.subscription_manager.get_websockets_for_users(user_uuids)
-
-        for websocket in websockets:
-            asyncio.create_task(
-                machine_websocket_messanger.send_shutdown_fail(websocket, machine_uuid, error)
-            )
-
+        if self.subscription_manager.is_idle():
+            return
+        
+        websockets, topics = self.__get_recipients__(get_machine_linked_account_uuids(machine_uuid))
 
-    
\ No newline at end of file
+        machine_websocket_messanger.send_shutdown_fail(websockets, machine_uuid, error, self.subscription_manager.journal.recorder(topics))
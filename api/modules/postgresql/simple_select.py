@@ -3,7 +3,7 @@ import psycopg
 from psycopg.sql import Composed
 from pydantic import BaseModel
 from .models import Params
-from .main import pool
+from .main import async_pool, pool
 
 T = TypeVar("T", bound=BaseModel)
 
@@ -47,6 +47,54 @@ def select_schema_dict(model: Type[T], key_name: str, query: str | Composed, par
 
 def select_schema_one(model: Type[T], query: str | Composed | Composed, params: Params | None = None) -> Optional[T]:
     row = select_one(query, params)
+    if not row:
+        return None
+    return model.model_validate(row)
+
+
+
+###############################
+#   async variants
+###############################
+# Backed by the async pool - to be used from coroutines, so database round trips don't block the event loop.
+async def select_one_async(query: str | Composed, params: Params | None = None) -> dict[str, Any] | None:
+    async with async_pool.connection() as connection:
+        async with connection.cursor() as cursor:
+            await cursor.execute(query=query, params=params) #type: ignore[arg-type]
+            row = await cursor.fetchone()
+    return row
+
+
+
+async def select_rows_async(query: str | Composed, params: Params | None = None) -> list[dict[str, Any]]:
+    async with async_pool.connection() as connection:
+        async with connection.cursor() as cursor:
+            await cursor.execute(query=query, params=params) #type: ignore[arg-type]
+            rows = await cursor.fetchall()
+    return rows
+
+
+
+async def select_single_field_async(key_name: str, query: str | Composed, params: Params | None = None) -> list[Any]:
+    rows = await select_rows_async(query, params)
+    return [row[key_name] for row in rows]
+
+
+
+async def select_schema_async(model: Type[T], query: str | Composed, params: Params | None = None) -> list[Any]:
+    rows = await select_rows_async(query, params)
+    return [model.model_validate(row) for row in rows]
+
+
+
+async def select_schema_dict_async(model: Type[T], key_name: str, query: str | Composed, params: Params | None = None) -> dict[Any, Any]:
+    rows = await select_rows_async(query, params)
+    return {row[key_name]: model.model_validate(row) for row in rows}
+
+
+
+async def select_schema_one_async(model: Type[T], query: str | Composed, params: Params | None = None) -> Optional[T]:
+    row = await select_one_async(query, params)
     if not row:
         return None
     return model.model_validate(row)
\ No newline at end of file
@@ -1,11 +1,11 @@
 import logging
-from typing import Any, Callable, Generic, Optional, Type, TypeVar
+from typing import Any, Awaitable, Callable, Generic, Optional, Type, TypeVar
 from uuid import UUID
 from pydantic import BaseModel, model_validator
 from psycopg import sql
 
 from .main import pool
-from .simple_select import select_schema_one, select_schema_dict
+from .simple_select import select_schema_one, select_schema_dict, select_schema_one_async, select_schema_dict_async
 from .models import InvalidFieldNameException, RecordNotFoundException
 
 logger = logging.getLogger(__name__)
@@ -24,6 +24,11 @@ class SimpleTableManager(BaseModel, Generic[DBModel, MainModel, CreationModel]):
     model_in_db: Type[DBModel]
     model_creation_args: Type[CreationModel] | None = None
     prepare_record: Callable[[DBModel], MainModel]
+    # used by the async getters when preparing a record needs further queries, prepare_record otherwise
+    prepare_record_async: Callable[[DBModel], Awaitable[MainModel]] | None = None
+    # prepare whole result sets at once, resolving related entities with a single query instead of one per record
+    prepare_records: Callable[[list[DBModel]], list[MainModel]] | None = None
+    prepare_records_async: Callable[[list[DBModel]], Awaitable[list[MainModel]]] | None = None
     
     
     @model_validator(mode="after")
@@ -33,10 +38,7 @@ class SimpleTableManager(BaseModel, Generic[DBModel, MainModel, CreationModel]):
     
     
     def get_record_by_field(self, field_name: str, value: Any) -> Optional[MainModel]:
-        
-        if field_name not in self.allowed_fields_for_select:
-            logging.error(f"[SimpleTableManager:{self.table_name}] Invalid field name '{field_name}' passed to get_by_field(). Allowed fields: {sorted(self.allowed_fields_for_select)}")
-            raise InvalidFieldNameException(field_name=field_name)
+        self._verify_field_name(field_name, "get_by_field")
         
         record = select_schema_one(self.model_in_db, f"SELECT * FROM {self.table_name} WHERE {field_name} = (%s)", (value,))
         
@@ -44,16 +46,7 @@ class SimpleTableManager(BaseModel, Generic[DBModel, MainModel, CreationModel]):
         
         
     def get_record_by_fields(self, fields: dict[str, str]) -> Optional[MainModel]:
-        
-        for field_name in fields.keys():
-            if field_name not in self.allowed_fields_for_select:
-                logging.error(f"[SimpleTableManager:{self.table_name}] Invalid field name '{field_name}' passed to get_by_field(). Allowed fields: {sorted(self.allowed_fields_for_select)}")
-                raise InvalidFieldNameException(field_name=field_name)
-            
-        query = f"""
-            SELECT * FROM {self.table_name} 
-            WHERE {' AND '.join([f'{field} = %({field})s' for field in fields.keys()])}
-        """
+        query = self._build_select_by_fields_query(fields)
             
         record = select_schema_one(self.model_in_db, query, fields)
         
@@ -68,22 +61,111 @@ class SimpleTableManager(BaseModel, Generic[DBModel, MainModel, CreationModel]):
         
         records = select_schema_dict(self.model_in_db, "uuid", f"SELECT * FROM {self.table_name}")
         
-        for uuid, record in records.items():
-            records[uuid] = self.prepare_record(record)
-            
-            
-        return records
+        return self._prepare_all(records)
     
     def get_all_records_matching(self, field_name: str, value: Any | list[Any]) -> dict[UUID, MainModel]:
+        self._verify_field_name(field_name, "get_all_records_matching")
+        
+        if isinstance(value, list) and not len(value):
+            return {}
+        
+        query, params = self._build_matching_query(field_name, value)
+        
+        records = select_schema_dict(self.model_in_db, "uuid", query, params)
+        
+        return self._prepare_all(records)
+    
+    
+    ###############################
+    #   async getters
+    ###############################
+    # Same as the getters above, but backed by the async pool - for use in coroutines.
+    async def get_record_by_field_async(self, field_name: str, value: Any) -> Optional[MainModel]:
+        self._verify_field_name(field_name, "get_record_by_field_async")
+        
+        record = await select_schema_one_async(self.model_in_db, f"SELECT * FROM {self.table_name} WHERE {field_name} = (%s)", (value,))
+        
+        return await self._prepare_record_async(record) if record is not None else None
+    
+    
+    async def get_record_by_fields_async(self, fields: dict[str, str]) -> Optional[MainModel]:
+        query = self._build_select_by_fields_query(fields)
+        
+        record = await select_schema_one_async(self.model_in_db, query, fields)
+        
+        return await self._prepare_record_async(record) if record is not None else None
+    
+    
+    async def get_record_by_uuid_async(self, uuid: UUID) -> Optional[MainModel]:
+        return await self.get_record_by_field_async("uuid", str(uuid))
+    
+    
+    async def get_all_records_async(self) -> dict[UUID, MainModel]:
+        records = await select_schema_dict_async(self.model_in_db, "uuid", f"SELECT * FROM {self.table_name}")
+        
+        return await self._prepare_all_async(records)
+    
+    
+    async def get_all_records_matching_async(self, field_name: str, value: Any | list[Any]) -> dict[UUID, MainModel]:
+        self._verify_field_name(field_name, "get_all_records_matching_async")
+        
+        if isinstance(value, list) and not len(value):
+            return {}
+        
+        query, params = self._build_matching_query(field_name, value)
         
+        records = await select_schema_dict_async(self.model_in_db, "uuid", query, params)
+        
+        return await self._prepare_all_async(records)
+    
+    
+    ###############################
+    #   record preparation
+    ###############################
+    def _prepare_all(self, records: dict[UUID, DBModel]) -> dict[UUID, MainModel]:
+        if self.prepare_records is None:
+            return {key: self.prepare_record(record) for key, record in records.items()}
+        
+        return dict(zip(records.keys(), self.prepare_records(list(records.values())))) if records else {}
+    
+    
+    async def _prepare_all_async(self, records: dict[UUID, DBModel]) -> dict[UUID, MainModel]:
+        if self.prepare_records_async is not None:
+            return dict(zip(records.keys(), await self.prepare_records_async(list(records.values())))) if records else {}
+        
+        if self.prepare_record_async is None:
+            return self._prepare_all(records)
+        
+        return {key: await self.prepare_record_async(record) for key, record in records.items()}
+    
+    
+    async def _prepare_record_async(self, record: DBModel) -> MainModel:
+        if self.prepare_record_async is not None:
+            return await self.prepare_record_async(record)
+        return self.prepare_record(record)
+    
+    
+    ###############################
+    #   query building
+    ###############################
+    def _verify_field_name(self, field_name: str, method_name: str):
         if field_name not in self.allowed_fields_for_select:
-            logging.error(f"[SimpleTableManager:{self.table_name}] Invalid field name '{field_name}' passed to get_all_records_matching(). Allowed fields: {sorted(self.allowed_fields_for_select)}")
+            logging.error(f"[SimpleTableManager:{self.table_name}] Invalid field name '{field_name}' passed to {method_name}(). Allowed fields: {sorted(self.allowed_fields_for_select)}")
             raise InvalidFieldNameException(field_name=field_name)
-        
-        if isinstance(value, list):
-            if not len(value):
-                return {}
+    
+    
+    def _build_select_by_fields_query(self, fields: dict[str, str]) -> str:
+        for field_name in fields.keys():
+            self._verify_field_name(field_name, "get_by_field")
             
+        return f"""
+            SELECT * FROM {self.table_name} 
+            WHERE {' AND '.join([f'{field} = %({field})s' for field in fields.keys()])}
+        """
+    
+    
+    def _build_matching_query(self, field_name: str, value: Any | list[Any]) -> tuple[sql.Composed, list[Any]]:
+        if isinstance(value, list):
             base_query = "SELECT * FROM {table} WHERE {field} IN ({placeholders})"
             placeholders=sql.SQL(', ').join(sql.Placeholder() * len(value))
             params = value
@@ -98,12 +180,7 @@ class SimpleTableManager(BaseModel, Generic[DBModel, MainModel, CreationModel]):
             placeholders=placeholders
         )
         
-        records = select_schema_dict(self.model_in_db, "uuid", query, params)
-        
-        for key, record in records.items():
-            records[key] = self.prepare_record(record)
-        
-        return records
+        return query, params
     
     
     def create_record(self, form: CreationModel):
@@ -0,0 +1,110 @@
+import logging
+import threading
+import time
+
+from dataclasses import dataclass
+from typing import Iterable
+from uuid import UUID
+from cachetools import TTLCache
+
+from config.authentication_config import AUTHENTICATION_CONFIG
+from modules.users.models import AnyUserExtended, UsersCacheMetrics
+from modules.websockets.cluster_bus import ClusterBus
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["UsersCache"]
+
+
+@dataclass
+class CachedUser:
+    user: AnyUserExtended
+    loaded_at: float
+
+
+class _UsersCache():
+    """
+    Cache of extended user models read through by token validation, keyed by the user's UUID.
+    Every change to a user, its roles or its groups bumps the user's version on all workers, dropping the cached entry.
+    A load that raced with a bump is not stored. Entries expire after user_cache_ttl, bounding staleness if an invalidation is missed.
+    """
+    def __init__(self):
+        self._cache = TTLCache[UUID, CachedUser](maxsize=AUTHENTICATION_CONFIG.user_cache_size, ttl=AUTHENTICATION_CONFIG.user_cache_ttl)
+        self._versions: dict[UUID, int] = {}
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._discarded_loads = 0
+        self._total_hit_age_seconds = 0.0
+        self._max_hit_age_seconds = 0.0
+
+        ClusterBus.add_event_handler("users_invalidate", lambda uuids: self._bump(UUID(uuid) for uuid in uuids))
+
+    def get(self, uuid: UUID) -> AnyUserExtended | None:
+        with self._lock:
+            cached = self._cache.get(uuid)
+
+            if cached is None:
+                self._misses += 1
+                return None
+
+            age = time.monotonic() - cached.loaded_at
+            self._hits += 1
+            self._total_hit_age_seconds += age
+            self._max_hit_age_seconds = max(self._max_hit_age_seconds, age)
+            return cached.user
+
+    def get_version(self, uuid: UUID) -> int:
+        """
+        Version to pass to store() - to be taken before the user is loaded from the database.
+        """
+        with self._lock:
+            return self._versions.get(uuid, 0)
+
+    def store(self, user: AnyUserExtended, version: int):
+        with self._lock:
+            if self._versions.get(user.uuid, 0) != version:
+                self._discarded_loads += 1
+                return
+            self._cache[user.uuid] = CachedUser(user=user, loaded_at=time.monotonic())
+
+    def invalidate(self, uuids: Iterable[UUID]):
+        """
+        Drops the cached users on this worker immediately and on the other workers through the cluster bus.
+        """
+        uuids = list(uuids)
+
+        if not uuids:
+            return
+
+        with self._lock:
+            self._invalidations += len(uuids)
+
+        self._bump(uuids)
+        ClusterBus.publish_event("users_invalidate", uuids)
+
+    def _bump(self, uuids: Iterable[UUID]):
+        with self._lock:
+            for uuid in uuids:
+                self._versions[uuid] = self._versions.get(uuid, 0) + 1
+                self._cache.pop(uuid, None)
+
+    def get_metrics(self) -> UsersCacheMetrics:
+        with self._lock:
+            requests = self._hits + self._misses
+            return UsersCacheMetrics(
+                size=len(self._cache),
+                max_size=int(self._cache.maxsize),
+                hits=self._hits,
+                misses=self._misses,
+                hit_rate=(self._hits / requests) if requests else 0.0,
+                invalidations=self._invalidations,
+                discarded_loads=self._discarded_loads,
+                average_hit_age_seconds=(self._total_hit_age_seconds / self._hits) if self._hits else 0.0,
+                max_hit_age_seconds=self._max_hit_age_seconds,
+            )
+
+
+UsersCache = _UsersCache()
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+
+from datetime import datetime, timezone
+from uuid import UUID
+from psycopg import sql
+
+from config.authentication_config import AUTHENTICATION_CONFIG
+from modules.postgresql.main import async_pool
+from modules.users.models import AnyUser
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["LastActiveBuffer"]
+
+ACCOUNT_TABLES = {
+    "administrative": "administrators",
+    "client": "clients",
+}
+
+
+class _LastActiveBuffer():
+    """
+    Write-behind buffer of users' last activity. Requests only record the latest timestamp per user in memory,
+    the dirty entries are written every last_active_flush_interval with a single UPDATE per table and once more on shutdown.
+    """
+    def __init__(self):
+        self._dirty: dict[str, dict[UUID, datetime]] = {table: {} for table in ACCOUNT_TABLES.values()}
+        self._task: asyncio.Task | None = None
+
+    def record(self, user: AnyUser):
+        self._dirty[ACCOUNT_TABLES[user.account_type]][user.uuid] = datetime.now(timezone.utc)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
+
+    async def flush(self):
+        for table, dirty in self._dirty.items():
+            if not dirty:
+                continue
+
+            # swapped before awaiting, activity recorded during the write lands in the next batch
+            self._dirty[table] = {}
+
+            try:
+                await self._write(table, dirty)
+            except Exception as e:
+                logger.warning(f"Failed to write last activity of {len(dirty)} users to {table}, retrying with the next flush: {e}")
+                for uuid, timestamp in dirty.items():
+                    current = self._dirty[table].get(uuid)
+                    if current is None or current < timestamp:
+                        self._dirty[table][uuid] = timestamp
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(AUTHENTICATION_CONFIG.last_active_flush_interval)
+            await self.flush()
+
+    @staticmethod
+    async def _write(table: str, dirty: dict[UUID, datetime]):
+        values = sql.SQL(", ").join(sql.SQL("(%s::uuid, %s::timestamptz)") for _ in dirty)
+
+        query = sql.SQL("""
+            UPDATE {table} SET last_active = activity.last_active
+            FROM (VALUES {values}) AS activity (uuid, last_active)
+            WHERE {table}.uuid = activity.uuid
+        """).format(table=sql.Identifier(table), values=values)
+
+        async with async_pool.connection() as connection:
+            async with connection.cursor() as cursor:
+                await cursor.execute(query, [value for item in dirty.items() for value in item])
+
+
+LastActiveBuffer = _LastActiveBuffer()
@@ -140,7 +140,8 @@ class CreateUserFormBasicModel(BaseModel):
     def validate_name(cls, value):
         return name_validator(value)
     
-    @field_validator("email", mode="before")
+    # email is declared by the subclassed forms
+    @field_validator("email", mode="before", check_fields=False)
     @classmethod
     def fix_email(cls, value):
         if value is not None and len(value):
@@ -212,6 +213,17 @@ class RenameGroupBody (BaseModel):
     def validate_name(cls, value):
         return name_validator(value)
 
+class UsersCacheMetrics(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    hit_rate: float
+    invalidations: int
+    discarded_loads: int
+    average_hit_age_seconds: float
+    max_hit_age_seconds: float
+
 # 
 #   UNIONS
 # 
@@ -1,5 +1,3 @@
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
 import logging
 from typing import Any, Type, override
 from uuid import UUID
@@ -9,27 +7,63 @@ from psycopg import AsyncCursor, Cursor, sql
 from modules.users.permissions import has_permissions
 from modules.postgresql import pool
 from ..models import Administrator, AdministratorExtended, AdministratorInDB, CreateAdministratorArgs, ModifyUserArgs, Role
-from modules.postgresql.simple_select import select_one, select_rows, select_single_field
+from modules.postgresql.simple_select import select_one, select_one_async, select_rows, select_rows_async, select_single_field, select_single_field_async
 from modules.users.guacamole_synchronization import create_entity, delete_entity
 from modules.postgresql.simple_table_manager import SimpleTableManager
-from modules.authentication.passwords import hash_password
+from modules.authentication.password_hasher import PasswordHasher
 
 
 logger = logging.getLogger(__name__)
 
-_thread_pool = ThreadPoolExecutor(max_workers=4)
+select_administrator_roles = """
+    SELECT roles.uuid, roles.permissions FROM roles
+    JOIN administrators_roles ON roles.uuid = administrators_roles.role_uuid
+    JOIN administrators ON administrators_roles.administrator_uuid = administrators.uuid
+    WHERE administrators.uuid = %s
+"""
+
+select_administrators_roles = """
+    SELECT administrators_roles.administrator_uuid, roles.uuid, roles.permissions FROM roles
+    JOIN administrators_roles ON roles.uuid = administrators_roles.role_uuid
+    WHERE administrators_roles.administrator_uuid = ANY(%s)
+"""
+
+select_administrators_with_role = """
+    SELECT DISTINCT administrators.uuid FROM administrators 
+    LEFT JOIN administrators_roles ON administrators.uuid = administrators_roles.administrator_uuid
+    LEFT JOIN roles ON administrators_roles.role_uuid = roles.uuid
+    WHERE role_uuid = %s
+"""
 
 def prepare_from_database_record(record: AdministratorInDB) -> Administrator:
     administrator = Administrator.model_validate(record.model_dump())
+    role_rows = select_rows(select_administrator_roles, (administrator.uuid,))
+    return apply_administrator_roles(administrator, role_rows)
+
+async def prepare_from_database_record_async(record: AdministratorInDB) -> Administrator:
+    administrator = Administrator.model_validate(record.model_dump())
+    role_rows = await select_rows_async(select_administrator_roles, (administrator.uuid,))
+    return apply_administrator_roles(administrator, role_rows)
+
+def prepare_from_database_records(records: list[AdministratorInDB]) -> list[Administrator]:
+    administrators = [Administrator.model_validate(record.model_dump()) for record in records]
+    role_rows = select_rows(select_administrators_roles, ([administrator.uuid for administrator in administrators],))
+    return apply_administrators_roles(administrators, role_rows)
+
+async def prepare_from_database_records_async(records: list[AdministratorInDB]) -> list[Administrator]:
+    administrators = [Administrator.model_validate(record.model_dump()) for record in records]
+    role_rows = await select_rows_async(select_administrators_roles, ([administrator.uuid for administrator in administrators],))
+    return apply_administrators_roles(administrators, role_rows)
+
+def apply_administrators_roles(administrators: list[Administrator], role_rows: list[dict[str, Any]]) -> list[Administrator]:
+    rows_by_administrator: dict[UUID, list[dict[str, Any]]] = {}
     
-    role_rows = select_rows("""
-        SELECT roles.uuid, roles.permissions FROM roles
-        JOIN administrators_roles ON roles.uuid = administrators_roles.role_uuid
-        JOIN administrators ON administrators_roles.administrator_uuid = administrators.uuid
-        WHERE administrators.uuid = %s
-        """, (administrator.uuid,)
-    )
+    for row in role_rows:
+        rows_by_administrator.setdefault(row["administrator_uuid"], []).append(row)
     
+    return [apply_administrator_roles(administrator, rows_by_administrator.get(administrator.uuid, [])) for administrator in administrators]
+
+def apply_administrator_roles(administrator: Administrator, role_rows: list[dict[str, Any]]) -> Administrator:
     permissions = administrator.permissions
     roles: list[UUID] = []
     
@@ -52,13 +86,20 @@ class _AdministratorTableManager(SimpleTableManager):
             model=Administrator,
             model_in_db=AdministratorInDB,
             model_creation_args=CreateAdministratorArgs,
-            prepare_record=prepare_from_database_record
+            prepare_record=prepare_from_database_record,
+            prepare_record_async=prepare_from_database_record_async,
+            prepare_records=prepare_from_database_records,
+            prepare_records_async=prepare_from_database_records_async,
         )
     
     def get_password(self, uuid: UUID) -> str | None:
         response = select_one("SELECT password FROM administrators WHERE uuid = %s", (uuid,))
         return response.get("password") if response else None
     
+    async def get_password_async(self, uuid: UUID) -> str | None:
+        response = await select_one_async("SELECT password FROM administrators WHERE uuid = %s", (uuid,))
+        return response.get("password") if response else None
+    
     def extend_model(self, administrator: Administrator) -> AdministratorExtended:
         from .roles_library import RoleLibrary
         
@@ -66,22 +107,29 @@ class _AdministratorTableManager(SimpleTableManager):
             **administrator.model_dump(exclude={"roles"}),
             roles=RoleLibrary.get_all_records_matching("uuid", administrator.roles)
         )
+    
+    async def extend_model_async(self, administrator: Administrator) -> AdministratorExtended:
+        from .roles_library import RoleLibrary
+        
+        return AdministratorExtended(
+            **administrator.model_dump(exclude={"roles"}),
+            roles=await RoleLibrary.get_all_records_matching_async("uuid", administrator.roles)
+        )
         
     def get_all_administrators_with_role(self, role_uuid):
-        administrator_uuids = select_single_field("uuid", """
-            SELECT DISTINCT administrators.uuid FROM administrators 
-            LEFT JOIN administrators_roles ON administrators.uuid = administrators_roles.administrator_uuid
-            LEFT JOIN roles ON administrators_roles.role_uuid = roles.uuid
-            WHERE role_uuid = %s
-        """, (role_uuid, ))
+        administrator_uuids = select_single_field("uuid", select_administrators_with_role, (role_uuid, ))
         return self.get_all_records_matching("uuid", administrator_uuids)
+    
+    async def get_all_administrators_with_role_async(self, role_uuid):
+        administrator_uuids = await select_single_field_async("uuid", select_administrators_with_role, (role_uuid, ))
+        return await self.get_all_records_matching_async("uuid", administrator_uuids)
         
     @override
     def create_record(self, args: CreateAdministratorArgs, logged_in_user: Administrator):
         from .roles_library import RoleLibrary
 
+        # args.password is hashed by the caller, off the event loop
         args.username = args.username.lower()
-        args.password = hash_password(args.password)
         
         all_roles = set(RoleLibrary.get_all_records().keys())
         not_existing = set(args.roles) - all_roles
@@ -132,13 +180,7 @@ class _AdministratorTableManager(SimpleTableManager):
         required_permissions = 0
         roles_query_data = []
         
-        loop = asyncio.get_event_loop()
-        passwords = [args.password for args in args_list]
-        hash_tasks = [
-            loop.run_in_executor(_thread_pool, hash_password, pw) 
-            for pw in passwords
-        ]
-        hashed_passwords = await asyncio.gather(*hash_tasks)
+        hashed_passwords = await PasswordHasher.hash_many([args.password for args in args_list])
         
         for args, hashed_password in zip(args_list, hashed_passwords):
             args.username = args.username.lower()
@@ -1,5 +1,3 @@
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
 import logging
 import time
 from typing import Any, Type, override
@@ -7,10 +5,10 @@ from uuid import UUID
 from fastapi import HTTPException
 from psycopg import AsyncCursor, Cursor, sql
 
-from modules.authentication.passwords import hash_password
+from modules.authentication.password_hasher import PasswordHasher
 from modules.postgresql import pool
 from modules.postgresql.simple_table_manager import SimpleTableManager
-from modules.postgresql.simple_select import select_one, select_single_field
+from modules.postgresql.simple_select import select_one, select_one_async, select_rows, select_rows_async, select_single_field, select_single_field_async
 from modules.users.guacamole_synchronization import create_entity, delete_entity
 
 from ..models import Client, ClientExtended, ClientInDB, CreateClientArgs, ModifyUserArgs
@@ -18,20 +16,54 @@ from ..models import Client, ClientExtended, ClientInDB, CreateClientArgs, Modif
 
 logger = logging.getLogger(__name__)
 
-_thread_pool = ThreadPoolExecutor(max_workers=4)
+select_client_groups = """
+    SELECT groups.uuid FROM groups
+    JOIN clients_groups ON groups.uuid = clients_groups.group_uuid
+    JOIN clients ON clients_groups.client_uuid = clients.uuid
+    WHERE clients.uuid = %s
+"""
+
+select_clients_groups = """
+    SELECT clients_groups.client_uuid, array_agg(groups.uuid) AS groups FROM groups
+    JOIN clients_groups ON groups.uuid = clients_groups.group_uuid
+    WHERE clients_groups.client_uuid = ANY(%s)
+    GROUP BY clients_groups.client_uuid
+"""
+
+select_clients_in_group = """
+    SELECT DISTINCT clients.uuid FROM clients
+    LEFT JOIN clients_groups ON clients.uuid = clients_groups.client_uuid
+    LEFT JOIN groups ON clients_groups.group_uuid = groups.uuid
+    WHERE group_uuid = %s
+"""
 
 def prepare_from_database_record(record: ClientInDB) -> Client:
     client = Client.model_validate(record.model_dump())
+    client.groups = select_single_field("uuid", select_client_groups, (client.uuid,))
+    return client
+
+async def prepare_from_database_record_async(record: ClientInDB) -> Client:
+    client = Client.model_validate(record.model_dump())
+    client.groups = await select_single_field_async("uuid", select_client_groups, (client.uuid,))
+    return client
+
+def prepare_from_database_records(records: list[ClientInDB]) -> list[Client]:
+    clients = [Client.model_validate(record.model_dump()) for record in records]
+    rows = select_rows(select_clients_groups, ([client.uuid for client in clients],))
+    return apply_clients_groups(clients, rows)
+
+async def prepare_from_database_records_async(records: list[ClientInDB]) -> list[Client]:
+    clients = [Client.model_validate(record.model_dump()) for record in records]
+    rows = await select_rows_async(select_clients_groups, ([client.uuid for client in clients],))
+    return apply_clients_groups(clients, rows)
+
+def apply_clients_groups(clients: list[Client], rows: list[dict[str, Any]]) -> list[Client]:
+    groups = {row["client_uuid"]: row["groups"] for row in rows}
     
-    client.groups = select_single_field("uuid", """
-        SELECT groups.uuid FROM groups
-        JOIN clients_groups ON groups.uuid = clients_groups.group_uuid
-        JOIN clients ON clients_groups.client_uuid = clients.uuid
-        WHERE clients.uuid = %s
-        """, (client.uuid,)
-    )
+    for client in clients:
+        client.groups = groups.get(client.uuid, [])
     
-    return client
+    return clients
 
 
 class _ClientTableManager(SimpleTableManager):
@@ -44,12 +76,19 @@ class _ClientTableManager(SimpleTableManager):
             model=Client,
             model_in_db=ClientInDB,
             model_creation_args=CreateClientArgs,
-            prepare_record=prepare_from_database_record
+            prepare_record=prepare_from_database_record,
+            prepare_record_async=prepare_from_database_record_async,
+            prepare_records=prepare_from_database_records,
+            prepare_records_async=prepare_from_database_records_async,
         )
     
     def get_password(self, uuid: UUID) -> str | None:
         response = select_one("SELECT password FROM clients WHERE uuid = %s", (uuid,))
         return response.get("password") if response else None
+    
+    async def get_password_async(self, uuid: UUID) -> str | None:
+        response = await select_one_async("SELECT password FROM clients WHERE uuid = %s", (uuid,))
+        return response.get("password") if response else None
 
     def extend_model(self, client: Client) -> ClientExtended:
         from .group_library import GroupLibrary
@@ -58,22 +97,29 @@ class _ClientTableManager(SimpleTableManager):
             **client.model_dump(exclude={"groups"}),
             groups=GroupLibrary.get_all_records_matching("uuid", client.groups)
         )
+    
+    async def extend_model_async(self, client: Client) -> ClientExtended:
+        from .group_library import GroupLibrary
+        
+        return ClientExtended(
+            **client.model_dump(exclude={"groups"}),
+            groups=await GroupLibrary.get_all_records_matching_async("uuid", client.groups)
+        )
         
     def get_all_clients_in_group(self, group_uuid):
-        client_uuids = select_single_field("uuid", """
-            SELECT DISTINCT clients.uuid FROM clients
-            LEFT JOIN clients_groups ON clients.uuid = clients_groups.client_uuid
-            LEFT JOIN groups ON clients_groups.group_uuid = groups.uuid
-            WHERE group_uuid = %s
-        """, (group_uuid, ))
+        client_uuids = select_single_field("uuid", select_clients_in_group, (group_uuid, ))
         return self.get_all_records_matching("uuid", client_uuids)
+    
+    async def get_all_clients_in_group_async(self, group_uuid):
+        client_uuids = await select_single_field_async("uuid", select_clients_in_group, (group_uuid, ))
+        return await self.get_all_records_matching_async("uuid", client_uuids)
         
     @override
     def create_record(self, args: CreateClientArgs):
         from .group_library import GroupLibrary
 
+        # args.password is hashed by the caller, off the event loop
         args.username = args.username.lower()
-        args.password = hash_password(args.password)
         
         all_groups = set(GroupLibrary.get_all_records().keys())
         not_existing = set(args.groups) - all_groups
@@ -113,13 +159,7 @@ class _ClientTableManager(SimpleTableManager):
         
         groups_query_data = []
         
-        loop = asyncio.get_event_loop()
-        passwords = [args.password for args in args_list]
-        hash_tasks = [
-            loop.run_in_executor(_thread_pool, hash_password, pw) 
-            for pw in passwords
-        ]
-        hashed_passwords = await asyncio.gather(*hash_tasks)
+        hashed_passwords = await PasswordHasher.hash_many([args.password for args in args_list])
         
         for args, hashed_password in zip(args_list, hashed_passwords):
             args.username = args.username.lower()
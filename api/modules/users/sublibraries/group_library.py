@@ -1,28 +1,58 @@
 import logging
 from uuid import UUID
-from typing import Type, override
+from typing import Any, Type, override
 from fastapi import HTTPException
 from psycopg import sql
 from modules.postgresql import pool
 from modules.postgresql.simple_table_manager import SimpleTableManager
-from modules.postgresql.simple_select import select_single_field
+from modules.users.cache import UsersCache
+from modules.postgresql.simple_select import select_rows, select_rows_async, select_single_field, select_single_field_async
 from ..models import CreateGroupArgs, CreateGroupForm, Group, GroupExtended, GroupInDB
 
 logger = logging.getLogger(__name__)
 
 
+select_group_users = """
+    SELECT clients.uuid FROM clients
+    JOIN clients_groups ON clients.uuid = clients_groups.client_uuid
+    JOIN groups ON clients_groups.group_uuid = groups.uuid                          
+    WHERE groups.uuid = %s
+"""
+
+select_groups_users = """
+    SELECT clients_groups.group_uuid, array_agg(clients.uuid) AS users FROM clients
+    JOIN clients_groups ON clients.uuid = clients_groups.client_uuid
+    WHERE clients_groups.group_uuid = ANY(%s)
+    GROUP BY clients_groups.group_uuid
+"""
+
 def prepare_from_database_record(record: GroupInDB) -> Group:
     group = Group.model_validate(record.model_dump())
+    group.users = select_single_field("uuid", select_group_users, (group.uuid, ))
+    return group
+
+async def prepare_from_database_record_async(record: GroupInDB) -> Group:
+    group = Group.model_validate(record.model_dump())
+    group.users = await select_single_field_async("uuid", select_group_users, (group.uuid, ))
+    return group
+
+def prepare_from_database_records(records: list[GroupInDB]) -> list[Group]:
+    groups = [Group.model_validate(record.model_dump()) for record in records]
+    rows = select_rows(select_groups_users, ([group.uuid for group in groups],))
+    return apply_groups_users(groups, rows)
+
+async def prepare_from_database_records_async(records: list[GroupInDB]) -> list[Group]:
+    groups = [Group.model_validate(record.model_dump()) for record in records]
+    rows = await select_rows_async(select_groups_users, ([group.uuid for group in groups],))
+    return apply_groups_users(groups, rows)
+
+def apply_groups_users(groups: list[Group], rows: list[dict[str, Any]]) -> list[Group]:
+    users = {row["group_uuid"]: row["users"] for row in rows}
     
-    group.users = select_single_field("uuid", """
-        SELECT clients.uuid FROM clients
-        JOIN clients_groups ON clients.uuid = clients_groups.client_uuid
-        JOIN groups ON clients_groups.group_uuid = groups.uuid                          
-        WHERE groups.uuid = %s
-        """, (group.uuid, )   
-    )
+    for group in groups:
+        group.users = users.get(group.uuid, [])
     
-    return group
+    return groups
 
 
 class _GroupTableManager(SimpleTableManager):
@@ -36,6 +66,9 @@ class _GroupTableManager(SimpleTableManager):
             model_in_db=GroupInDB,
             model_creation_args=CreateGroupForm,
             prepare_record=prepare_from_database_record,
+            prepare_record_async=prepare_from_database_record_async,
+            prepare_records=prepare_from_database_records,
+            prepare_records_async=prepare_from_database_records_async,
         )
     
     def extend_model(self, group: Group) -> GroupExtended:
@@ -45,6 +78,14 @@ class _GroupTableManager(SimpleTableManager):
             **group.model_dump(exclude={"users"}),
             users=ClientLibrary.get_all_records_matching("uuid", group.users)
         )
+    
+    async def extend_model_async(self, group: Group) -> GroupExtended:
+        from .client_library import ClientLibrary
+        
+        return GroupExtended(
+            **group.model_dump(exclude={"users"}),
+            users=await ClientLibrary.get_all_records_matching_async("uuid", group.users)
+        )
         
     @override
     def create_record(self, args: CreateGroupArgs) -> UUID:
@@ -72,8 +113,26 @@ class _GroupTableManager(SimpleTableManager):
                 with connection.transaction():
                     cursor.execute("INSERT INTO groups (uuid, name) VALUES (%s, %s)", (args.uuid, args.name))
                     cursor.execute(assign_users_query)
+        
+        UsersCache.invalidate(args.users)
 
         return args.uuid
+    
+    @override
+    def remove_record(self, uuid: UUID):
+        group = self.get_record_by_uuid(uuid)
+        super().remove_record(uuid)
+        
+        if group is not None:
+            UsersCache.invalidate(group.users)
+    
+    @override
+    def modify_record_field(self, uuid: UUID, field_name: str, new_value):
+        group = self.get_record_by_uuid(uuid)
+        super().modify_record_field(uuid, field_name, new_value)
+        
+        if group is not None:
+            UsersCache.invalidate(group.users)
 
     def join_client_to_group(self, group_uuid: UUID, client_uuid: UUID):
         from .client_library import ClientLibrary
@@ -93,6 +152,8 @@ class _GroupTableManager(SimpleTableManager):
                     VALUES (%s, %s) 
                     ON CONFLICT DO NOTHING
                 """, (client_uuid, group_uuid))
+        
+        UsersCache.invalidate({client_uuid, *group.users})
                 
     def remove_client_from_group(self, group_uuid: UUID, client_uuid: UUID):
         from .client_library import ClientLibrary
@@ -111,6 +172,8 @@ class _GroupTableManager(SimpleTableManager):
                     DELETE FROM clients_groups 
                     WHERE client_uuid = %s AND group_uuid = %s
                 """, (client_uuid, group_uuid))
+        
+        UsersCache.invalidate({client_uuid, *group.users})
                 
     def update_client_groups(self, client_uuid: UUID, groups: list[UUID]):
         from .client_library import ClientLibrary
@@ -120,8 +183,8 @@ class _GroupTableManager(SimpleTableManager):
         if client is None:
             raise HTTPException(400, f"Client with uuid={client_uuid} does not exist.")
         
-        all_groups = set(self.get_all_records().keys())
-        not_existing = set(groups) - all_groups
+        all_groups = self.get_all_records()
+        not_existing = set(groups) - set(all_groups.keys())
         
         if not_existing:
             raise HTTPException(400, f"The following groups do not exist in the system: {', '.join(map(str, not_existing))}")
@@ -143,6 +206,10 @@ class _GroupTableManager(SimpleTableManager):
                     cursor.execute("DELETE FROM clients_groups WHERE client_uuid = %s", (client_uuid, ))
                     cursor.execute(insert_query)
         
+        # members of the previous and the new groups see the changed membership in their extended models
+        affected_groups = [all_groups[group_uuid] for group_uuid in {*groups, *client.groups} if group_uuid in all_groups]
+        UsersCache.invalidate({client_uuid, *(user for group in affected_groups for user in group.users)})
+        
 
 GroupLibrary = _GroupTableManager()
 
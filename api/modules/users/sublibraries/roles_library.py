@@ -9,24 +9,54 @@ from modules.postgresql import pool
 from ..models import Administrator, Role, RoleExtended, RoleInDB
 from modules.users.permissions import has_permissions, verify_permission_integrity
 from modules.postgresql.simple_table_manager import SimpleTableManager
-from modules.postgresql.simple_select import select_single_field
+from modules.users.cache import UsersCache
+from modules.postgresql.simple_select import select_rows, select_rows_async, select_single_field, select_single_field_async
 
 
 logger = logging.getLogger(__name__)
 
 
+select_role_users = """
+    SELECT administrators.uuid FROM administrators
+    JOIN administrators_roles ON administrators.uuid = administrators_roles.administrator_uuid
+    JOIN roles ON administrators_roles.role_uuid = roles.uuid                            
+    WHERE roles.uuid = %s
+"""
+
+select_roles_users = """
+    SELECT administrators_roles.role_uuid, array_agg(administrators.uuid) AS users FROM administrators
+    JOIN administrators_roles ON administrators.uuid = administrators_roles.administrator_uuid
+    WHERE administrators_roles.role_uuid = ANY(%s)
+    GROUP BY administrators_roles.role_uuid
+"""
+
 def prepare_from_database_record(record: RoleInDB) -> Role:
     role = Role.model_validate(record.model_dump())
+    role.users = select_single_field("uuid", select_role_users, (role.uuid, ))
+    return role
+
+async def prepare_from_database_record_async(record: RoleInDB) -> Role:
+    role = Role.model_validate(record.model_dump())
+    role.users = await select_single_field_async("uuid", select_role_users, (role.uuid, ))
+    return role
+
+def prepare_from_database_records(records: list[RoleInDB]) -> list[Role]:
+    roles = [Role.model_validate(record.model_dump()) for record in records]
+    rows = select_rows(select_roles_users, ([role.uuid for role in roles],))
+    return apply_roles_users(roles, rows)
+
+async def prepare_from_database_records_async(records: list[RoleInDB]) -> list[Role]:
+    roles = [Role.model_validate(record.model_dump()) for record in records]
+    rows = await select_rows_async(select_roles_users, ([role.uuid for role in roles],))
+    return apply_roles_users(roles, rows)
+
+def apply_roles_users(roles: list[Role], rows: list[dict[str, Any]]) -> list[Role]:
+    users = {row["role_uuid"]: row["users"] for row in rows}
     
-    role.users = select_single_field("uuid", """
-        SELECT administrators.uuid FROM administrators
-        JOIN administrators_roles ON administrators.uuid = administrators_roles.administrator_uuid
-        JOIN roles ON administrators_roles.role_uuid = roles.uuid                            
-        WHERE roles.uuid = %s
-        """, (role.uuid, )   
-    )
+    for role in roles:
+        role.users = users.get(role.uuid, [])
     
-    return role
+    return roles
 
 class _RoleTableManager(SimpleTableManager):
     model_extended: Type[RoleExtended] = RoleExtended
@@ -39,6 +69,9 @@ class _RoleTableManager(SimpleTableManager):
             model_in_db=RoleInDB,
             model_creation_args=None,
             prepare_record=prepare_from_database_record,
+            prepare_record_async=prepare_from_database_record_async,
+            prepare_records=prepare_from_database_records,
+            prepare_records_async=prepare_from_database_records_async,
         )
     
     def extend_model(self, role: Role) -> RoleExtended:
@@ -48,6 +81,14 @@ class _RoleTableManager(SimpleTableManager):
             **role.model_dump(exclude={"users"}),
             users=AdministratorLibrary.get_all_records_matching("uuid", role.users)
         )
+    
+    async def extend_model_async(self, role: Role) -> RoleExtended:
+        from .administrator_library import AdministratorLibrary
+        
+        return RoleExtended(
+            **role.model_dump(exclude={"users"}),
+            users=await AdministratorLibrary.get_all_records_matching_async("uuid", role.users)
+        )
         
     def verify_role_integrity(self, cursor: Cursor[Any]) -> bool:
         cursor.execute("""
@@ -78,6 +119,8 @@ class _RoleTableManager(SimpleTableManager):
                     VALUES (%s, %s) 
                     ON CONFLICT DO NOTHING
                 """, (administrator_uuid, role_uuid))  
+        
+        UsersCache.invalidate({administrator_uuid, *role.users})
     
     def remove_role_from_administrator(self, role_uuid: UUID, administrator_uuid: UUID, logged_in_user: Administrator):
         from .administrator_library import AdministratorLibrary
@@ -103,6 +146,8 @@ class _RoleTableManager(SimpleTableManager):
                     if not self.verify_role_integrity(cursor):
                         connection.rollback()
                         raise HTTPException(400, f"Cannot revoke role with UUID={role_uuid} from the user, as it would leave at least one permission unassigned. Please assign the affected permission to another user before proceeding.")
+        
+        UsersCache.invalidate({administrator_uuid, *role.users})
 
     def update_administrator_roles(self, administrator_uuid: UUID, roles: list[UUID], logged_in_user: Administrator):
         from .administrator_library import AdministratorLibrary
@@ -118,7 +163,8 @@ class _RoleTableManager(SimpleTableManager):
         if not_existing:
             raise HTTPException(400, f"The following roles do not exist in the system: {', '.join(map(str, not_existing))}")
         
-        assigned_roles = RoleLibrary.get_all_records_matching("uuid", roles).values()
+        affected_roles = self.get_all_records_matching("uuid", list({*roles, *administrator.roles}))
+        assigned_roles = [affected_roles[role_uuid] for role_uuid in roles if role_uuid in affected_roles]
         
         required_permissions = 0
         
@@ -148,6 +194,9 @@ class _RoleTableManager(SimpleTableManager):
                     if not self.verify_role_integrity(cursor):
                         connection.rollback()
                         raise HTTPException(400, f"The user’s roles could not be updated, as this change would result in at least one permission being left unassigned. Please assign the affected permission to another user before continuing.")
+        
+        # members of the previous and the new roles see the changed membership in their extended models
+        UsersCache.invalidate({administrator_uuid, *(user for role in affected_roles.values() for user in role.users)})
  
             
 
@@ -9,10 +9,12 @@ from fastapi import HTTPException
 from config.permissions_config import PERMISSIONS
 from config.regex_config import REGEX_CONFIG
 from modules.postgresql.main import async_pool, pool
-from modules.authentication.passwords import hash_password
+from modules.authentication.password_hasher import PasswordHasher
 from modules.postgresql.simple_select import select_single_field
 from modules.users.guacamole_synchronization import create_entity
 from modules.users.permissions import verify_can_change_password, verify_permissions
+from modules.users.cache import UsersCache
+from modules.users.last_active import LastActiveBuffer
 from modules.users.sublibraries.roles_library import RoleLibrary
 from modules.users.sublibraries.group_library import GroupLibrary
 from modules.users.sublibraries.client_library import ClientLibrary
@@ -36,6 +38,33 @@ class _UsersSystemManager():
     def get_user_password(self, uuid: UUID) -> Optional[str]:
         return AdministratorLibrary.get_password(uuid) or ClientLibrary.get_password(uuid)
     
+    async def get_user_async(self, uuid: UUID) -> Optional[AnyUser]:
+        return await AdministratorLibrary.get_record_by_uuid_async(uuid) or await ClientLibrary.get_record_by_uuid_async(uuid)
+    
+    async def get_user_by_username_async(self, username: str) -> Optional[AnyUser]:
+        return await AdministratorLibrary.get_record_by_field_async("username", username) or await ClientLibrary.get_record_by_field_async("username", username)
+    
+    async def get_user_password_async(self, uuid: UUID) -> Optional[str]:
+        return await AdministratorLibrary.get_password_async(uuid) or await ClientLibrary.get_password_async(uuid)
+    
+    async def get_extended_user_async(self, uuid: UUID) -> Optional[AnyUserExtended]:
+        # read through the users cache, a hit doesn't touch the database
+        user = UsersCache.get(uuid)
+        
+        if user is not None:
+            return user
+        
+        version = UsersCache.get_version(uuid)
+        record = await self.get_user_async(uuid)
+        
+        if record is None:
+            return None
+        
+        user = await self.extend_user_model_async(record)
+        UsersCache.store(user, version)
+        
+        return user
+    
     def get_users(self, filters: GetUsersFilters) -> dict[UUID, AnyUser]:
         users: dict[UUID, AnyUser] = {}
         
@@ -56,13 +85,39 @@ class _UsersSystemManager():
         
         return users
     
+    async def get_users_async(self, filters: GetUsersFilters) -> dict[UUID, AnyUser]:
+        users: dict[UUID, AnyUser] = {}
+        
+        if filters.role is not None and filters.group is not None:
+            return {}
+            
+        if filters.account_type in (None, "administrative") and filters.group is None:
+            if filters.role is None:
+                users |= await AdministratorLibrary.get_all_records_async()
+            else:
+                users |= await AdministratorLibrary.get_all_administrators_with_role_async(filters.role)
+
+        if filters.account_type in (None, "client") and filters.role is None:
+            if filters.group is None:
+                users |= await ClientLibrary.get_all_records_async()
+            else:
+                users |= await ClientLibrary.get_all_clients_in_group_async(filters.group)
+        
+        return users
+    
     def extend_user_model(self, user: AnyUser) -> AnyUserExtended:
         if user.account_type == 'administrative':
             return AdministratorLibrary.extend_model(user)
         if user.account_type == 'client':
             return ClientLibrary.extend_model(user)
+        
+    async def extend_user_model_async(self, user: AnyUser) -> AnyUserExtended:
+        if user.account_type == 'administrative':
+            return await AdministratorLibrary.extend_model_async(user)
+        if user.account_type == 'client':
+            return await ClientLibrary.extend_model_async(user)
     
-    def create_user(self, form: CreateAnyUserForm, logged_in_user: Administrator) -> UUID:                      
+    async def create_user(self, form: CreateAnyUserForm, logged_in_user: Administrator) -> UUID:                      
         validate_user_creation(form)
         
         if form.account_type == 'administrative':
@@ -70,10 +125,12 @@ class _UsersSystemManager():
         elif form.account_type == 'client':
             verify_permissions(logged_in_user, PERMISSIONS.MANAGE_CLIENT_USERS)
         
+        hashed_password = await PasswordHasher.hash(form.password)
+        
         if form.account_type == 'administrative':                       
-            return AdministratorLibrary.create_record(CreateAdministratorArgs.model_validate(form.model_dump()), logged_in_user)
+            return AdministratorLibrary.create_record(CreateAdministratorArgs.model_validate({**form.model_dump(), "password": hashed_password}), logged_in_user)
         if form.account_type == 'client':
-            return ClientLibrary.create_record(CreateClientArgs.model_validate(form.model_dump()))
+            return ClientLibrary.create_record(CreateClientArgs.model_validate({**form.model_dump(), "password": hashed_password}))
         
     async def create_users(self, forms: list[CreateAnyUserForm], logged_in_user: Administrator):
         usernames = []
@@ -135,10 +192,12 @@ class _UsersSystemManager():
         
         if user.account_type == 'administrative':
             verify_permissions(logged_in_user, PERMISSIONS.MANAGE_ADMIN_USERS)
-            return AdministratorLibrary.remove_record(uuid)
-        if user.account_type == 'client':
+            AdministratorLibrary.remove_record(uuid)
+        elif user.account_type == 'client':
             verify_permissions(logged_in_user, PERMISSIONS.MANAGE_CLIENT_USERS)
-            return ClientLibrary.remove_record(uuid)
+            ClientLibrary.remove_record(uuid)
+            
+        UsersCache.invalidate([uuid])
         
     def delete_users(self, uuids: list[UUID],  logged_in_user: Administrator):
         all_administrator_uuids = set(select_single_field("uuid", "SELECT uuid FROM administrators"))
@@ -171,6 +230,8 @@ class _UsersSystemManager():
                         logger.exception("Error occurred during bulk removal of users.")
                         raise HTTPException(500, "Error occurred during bulk removal of users.")
         
+        UsersCache.invalidate([*administrator_uuids_to_delete, *client_uuids_to_delete])
+        
         
     def modify_user(self, uuid: UUID, form: ModifyUserForm, logged_in_user: Administrator) -> AnyUser | None:
         user = self.get_user(uuid)
@@ -199,9 +260,11 @@ class _UsersSystemManager():
             
             ClientLibrary.modify_record(uuid, args)
         
+        UsersCache.invalidate([uuid])
+        
         return self.get_user(uuid)
         
-    def change_password(self, uuid: UUID, new_password: str, logged_in_user: Administrator):
+    async def change_password(self, uuid: UUID, new_password: str, logged_in_user: Administrator):
         user = self.get_user(uuid)
         
         if user is None:
@@ -212,7 +275,7 @@ class _UsersSystemManager():
     
         verify_can_change_password(logged_in_user, user)
     
-        hashed_password = hash_password(new_password)
+        hashed_password = await PasswordHasher.hash(new_password)
     
         if user.account_type == 'administrative':
             return AdministratorLibrary.change_password(uuid, hashed_password)
@@ -220,10 +283,8 @@ class _UsersSystemManager():
             return ClientLibrary.change_password(uuid, hashed_password)
         
     def update_user_last_active(self, logged_in_user: AnyUser):
-        if logged_in_user.account_type == 'administrative':
-            return AdministratorLibrary.update_last_active(logged_in_user.uuid)
-        if logged_in_user.account_type == 'client':
-            return ClientLibrary.update_last_active(logged_in_user.uuid)
+        # buffered in memory, written to the database in batches
+        LastActiveBuffer.record(logged_in_user)
         
     def create_group(self, form: CreateGroupForm) -> UUID:
         validate_group_creation(form)
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import random
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["BroadcastScheduler"]
+
+
+@dataclass
+class BroadcastConsumer:
+    callback: Callable[[Any], Awaitable[None]]
+    has_subscribers: Callable[[], bool]
+
+
+@dataclass
+class BroadcastTopic:
+    name: str
+    interval: float
+    jitter: float
+    source: Callable[[], Any]
+    encoder: Callable[[Any], Awaitable[str]] | None = None
+    decoder: Callable[[str], Any] | None = None
+    consumers: dict[str, BroadcastConsumer] = field(default_factory=dict)
+    task: asyncio.Task | None = None
+
+
+class _BroadcastScheduler():
+    """
+    Runs one producer loop per topic, only while at least one of the topic's consumers has subscribers.
+    Every tick builds the topic's source once and passes it to all consumers with subscribers.
+
+    In a cluster only the leader produces - it also produces for topics demanded by other workers and publishes
+    the encoded sources only while such demand exists, followers deliver the decoded sources to their consumers instead of producing them.
+    """
+    def __init__(self):
+        self._topics: dict[str, BroadcastTopic] = {}
+        self.running = False
+        self.follower = False
+
+        self.publisher: Callable[[str, str], Awaitable[None]] | None = None
+        self.external_demand: Callable[[str], bool] = lambda topic: False
+        self.demand_listener: Callable[[], None] | None = None
+
+    def register_topic(
+        self,
+        name: str,
+        interval: float,
+        jitter: float = 0,
+        source: Callable[[], Any] = lambda: None,
+        encoder: Callable[[Any], Awaitable[str]] | None = None,
+        decoder: Callable[[str], Any] | None = None,
+    ):
+        if name in self._topics:
+            raise Exception(f"Broadcast topic {name} is already registered.")
+
+        self._topics[name] = BroadcastTopic(name=name, interval=interval, jitter=jitter, source=source, encoder=encoder, decoder=decoder)
+
+    def add_consumer(self, topic: str, key: str, callback: Callable[[Any], Awaitable[None]], has_subscribers: Callable[[], bool]):
+        self._topics[topic].consumers[key] = BroadcastConsumer(callback=callback, has_subscribers=has_subscribers)
+        self.refresh()
+
+    def remove_consumer(self, topic: str, key: str):
+        if topic in self._topics:
+            self._topics[topic].consumers.pop(key, None)
+
+    def get_topics(self) -> list[str]:
+        return list(self._topics)
+
+    def has_subscribers(self, topic: str) -> bool:
+        return topic in self._topics and any(consumer.has_subscribers() for consumer in self._topics[topic].consumers.values())
+
+    def start(self):
+        self.running = True
+        self.refresh()
+
+    def stop(self):
+        self.running = False
+
+        for topic in self._topics.values():
+            if topic.task is not None:
+                topic.task.cancel()
+                topic.task = None
+
+    def set_follower(self, follower: bool):
+        self.follower = follower
+        self.refresh()
+
+    def refresh(self):
+        """
+        Starts the producers of topics that gained subscribers.
+        Producers of topics without subscribers stop on their own at the next tick.
+        """
+        if not self.running:
+            return
+
+        if self.demand_listener is not None:
+            self.demand_listener()
+
+        if self.follower:
+            return
+
+        for topic in self._topics.values():
+            if topic.task is None and self._is_demanded(topic):
+                topic.task = asyncio.create_task(self._produce(topic))
+
+    async def deliver(self, name: str, data: str):
+        """
+        Passes a source produced and encoded by another worker to the local consumers of the topic.
+        """
+        topic = self._topics.get(name)
+
+        if topic is None or topic.decoder is None:
+            return
+
+        consumers = self._get_active_consumers(topic)
+
+        if consumers:
+            await self._consume(topic, consumers, topic.decoder(data))
+
+    def _is_demanded(self, topic: BroadcastTopic) -> bool:
+        return self.has_subscribers(topic.name) or self.external_demand(topic.name)
+
+    @staticmethod
+    def _get_active_consumers(topic: BroadcastTopic) -> list[BroadcastConsumer]:
+        return [consumer for consumer in topic.consumers.values() if consumer.has_subscribers()]
+
+    @staticmethod
+    async def _consume(topic: BroadcastTopic, consumers: list[BroadcastConsumer], source: Any):
+        for consumer in consumers:
+            try:
+                await consumer.callback(source)
+            except Exception:
+                logger.exception(f"Exception occured during '{topic.name}' broadcast in {consumer.callback}.")
+
+    async def _produce(self, topic: BroadcastTopic):
+        logger.debug(f"Starting '{topic.name}' broadcast.")
+
+        try:
+            while self.running and not self.follower:
+                if not self._is_demanded(topic):
+                    break
+
+                try:
+                    source = topic.source()
+                    await self._consume(topic, self._get_active_consumers(topic), source)
+
+                    # encoding builds the complete source - only done when another worker consumes it
+                    if self.publisher is not None and topic.encoder is not None and self.external_demand(topic.name):
+                        await self.publisher(topic.name, await topic.encoder(source))
+                except Exception:
+                    logger.exception(f"Exception occured while producing '{topic.name}' broadcast.")
+
+                await asyncio.sleep(topic.interval + random.uniform(0, topic.jitter))
+        finally:
+            if topic.task is asyncio.current_task():
+                topic.task = None
+
+        logger.debug(f"Stopped '{topic.name}' broadcast.")
+
+
+BroadcastScheduler = _BroadcastScheduler()
@@ -0,0 +1,255 @@
+import asyncio
+import inspect
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+from psycopg import AsyncConnection, sql
+from psycopg.rows import dict_row
+
+from config.websockets_config import WEBSOCKETS_CONFIG
+from modules.postgresql.main import async_pool
+from modules.websockets.broadcast_scheduler import BroadcastScheduler
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["ClusterBus"]
+
+
+class _ClusterBus():
+    """
+    Websocket pub/sub between API workers over Postgres LISTEN/NOTIFY.
+    The worker holding the advisory lock is the leader and produces the periodic broadcasts for the whole cluster,
+    every worker fans the received broadcasts and events out to its own websockets.
+    While the bus is down each worker produces its broadcasts and dispatches its events locally.
+    Events are published one after another in the order they were published, also when the bus goes down in between,
+    and handled one after another in the order they were received, also when their handlers are asynchronous.
+
+    Messages are sent as '<json header>\\n<data>' notifications. Data exceeding the notification size limit
+    is split into chunks published in a single transaction, so they are delivered together and in order.
+    Data has to be ASCII-only JSON (json.dumps default) for the chunk size to hold in bytes.
+    """
+    def __init__(self):
+        self.worker_id = uuid4().hex
+        self.active = False
+        self.leader = False
+
+        self._event_handlers: dict[str, Callable[..., None | Awaitable[None]]] = {}
+        self._last_event_task: asyncio.Task | None = None
+        self._last_publish_task: asyncio.Task | None = None
+        self._listener_task: asyncio.Task | None = None
+        self._publish_tasks: set[asyncio.Task] = set()
+        self._chunks: dict[str, list[str]] = {}
+        self._demand: dict[str, dict[str, float]] = {}
+
+    def add_event_handler(self, event: str, handler: Callable[..., None | Awaitable[None]]):
+        """
+        Registers the local handler of a cluster-wide event. Handlers receive JSON decoded arguments.
+        """
+        self._event_handlers[event] = handler
+
+    async def start(self):
+        BroadcastScheduler.external_demand = self.has_remote_demand
+        BroadcastScheduler.demand_listener = self._on_local_demand_change
+        self._listener_task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        BroadcastScheduler.demand_listener = None
+
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+
+    def publish_event(self, event: str, *args: Any):
+        """
+        Dispatches the event on every worker, including this one.
+        """
+        encoded_args = jsonable_encoder(args)
+        previous = self._last_publish_task
+
+        if not self.active and (previous is None or previous.done()):
+            return self._dispatch_event(event, encoded_args)
+
+        # chained after the previous event, so a later event cannot be notified or dispatched locally before it
+        self._last_publish_task = asyncio.create_task(self._publish_event(event, encoded_args, previous))
+
+    async def publish_topic(self, topic: str, data: str):
+        await self._notify({"kind": "topic", "topic": topic}, data)
+
+    def has_remote_demand(self, topic: str) -> bool:
+        deadline = time.monotonic() - 3 * WEBSOCKETS_CONFIG.cluster_heartbeat_interval
+        return any(last_seen > deadline for last_seen in self._demand.get(topic, {}).values())
+
+    ###############################
+    #   publishing
+    ###############################
+    def _spawn(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self._publish_tasks.add(task)
+        task.add_done_callback(self._publish_tasks.discard)
+
+    async def _publish_event(self, event: str, encoded_args: list, previous: asyncio.Task | None):
+        if previous is not None and not previous.done():
+            await asyncio.wait([previous])
+
+        if not self.active:
+            return self._dispatch_event(event, encoded_args)
+
+        try:
+            await self._notify({"kind": "event", "event": event}, json.dumps(encoded_args))
+        except Exception:
+            logger.exception(f"Failed to publish '{event}' event, dispatching it locally.")
+            self._dispatch_event(event, encoded_args)
+
+    async def _announce_demand(self):
+        topics = [topic for topic in BroadcastScheduler.get_topics() if BroadcastScheduler.has_subscribers(topic)]
+
+        if not topics or self.leader or not self.active:
+            return
+
+        try:
+            await self._notify({"kind": "demand"}, json.dumps(topics))
+        except Exception as e:
+            logger.warning(f"Failed to announce broadcast demand: {e}")
+
+    def _on_local_demand_change(self):
+        if self.active and not self.leader:
+            self._spawn(self._announce_demand())
+
+    async def _notify(self, header: dict, data: str):
+        size = WEBSOCKETS_CONFIG.cluster_notify_chunk_size
+        chunks = [data[i:i + size] for i in range(0, len(data), size)] or [""]
+        message_id = uuid4().hex
+
+        async with async_pool.connection() as connection:
+            async with connection.transaction():
+                for index, chunk in enumerate(chunks):
+                    envelope = json.dumps({**header, "worker": self.worker_id, "id": message_id, "index": index, "count": len(chunks)})
+                    await connection.execute("SELECT pg_notify(%s, %s)", (WEBSOCKETS_CONFIG.cluster_channel, f"{envelope}\n{chunk}"))
+
+    ###############################
+    #   listening
+    ###############################
+    async def _listen(self):
+        while True:
+            try:
+                async with async_pool.connection() as connection:
+                    await connection.set_autocommit(True)
+                    try:
+                        await connection.execute(sql.SQL("LISTEN {}").format(sql.Identifier(WEBSOCKETS_CONFIG.cluster_channel)))
+                        self._set_active()
+
+                        while True:
+                            await self._heartbeat(connection)
+                            async for notify in connection.notifies(timeout=WEBSOCKETS_CONFIG.cluster_heartbeat_interval):
+                                await self._on_notify(notify.payload)
+                    finally:
+                        self._set_inactive()
+                        await self._release(connection)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Websocket cluster bus disconnected, reconnecting: {e}")
+
+            await asyncio.sleep(WEBSOCKETS_CONFIG.cluster_reconnect_interval)
+
+    async def _heartbeat(self, connection: AsyncConnection):
+        if not self.leader:
+            async with connection.cursor(row_factory=dict_row) as cursor:
+                await cursor.execute("SELECT pg_try_advisory_lock(%s) AS locked", (WEBSOCKETS_CONFIG.cluster_leader_lock_id,))
+                row = await cursor.fetchone()
+
+            if row is not None and row["locked"]:
+                self._become_leader()
+
+        await self._announce_demand()
+
+    async def _on_notify(self, payload: str):
+        header_text, _, chunk = payload.partition("\n")
+        header = json.loads(header_text)
+
+        if header["count"] > 1:
+            chunks = self._chunks.setdefault(header["id"], [])
+            chunks.append(chunk)
+            if len(chunks) < header["count"]:
+                return
+            data = "".join(self._chunks.pop(header["id"]))
+        else:
+            data = chunk
+
+        match header["kind"]:
+            case "event":
+                self._dispatch_event(header["event"], json.loads(data))
+            case "demand":
+                if self.leader:
+                    for topic in json.loads(data):
+                        self._demand.setdefault(topic, {})[header["worker"]] = time.monotonic()
+                    BroadcastScheduler.refresh()
+            case "topic":
+                if not self.leader and header["worker"] != self.worker_id:
+                    await BroadcastScheduler.deliver(header["topic"], data)
+
+    def _dispatch_event(self, event: str, args: list):
+        handler = self._event_handlers.get(event)
+
+        if handler is None:
+            return logger.warning(f"No handler registered for cluster event '{event}'.")
+
+        # chained after the previous event, so a slow asynchronous handler cannot be overtaken by a later event
+        self._last_event_task = asyncio.create_task(self._handle_event(event, handler, args, self._last_event_task))
+
+    @staticmethod
+    async def _handle_event(event: str, handler: Callable[..., None | Awaitable[None]], args: list, previous: asyncio.Task | None):
+        if previous is not None and not previous.done():
+            await asyncio.wait([previous])
+
+        try:
+            result = handler(*args)
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            logger.exception(f"Handler of cluster event '{event}' failed.")
+
+    ###############################
+    #   leadership
+    ###############################
+    def _set_active(self):
+        self.active = True
+        self._chunks.clear()
+        BroadcastScheduler.set_follower(True)
+        logger.info(f"Worker {self.worker_id} joined the websocket cluster bus.")
+
+    def _become_leader(self):
+        self.leader = True
+        self._demand.clear()
+        BroadcastScheduler.publisher = self.publish_topic
+        BroadcastScheduler.set_follower(False)
+        logger.info(f"Worker {self.worker_id} became the websocket broadcast leader.")
+
+    def _set_inactive(self):
+        self.active = False
+        self.leader = False
+        BroadcastScheduler.publisher = None
+        # without the bus every worker produces its own broadcasts
+        BroadcastScheduler.set_follower(False)
+
+    async def _release(self, connection: AsyncConnection):
+        """
+        Restores the pooled connection's session state before it is returned to the pool.
+        """
+        try:
+            await connection.execute("UNLISTEN *")
+            await connection.execute("SELECT pg_advisory_unlock_all()")
+            await connection.set_autocommit(False)
+        except Exception as e:
+            logger.debug(repr(e))
+
+
+ClusterBus = _ClusterBus()
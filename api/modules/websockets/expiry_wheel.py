@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T", bound=Hashable)
+
+__all__ = ["ExpiryWheel"]
+
+
+class ExpiryWheel(Generic[T]):
+    """
+    Hashed timer wheel driven by a single task shared by all of its entries.
+    Entries are bucketed by the tick they expire at, so adding and removing one is O(1)
+    and every tick expires a whole bucket at once. The task only runs while there are entries.
+    Expiration times are wall-clock timestamps, precise to the wheel's resolution.
+    """
+    def __init__(self, resolution: float, on_expire: Callable[[list[T]], Awaitable[None]]):
+        self.resolution = resolution
+        self._on_expire = on_expire
+        
+        self._buckets: dict[int, set[T]] = {}
+        self._entries: dict[T, int] = {}
+        self._cursor = self._current_tick()
+        self._task: asyncio.Task | None = None
+        
+    def __len__(self) -> int:
+        return len(self._entries)
+        
+    def add(self, entry: T, expires_at: float):
+        self.remove(entry)
+        
+        if not self._entries:
+            self._cursor = self._current_tick()
+        
+        # already expired entries expire with the next tick
+        tick = max(math.ceil(expires_at / self.resolution), self._cursor + 1)
+        
+        self._buckets.setdefault(tick, set()).add(entry)
+        self._entries[entry] = tick
+        
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            
+    def remove(self, entry: T):
+        tick = self._entries.pop(entry, None)
+        
+        if tick is None:
+            return
+        
+        bucket = self._buckets.get(tick)
+        
+        if bucket is not None:
+            bucket.discard(entry)
+            if not bucket:
+                del self._buckets[tick]
+                
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+            
+    def _current_tick(self) -> int:
+        return math.floor(time.time() / self.resolution)
+                
+    def _pop_expired(self) -> list[T]:
+        current_tick = self._current_tick()
+        expired: list[T] = []
+        
+        while self._cursor < current_tick:
+            self._cursor += 1
+            
+            for entry in self._buckets.pop(self._cursor, ()):
+                del self._entries[entry]
+                expired.append(entry)
+                
+        return expired
+                
+    async def _run(self):
+        try:
+            while self._entries:
+                await asyncio.sleep(self.resolution - time.time() % self.resolution)
+                
+                expired = self._pop_expired()
+                
+                if not expired:
+                    continue
+                
+                try:
+                    await self._on_expire(expired)
+                except Exception:
+                    logger.exception("Exception occured while expiring ExpiryWheel entries.")
+        finally:
+            if self._task is asyncio.current_task():
+                self._task = None
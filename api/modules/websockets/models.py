@@ -58,4 +58,23 @@ class Subscription(BaseModel):
 
 
 
-SubscriptionsDict = dict[int, Subscription]
\ No newline at end of file
+SubscriptionsDict = dict[int, Subscription]
+
+
+
+class WebSocketQueueMetrics(BaseModel):
+    websocket_id: int
+    client: str
+    queue_depth: int
+    sent_frames: int
+    dropped_frames: int
+    max_lag_seconds: float
+
+
+
+class WebSocketSendQueuesMetrics(BaseModel):
+    websockets: int
+    queued_frames: int
+    dropped_frames: int
+    evicted_websockets: int
+    queues: list[WebSocketQueueMetrics]
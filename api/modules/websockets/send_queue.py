@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from starlette.websockets import WebSocket, WebSocketState
+from config.websockets_config import WEBSOCKETS_CONFIG
+from modules.websockets.models import WebSocketQueueMetrics, WebSocketSendQueuesMetrics
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["WebSocketSendQueues"]
+
+# Message types carrying a full snapshot - a newer frame of the same type makes queued ones obsolete
+COALESCIBLE_MESSAGE_TYPES = {"DATA_DYNAMIC", "DATA_DYNAMIC_DISKS", "DATA_DYNAMIC_CONNECTIONS"}
+# Message types relative to previously sent frames - once one is dropped the producer has to send a full frame again
+RESYNC_MESSAGE_TYPES = {"DATA_DYNAMIC_DELTA"}
+
+# The event loop only keeps weak references to tasks - closes of evicted websockets are kept here until done
+close_tasks: set[asyncio.Task] = set()
+
+
+def is_connected(websocket: WebSocket) -> bool:
+    return websocket.application_state == WebSocketState.CONNECTED and websocket.client_state == WebSocketState.CONNECTED
+
+
+@dataclass
+class Frame:
+    type: str
+    data: str
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class WebSocketSender():
+    """
+    Bounded outbound queue of a single websocket drained by its own writer task.
+    Producers never await the socket, a consumer lagging behind is disconnected.
+    """
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.closed = False
+        self.resync = False
+
+        self._frames: deque[Frame] = deque()
+        self._wakeup = asyncio.Event()
+        self._writer = asyncio.create_task(self._write())
+
+        self.sent_frames = 0
+        self.dropped_frames = 0
+        self.max_lag_seconds = 0.0
+
+    def put(self, frame: Frame):
+        if self.closed:
+            return
+
+        if self._frames and time.monotonic() - self._frames[0].enqueued_at > WEBSOCKETS_CONFIG.max_send_lag:
+            return self.evict("Websocket consumer lagging behind.")
+
+        if len(self._frames) >= WEBSOCKETS_CONFIG.send_queue_size:
+            if frame.type in RESYNC_MESSAGE_TYPES:
+                self._coalesce(frame.type)
+                self.dropped_frames += 1
+                self.resync = True
+                return
+            if frame.type not in COALESCIBLE_MESSAGE_TYPES or not self._coalesce(frame.type):
+                return self.evict("Websocket send queue overflow.")
+
+        self._frames.append(frame)
+        self._wakeup.set()
+
+    def evict(self, reason: str):
+        if self.closed:
+            return
+
+        logger.warning(f"Disconnecting slow websocket consumer {self.websocket.client}: {reason}")
+        WebSocketSendQueues.evicted_websockets += 1
+        self.closed = True
+        self.dropped_frames += len(self._frames)
+        self._frames.clear()
+        self._wakeup.set()
+        task = asyncio.create_task(self._close(1013, reason))
+        close_tasks.add(task)
+        task.add_done_callback(close_tasks.discard)
+
+    def stop(self):
+        self.closed = True
+        self._wakeup.set()
+
+    def get_metrics(self) -> WebSocketQueueMetrics:
+        return WebSocketQueueMetrics(
+            websocket_id=id(self.websocket),
+            client=str(self.websocket.client),
+            queue_depth=len(self._frames),
+            sent_frames=self.sent_frames,
+            dropped_frames=self.dropped_frames,
+            max_lag_seconds=self.max_lag_seconds,
+        )
+
+    def is_connected(self) -> bool:
+        return is_connected(self.websocket)
+
+    def _coalesce(self, message_type: str) -> bool:
+        """
+        Drops queued frames of the given type. Returns True if any frame was dropped.
+        """
+        kept = deque(frame for frame in self._frames if frame.type != message_type)
+        dropped = len(self._frames) - len(kept)
+
+        if dropped:
+            self._frames = kept
+            self.dropped_frames += dropped
+
+        return dropped > 0
+
+    async def _write(self):
+        try:
+            while not self.closed:
+                if not self._frames:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), WEBSOCKETS_CONFIG.send_queue_idle_check_interval)
+                    except TimeoutError:
+                        if not self.is_connected():
+                            break
+                    continue
+
+                frame = self._frames.popleft()
+                self.max_lag_seconds = max(self.max_lag_seconds, time.monotonic() - frame.enqueued_at)
+
+                try:
+                    await asyncio.wait_for(self._send(frame), WEBSOCKETS_CONFIG.send_timeout)
+                    self.sent_frames += 1
+                except TimeoutError:
+                    self.evict("Websocket send timed out.")
+                except Exception:
+                    # socket disconnected - subscription managers clean up on their own
+                    break
+        finally:
+            self.closed = True
+            WebSocketSendQueues.discard(self.websocket, self)
+
+    async def _send(self, frame: Frame):
+        await self.websocket.send_text(frame.data)
+
+    async def _close(self, code: int, reason: str):
+        try:
+            if self.is_connected():
+                await self.websocket.close(code, reason)
+        except RuntimeError:
+            # WebSocket already closed
+            pass
+
+
+class _WebSocketSendQueues():
+    def __init__(self):
+        self._senders: dict[int, WebSocketSender] = {}
+        self.evicted_websockets = 0
+
+    def enqueue(self, websocket: WebSocket, message_type: str, data: str):
+        """
+        Queues an already serialized frame for the websocket and returns immediately.
+        Frames for evicted or disconnected websockets are dropped.
+        """
+        sender = self._senders.get(id(websocket))
+
+        if sender is None:
+            if not is_connected(websocket):
+                return
+            sender = WebSocketSender(websocket)
+            self._senders[id(websocket)] = sender
+
+        sender.put(Frame(type=message_type, data=data))
+
+    def pop_resync(self, websocket: WebSocket) -> bool:
+        """
+        Returns True once after a frame relative to previous ones was dropped for the websocket.
+        """
+        sender = self._senders.get(id(websocket))
+
+        if sender is None or not sender.resync:
+            return False
+
+        sender.resync = False
+        return True
+
+    def discard(self, websocket: WebSocket, sender: WebSocketSender | None = None):
+        current = self._senders.get(id(websocket))
+
+        if current is not None and (sender is None or current is sender):
+            current.stop()
+            del self._senders[id(websocket)]
+
+    def get_metrics(self) -> WebSocketSendQueuesMetrics:
+        queues = [sender.get_metrics() for sender in self._senders.values()]
+
+        return WebSocketSendQueuesMetrics(
+            websockets=len(queues),
+            queued_frames=sum(queue.queue_depth for queue in queues),
+            dropped_frames=sum(queue.dropped_frames for queue in queues),
+            evicted_websockets=self.evicted_websockets,
+            queues=queues,
+        )
+
+
+WebSocketSendQueues = _WebSocketSendQueues()
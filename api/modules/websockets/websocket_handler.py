@@ -1,10 +1,9 @@
-import asyncio
-from datetime import datetime, timezone
 import logging
 from urllib.parse import unquote
 from starlette.websockets import WebSocket, WebSocketState
 from pydantic import BaseModel, ConfigDict
 from modules.websockets.websocket_manager import GlobalWebSocketManager
+from modules.websockets.send_queue import WebSocketSendQueues
 from modules.users.models import AnyUser
 from modules.exceptions.models import CredentialsException
 from modules.authentication.validation import decode_token, get_authenticated_user
@@ -14,7 +13,6 @@ logger = logging.getLogger(__name__)
 
 class WebSocketHandler(BaseModel):
     websocket: WebSocket
-    closer: asyncio.Task | None = None
     user: AnyUser | None = None
     
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -34,10 +32,8 @@ class WebSocketHandler(BaseModel):
             access_token = access_token.replace('Bearer ', '')
         
         try:             
-            self.user = get_authenticated_user(access_token)
-            await GlobalWebSocketManager.register(self.user.uuid, self)
-            
-            self.closer = asyncio.create_task(self.__close_at_token_expiration__(access_token))
+            self.user = await get_authenticated_user(access_token)
+            await GlobalWebSocketManager.register(self.user.uuid, self, decode_token(access_token).expiration_date)
             
         except CredentialsException:
             return await self.close(4401, "Could not validate credentials.")
@@ -46,26 +42,11 @@ class WebSocketHandler(BaseModel):
             await self.close(1011, "Internal server error.")
             logger.exception("Exception occured in the WebsocketHandler's accept method")
         
-    async def __close_at_token_expiration__(self, access_token):
-        try:
-            decoded_payload = decode_token(access_token)
-            expiration_delay = max(0, (decoded_payload.expiration_date - datetime.now(timezone.utc)).total_seconds())
-            
-            if expiration_delay > 0:
-                await asyncio.sleep(expiration_delay)
-            
-            await self.close(4401, "Access token expired.")
-        except asyncio.CancelledError:
-            pass
-        except Exception:
-            logger.exception("Exception occured in the WebsocketHandler's __close_at_token_expiration__ method")
-        
     async def close(self, code: int = 1000, reason: str | None = None) -> None:
-        if self.closer is not None:
-            self.closer.cancel()
-            
         if self.user:
             await GlobalWebSocketManager.unregister(self.user.uuid, self)
+        
+        WebSocketSendQueues.discard(self.websocket)
             
         try:
             if self.is_connected():
@@ -1,35 +1,59 @@
 import asyncio
+import logging
+from datetime import datetime
 from uuid import UUID
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable
+
+from config.websockets_config import WEBSOCKETS_CONFIG
+from modules.websockets.expiry_wheel import ExpiryWheel
 
 if TYPE_CHECKING:
     from modules.websockets.websocket_handler import WebSocketHandler
 
+logger = logging.getLogger(__name__)
+
 
 class _WebSocketManager:
     def __init__(self):
         self._connections: dict[UUID, set["WebSocketHandler"]] = dict()
         self._lock = asyncio.Lock()
+        self._token_expiry: ExpiryWheel["WebSocketHandler"] = ExpiryWheel(WEBSOCKETS_CONFIG.token_expiry_resolution, self._close_expired)
+        # notified whenever a user is forcibly disconnected, e.g. to drop the user's cached credentials
+        self.disconnect_listeners: list[Callable[[UUID], None]] = []
 
-    async def register(self, user_uuid: UUID, handler: "WebSocketHandler"):
+    async def register(self, user_uuid: UUID, handler: "WebSocketHandler", token_expiration_date: datetime):
         async with self._lock:
             self._connections.setdefault(user_uuid, set()).add(handler)
+            self._token_expiry.add(handler, token_expiration_date.timestamp())
 
     async def unregister(self, user_uuid: UUID, handler: "WebSocketHandler"):
         async with self._lock:
+            self._token_expiry.remove(handler)
             if user_uuid in self._connections:
                 self._connections[user_uuid].discard(handler)
                 if not self._connections[user_uuid]:
                     del self._connections[user_uuid]
 
     async def disconnect_user(self, user_uuid: UUID, code: int = 4403, reason: str = "Account deleted"):
+        for listener in self.disconnect_listeners:
+            listener(user_uuid)
+
         async with self._lock:
             handlers = list(self._connections.get(user_uuid, []))
 
-        for handler in handlers:
-            await handler.close(code, reason)
+        await self._close_all(handlers, code, reason)
+        
+    async def _close_expired(self, handlers: list["WebSocketHandler"]):
+        await self._close_all(handlers, 4401, "Access token expired.")
+        
+    async def _close_all(self, handlers: list["WebSocketHandler"], code: int, reason: str):
+        results = await asyncio.gather(*(handler.close(code, reason) for handler in handlers), return_exceptions=True)
+        
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Failed to close websocket: {result!r}")
    
             
 GlobalWebSocketManager = _WebSocketManager()
 
-__all__ = ["GlobalWebSocketManager"]
\ No newline at end of file
+__all__ = ["GlobalWebSocketManager"]
@@ -0,0 +1,160 @@
+"""
+Shared fixtures of the API tests.
+
+The tests don't need a database - both connection pools are replaced with a fake recording the executed queries.
+The jwt secret mount has to be provided as for a deployment, the remaining environment has defaults below.
+
+Run from the api directory:
+
+    python -m pytest
+"""
+import os
+import re
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from typing import Any
+
+import pytest
+
+for name, value in {
+    "DB_HOSTNAME": "localhost",
+    "DB_USER": "cherry",
+    "DB_PASSWORD": "cherry",
+    "DB_NAME": "cherry",
+    "SYSTEM_WORKER_UID": "1000",
+    "SYSTEM_WORKER_GID": "1000",
+    "NETWORK_RAS_NAME": "cherry-ras",
+    "GUACD_HOSTNAME": "cherry-guacd",
+    "DOMAIN_NAME": "localhost",
+}.items():
+    os.environ.setdefault(name, value)
+
+from psycopg import sql
+
+from modules.postgresql.main import async_pool, pool
+
+# 'SELECT * FROM <table>' queries of the table managers are answered with the table's rows
+SELECT_TABLE_PATTERN = re.compile(r'\s*SELECT \* FROM "?(\w+)"?', re.IGNORECASE)
+
+
+class FakeDatabase():
+    """
+    Stands in for both connection pools. Every executed query is recorded,
+    'SELECT * FROM <table>' queries return all rows of the table regardless of their conditions, other queries return no rows.
+    """
+    def __init__(self):
+        self.tables: dict[str, list[dict[str, Any]]] = {}
+        self.queries: list[str] = []
+
+    def execute(self, query: str | sql.Composable) -> list[dict[str, Any]]:
+        text = query.as_string() if isinstance(query, sql.Composable) else query
+        self.queries.append(text)
+
+        match = SELECT_TABLE_PATTERN.match(text)
+        return list(self.tables.get(match.group(1), [])) if match else []
+
+    @contextmanager
+    def connection(self, *args, **kwargs):
+        yield FakeConnection(self)
+
+    @asynccontextmanager
+    async def async_connection(self, *args, **kwargs):
+        yield FakeAsyncConnection(self)
+
+
+class FakeCursor():
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+        self.rows: list[dict[str, Any]] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, query, params=None, **kwargs):
+        self.rows = self.database.execute(query)
+        return self
+
+    def executemany(self, query, params_seq, **kwargs):
+        self.database.execute(query)
+
+    def fetchone(self) -> dict[str, Any] | None:
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self) -> list[dict[str, Any]]:
+        return self.rows
+
+
+class FakeConnection():
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+
+    def cursor(self, *args, **kwargs) -> FakeCursor:
+        return FakeCursor(self.database)
+
+    def execute(self, query, params=None, **kwargs) -> FakeCursor:
+        return self.cursor().execute(query, params)
+
+    def transaction(self):
+        return nullcontext()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class FakeAsyncCursor():
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+        self.rows: list[dict[str, Any]] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, query, params=None, **kwargs):
+        self.rows = self.database.execute(query)
+        return self
+
+    async def executemany(self, query, params_seq, **kwargs):
+        self.database.execute(query)
+
+    async def fetchone(self) -> dict[str, Any] | None:
+        return self.rows[0] if self.rows else None
+
+    async def fetchall(self) -> list[dict[str, Any]]:
+        return self.rows
+
+
+class FakeAsyncConnection():
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+
+    def cursor(self, *args, **kwargs) -> FakeAsyncCursor:
+        return FakeAsyncCursor(self.database)
+
+    async def execute(self, query, params=None, **kwargs) -> FakeAsyncCursor:
+        return await self.cursor().execute(query, params)
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+@pytest.fixture
+def database(monkeypatch) -> FakeDatabase:
+    database = FakeDatabase()
+    monkeypatch.setattr(pool, "connection", database.connection)
+    monkeypatch.setattr(async_pool, "connection", database.async_connection)
+    return database
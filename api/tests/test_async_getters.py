@@ -0,0 +1,91 @@
+import asyncio
+import threading
+from uuid import uuid4
+
+import pytest
+
+from modules.authentication.tokens import create_access_token
+from modules.authentication.validation import get_authenticated_user
+from modules.machine_resources.iso_files.library import IsoLibrary
+from modules.machine_resources.machine_templates.library import MachineTemplatesLibrary
+from modules.postgresql.main import pool
+from modules.users.models import Administrator
+from modules.users.sublibraries.group_library import GroupLibrary
+from modules.users.sublibraries.roles_library import RoleLibrary
+from modules.users.users import UsersManager
+
+
+@pytest.fixture
+def sync_connections_on_event_loop(database, monkeypatch) -> list[str]:
+    """
+    Records the threads the synchronous pool was borrowed on while they were running an event loop.
+    """
+    violations: list[str] = []
+
+    def connection(*args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+            violations.append(threading.current_thread().name)
+        except RuntimeError:
+            pass
+        return database.connection(*args, **kwargs)
+
+    monkeypatch.setattr(pool, "connection", connection)
+    return violations
+
+
+@pytest.fixture
+def administrator(database) -> Administrator:
+    administrator_uuid = uuid4()
+    database.tables = {
+        "administrators": [{"uuid": administrator_uuid, "username": f"admin-{administrator_uuid}"}],
+        "groups": [{"uuid": uuid4(), "name": "group"}],
+        "roles": [{"uuid": uuid4(), "name": "role", "permissions": 0}],
+        "iso_files": [{
+            "uuid": uuid4(),
+            "name": "iso",
+            "remote": False,
+            "file_name": "iso.iso",
+            "file_location": None,
+            "file_size_bytes": 0,
+            "last_used": None,
+            "imported_by": administrator_uuid,
+            "imported_at": None,
+            "last_modified_by": administrator_uuid,
+            "last_modified_at": None,
+        }],
+        "machine_templates": [{"uuid": uuid4(), "owner_uuid": administrator_uuid, "name": "template", "ram": 1024, "vcpu": 1}],
+    }
+    return Administrator(uuid=administrator_uuid, username=f"admin-{administrator_uuid}")
+
+
+async def use_async_getters(administrator: Administrator):
+    assert await UsersManager.get_user_async(administrator.uuid) is not None
+    assert await UsersManager.get_user_by_username_async(administrator.username) is not None
+    await UsersManager.get_user_password_async(administrator.uuid)
+    assert await UsersManager.get_extended_user_async(administrator.uuid) is not None
+
+    for library in (GroupLibrary, RoleLibrary, IsoLibrary, MachineTemplatesLibrary):
+        records = await library.get_all_records_async()
+        assert records
+
+        record_uuid = next(iter(records))
+        assert await library.get_record_by_uuid_async(record_uuid) is not None
+        assert await library.get_all_records_matching_async("uuid", [record_uuid])
+
+    for library in (GroupLibrary, RoleLibrary):
+        await library.extend_model_async(next(iter((await library.get_all_records_async()).values())))
+
+
+def test_async_getters_do_not_use_the_sync_pool_on_the_event_loop(database, sync_connections_on_event_loop, administrator):
+    asyncio.run(use_async_getters(administrator))
+
+    assert database.queries
+    assert sync_connections_on_event_loop == []
+
+
+def test_authentication_does_not_use_the_sync_pool_on_the_event_loop(database, sync_connections_on_event_loop, administrator):
+    user = asyncio.run(get_authenticated_user(create_access_token(administrator)))
+
+    assert user.uuid == administrator.uuid
+    assert sync_connections_on_event_loop == []
@@ -0,0 +1,34 @@
+from uuid import UUID, uuid4
+
+from modules.machine_lifecycle.models import MachineDisk, MachineParameters
+from modules.machine_lifecycle.parameters_cache import MachineParametersCache
+from modules.machine_state.data_payloads.static_properties_payload import get_machine_properties_payloads_by_uuids
+
+
+def build_machine_parameters(machine_uuid: UUID) -> MachineParameters:
+    return MachineParameters.model_construct(
+        uuid=machine_uuid,
+        title=f"machine-{machine_uuid}",
+        description=None,
+        metadata=None,
+        system_disk=MachineDisk.model_construct(name="system", size=1024, type="raw"),
+        additional_disks=None,
+    )
+
+
+def count_properties_payload_queries(database, monkeypatch, machine_count: int) -> int:
+    machines = {machine_uuid: build_machine_parameters(machine_uuid) for machine_uuid in (uuid4() for _ in range(machine_count))}
+    monkeypatch.setattr(MachineParametersCache, "get_many", lambda machine_uuids: {machine_uuid: machines[machine_uuid] for machine_uuid in machine_uuids})
+
+    database.queries.clear()
+    payloads = get_machine_properties_payloads_by_uuids(list(machines))
+
+    assert set(payloads) == set(machines)
+    return len(database.queries)
+
+
+def test_properties_payload_queries_do_not_grow_with_machines(database, monkeypatch):
+    single = count_properties_payload_queries(database, monkeypatch, 1)
+    many = count_properties_payload_queries(database, monkeypatch, 50)
+
+    assert single == many
@@ -0,0 +1,111 @@
+import asyncio
+from typing import Any, Callable
+from uuid import UUID, uuid4
+
+import pytest
+
+from modules.machine_resources.iso_files.library import IsoLibrary
+from modules.machine_resources.machine_templates.library import MachineTemplatesLibrary
+from modules.postgresql.simple_table_manager import SimpleTableManager
+from modules.users.sublibraries.administrator_library import AdministratorLibrary
+from modules.users.sublibraries.client_library import ClientLibrary
+from modules.users.sublibraries.group_library import GroupLibrary
+from modules.users.sublibraries.roles_library import RoleLibrary
+
+
+###############################
+#   rows
+###############################
+def build_account_rows(count: int) -> list[dict[str, Any]]:
+    return [{"uuid": uuid4(), "username": f"user-{index}"} for index in range(count)]
+
+
+def build_named_rows(count: int) -> list[dict[str, Any]]:
+    return [{"uuid": uuid4(), "name": f"record-{index}", "permissions": 0} for index in range(count)]
+
+
+def build_iso_rows(administrator_uuids: list[UUID]) -> list[dict[str, Any]]:
+    return [
+        {
+            "uuid": uuid4(),
+            "name": f"iso-{index}",
+            "remote": False,
+            "file_name": f"iso-{index}.iso",
+            "file_location": None,
+            "file_size_bytes": 0,
+            "last_used": None,
+            "imported_by": administrator_uuid,
+            "imported_at": None,
+            "last_modified_by": administrator_uuid,
+            "last_modified_at": None,
+        }
+        for index, administrator_uuid in enumerate(administrator_uuids)
+    ]
+
+
+def build_template_rows(administrator_uuids: list[UUID]) -> list[dict[str, Any]]:
+    return [
+        {"uuid": uuid4(), "owner_uuid": administrator_uuid, "name": f"template-{index}", "ram": 1024, "vcpu": 1}
+        for index, administrator_uuid in enumerate(administrator_uuids)
+    ]
+
+
+def fill_accounts(database, count: int):
+    database.tables = {"administrators": build_account_rows(count)}
+
+
+def fill_clients(database, count: int):
+    database.tables = {"clients": build_account_rows(count)}
+
+
+def fill_groups(database, count: int):
+    database.tables = {"groups": build_named_rows(count)}
+
+
+def fill_roles(database, count: int):
+    database.tables = {"roles": build_named_rows(count)}
+
+
+# every record references its own administrator, so resolving them one by one would grow with the rows
+def fill_iso_files(database, count: int):
+    administrators = build_account_rows(count)
+    database.tables = {"administrators": administrators, "iso_files": build_iso_rows([row["uuid"] for row in administrators])}
+
+
+def fill_templates(database, count: int):
+    administrators = build_account_rows(count)
+    database.tables = {"administrators": administrators, "machine_templates": build_template_rows([row["uuid"] for row in administrators])}
+
+
+LIBRARIES: dict[str, tuple[SimpleTableManager, Callable]] = {
+    "administrators": (AdministratorLibrary, fill_accounts),
+    "clients": (ClientLibrary, fill_clients),
+    "groups": (GroupLibrary, fill_groups),
+    "roles": (RoleLibrary, fill_roles),
+    "iso_files": (IsoLibrary, fill_iso_files),
+    "machine_templates": (MachineTemplatesLibrary, fill_templates),
+}
+
+
+###############################
+#   tests
+###############################
+def count_get_all_records_queries(database, library: SimpleTableManager, fill: Callable, count: int, use_async: bool) -> int:
+    fill(database, count)
+    database.queries.clear()
+
+    records = asyncio.run(library.get_all_records_async()) if use_async else library.get_all_records()
+
+    assert len(records) == count
+    return len(database.queries)
+
+
+@pytest.mark.parametrize("use_async", [False, True], ids=["sync", "async"])
+@pytest.mark.parametrize("library_name", LIBRARIES)
+def test_get_all_records_queries_do_not_grow_with_rows(database, library_name: str, use_async: bool):
+    library, fill = LIBRARIES[library_name]
+
+    single = count_get_all_records_queries(database, library, fill, 1, use_async)
+    many = count_get_all_records_queries(database, library, fill, 50, use_async)
+
+    assert single == many
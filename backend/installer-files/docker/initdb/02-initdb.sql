@@ -68,6 +68,16 @@ CREATE TABLE deployed_machines_clients (
     FOREIGN KEY(client_uuid) REFERENCES clients(uuid) ON DELETE CASCADE
 );
 
+-- Guacamole connections of a machine, guacamole_connection itself is only identified by '<machine_uuid>_<protocol>' names
+CREATE TABLE machine_connections (
+    machine_uuid UUID,
+    connection_id INTEGER UNIQUE,
+    protocol VARCHAR(32) NOT NULL,
+    PRIMARY KEY(machine_uuid, connection_id),
+    FOREIGN KEY(machine_uuid) REFERENCES deployed_machines_owners(machine_uuid) ON DELETE CASCADE,
+    FOREIGN KEY(connection_id) REFERENCES guacamole_connection(connection_id) ON DELETE CASCADE
+);
+
 CREATE TABLE network_panel_states (
 	owner_uuid UUID PRIMARY KEY,
 	positions JSONB NOT NULL,
@@ -156,6 +166,7 @@ CREATE INDEX administrators_roles_idx ON administrators_roles (administrator_uui
 CREATE INDEX clients_groups_idx ON clients_groups (client_uuid, group_uuid);
 CREATE INDEX deployed_machines_owner_idx ON deployed_machines_owners(machine_uuid, owner_uuid);
 CREATE INDEX deployed_machines_clients_idx ON deployed_machines_clients(machine_uuid, client_uuid);
+CREATE INDEX machine_connections_idx ON machine_connections(machine_uuid, protocol);
 CREATE INDEX network_panel_states_idx ON network_panel_states(owner_uuid);
 CREATE INDEX machine_snapshots_idx ON machine_snapshots(uuid, owner_uuid);
 CREATE INDEX machine_snapshots_shares_idx ON machine_snapshots_shares(snapshot_uuid, recipient_uuid);
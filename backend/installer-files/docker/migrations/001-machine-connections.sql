@@ -0,0 +1,25 @@
+-- Adds the machine_connections mapping table to databases initialized before it was part of 02-initdb.sql
+-- and backfills it from the '<machine_uuid>_<protocol>' names of existing guacamole connections.
+-- Safe to run more than once:
+--     docker exec -i <postgres container> psql -U <user> -d <database> < 001-machine-connections.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS machine_connections (
+    machine_uuid UUID,
+    connection_id INTEGER UNIQUE,
+    protocol VARCHAR(32) NOT NULL,
+    PRIMARY KEY(machine_uuid, connection_id),
+    FOREIGN KEY(machine_uuid) REFERENCES deployed_machines_owners(machine_uuid) ON DELETE CASCADE,
+    FOREIGN KEY(connection_id) REFERENCES guacamole_connection(connection_id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS machine_connections_idx ON machine_connections(machine_uuid, protocol);
+
+INSERT INTO machine_connections (machine_uuid, connection_id, protocol)
+SELECT deployed_machines_owners.machine_uuid, guacamole_connection.connection_id, guacamole_connection.protocol
+FROM guacamole_connection
+JOIN deployed_machines_owners ON guacamole_connection.connection_name = deployed_machines_owners.machine_uuid::text || '_' || guacamole_connection.protocol
+ON CONFLICT DO NOTHING;
+
+COMMIT;